@@ -0,0 +1,235 @@
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+LABELS = ('Right', 'Left')   # índice de mano en las columnas
+PALM = [0, 5, 17]            # mismos landmarks que OptimizedHandTracker._palm_center_fast
+
+# Columnas de una traza: nombre -> (dtype, forma por frame)
+COLUMNS = {
+    'frame': (np.int32, ()),
+    't': (np.float64, ()),
+    'present': (np.bool_, (2,)),
+    'palm': (np.float32, (2, 2)),           # centro de palma en píxeles (NaN si no hay mano)
+    'landmarks': (np.float32, (2, 21, 3)),  # normalizados, como los da MediaPipe (NaN si no hay mano)
+}
+
+
+def _make_hands(static_image_mode, model_complexity):
+    import mediapipe as mp
+    return mp.solutions.hands.Hands(static_image_mode=static_image_mode, max_num_hands=2,
+                                    min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                                    model_complexity=model_complexity)
+
+
+def _chunk_dir(out_dir, start):
+    return os.path.join(out_dir, 'chunks', f"{start:09d}")
+
+
+def extract_chunk(video, start, end, out_dir, width, height, overlap=30, static_image_mode=False,
+                  model_complexity=0):
+    """
+    Extraer los landmarks de los frames [start, end) de un vídeo.
+
+    En modo vídeo MediaPipe usa el frame anterior para seguir la mano: sin
+    historial, el primer frame de un trozo no daría lo mismo que en una
+    pasada continua. Por eso se procesan antes `overlap` frames que se
+    descartan. Con static_image_mode cada frame es independiente y no hace falta.
+    Devuelve (pid, frames escritos, segundos).
+    """
+    import cv2
+    began = time.perf_counter()
+    preroll = 0 if static_image_mode else min(overlap, start)
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start - preroll)
+    hands = _make_hands(static_image_mode, model_complexity)
+
+    count = end - start
+    data = {name: np.full((count,) + shape, np.nan if dtype == np.float32 else 0, dtype=dtype)
+            for name, (dtype, shape) in COLUMNS.items()}
+    written = 0
+    for i in range(start - preroll, end):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        results = hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if i < start:
+            continue
+        row = i - start
+        data['frame'][row] = i
+        data['t'][row] = i / fps
+        if results.multi_hand_landmarks and results.multi_handedness:
+            for lm, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                hand = LABELS.index(handedness.classification[0].label)
+                points = np.array([(p.x, p.y, p.z) for p in lm.landmark], dtype=np.float32)
+                data['present'][row, hand] = True
+                data['landmarks'][row, hand] = points
+                data['palm'][row, hand] = points[PALM, :2].mean(axis=0) * (width, height)
+        written = row + 1
+    cap.release()
+    hands.close()
+
+    # Escribir en un directorio temporal y renombrarlo: un trozo existe entero o no existe
+    final = _chunk_dir(out_dir, start)
+    tmp = final + '.tmp'
+    os.makedirs(tmp, exist_ok=True)
+    for name, column in data.items():
+        np.save(os.path.join(tmp, f"{name}.npy"), column[:written])
+    os.replace(tmp, final)
+    return os.getpid(), written, time.perf_counter() - began
+
+
+def _check_resume(out_dir, meta, restart):
+    """
+    Comparar los parámetros con el meta.json de una ejecución anterior.
+
+    Los trozos ya escritos sólo se reutilizan si se extrajeron igual; si algo
+    cambió, se rechaza (ValueError) o, con restart, se borra la extracción previa.
+    """
+    path = os.path.join(out_dir, 'meta.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError):
+        previous = {}  # meta ilegible: no se puede saber con qué se hicieron los trozos
+    # Claves que no existían en versiones anteriores del meta no se comparan
+    changed = {key: (previous[key], value) for key, value in meta.items()
+               if key in previous and previous[key] != value}
+    if not previous or changed:
+        if not restart:
+            detail = ', '.join(f"{key}: {old} -> {new}" for key, (old, new) in changed.items()) or "meta.json ilegible"
+            raise ValueError(f"{out_dir} se extrajo con otros parámetros ({detail}); "
+                             f"usa los mismos o --restart para empezar de cero")
+        shutil.rmtree(os.path.join(out_dir, 'chunks'), ignore_errors=True)
+        for name in COLUMNS:
+            try:
+                os.remove(os.path.join(out_dir, f"{name}.npy"))
+            except FileNotFoundError:
+                pass
+
+
+def _merge(out_dir, starts):
+    """Unir los trozos en una columna .npy por campo (escritura por memmap, sin cargar todo)"""
+    lengths = [len(np.load(os.path.join(_chunk_dir(out_dir, s), 'frame.npy'), mmap_mode='r')) for s in starts]
+    total = sum(lengths)
+    for name, (dtype, shape) in COLUMNS.items():
+        column = np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy.tmp"), mode='w+',
+                                           dtype=dtype, shape=(total,) + shape)
+        offset = 0
+        for start, length in zip(starts, lengths):
+            column[offset:offset + length] = np.load(os.path.join(_chunk_dir(out_dir, start), f"{name}.npy"),
+                                                     mmap_mode='r')
+            offset += length
+        column.flush()
+        del column
+        os.replace(os.path.join(out_dir, f"{name}.npy.tmp"), os.path.join(out_dir, f"{name}.npy"))
+    return total
+
+
+def extract_videos(videos, out_root, workers=None, chunk_frames=900, overlap=30, width=640, height=480,
+                   static_image_mode=False, model_complexity=0, restart=False, log=print):
+    """
+    Extraer trazas de varios vídeos con un pool de procesos.
+
+    Cada vídeo se parte en trozos de `chunk_frames` frames; los trozos ya
+    escritos en una ejecución anterior se saltan (reanudar = volver a
+    lanzar el mismo comando) si meta.json coincide con estos parámetros;
+    si no, ValueError, o con restart se descarta lo anterior. Al terminar un vídeo, sus trozos se unen en
+    `<out_root>/<vídeo>/<columna>.npy`, legibles con load_columns().
+    Devuelve {pid: (frames, segundos)} por worker.
+    """
+    import cv2
+    tasks = []
+    plans = {}
+    for video in videos:
+        out_dir = os.path.join(out_root, os.path.splitext(os.path.basename(video))[0])
+        cap = cv2.VideoCapture(video)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        meta = {'video': os.path.abspath(video), 'frames': total, 'width': width, 'height': height,
+                'labels': list(LABELS), 'static_image_mode': static_image_mode,
+                'model_complexity': model_complexity, 'chunk_frames': chunk_frames, 'overlap': overlap}
+        _check_resume(out_dir, meta, restart)
+        os.makedirs(os.path.join(out_dir, 'chunks'), exist_ok=True)
+        starts = list(range(0, total, chunk_frames))
+        plans[video] = (out_dir, starts)
+        with open(os.path.join(out_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        for start in starts:
+            if os.path.isdir(_chunk_dir(out_dir, start)):
+                continue
+            tasks.append((video, start, min(start + chunk_frames, total), out_dir, width, height, overlap,
+                          static_image_mode, model_complexity))
+
+    skipped = sum(len(starts) for _, starts in plans.values()) - len(tasks)
+    log(f"{len(tasks)} trozos pendientes ({skipped} ya hechos) en {len(videos)} vídeos")
+    per_worker = {}
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(extract_chunk, *task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            pid, frames, seconds = future.result()
+            worker_frames, worker_seconds = per_worker.get(pid, (0, 0.0))
+            per_worker[pid] = (worker_frames + frames, worker_seconds + seconds)
+            elapsed = time.perf_counter() - began
+            total_frames = sum(f for f, _ in per_worker.values())
+            log(f"[{done}/{len(tasks)}] {total_frames} frames en {elapsed:.0f}s ({total_frames / elapsed:.0f} FPS en total)")
+
+    for video, (out_dir, starts) in plans.items():
+        if starts and all(os.path.isdir(_chunk_dir(out_dir, s)) for s in starts):
+            frames = _merge(out_dir, starts)
+            log(f"{video}: {frames} frames -> {out_dir}")
+    return per_worker
+
+
+def load_columns(trace_dir):
+    """Columnas de una traza como memmaps de solo lectura: {nombre: array}"""
+    return {name: np.load(os.path.join(trace_dir, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+
+
+def as_samples(columns):
+    """Convertir columnas al formato de load_trace(): {label: [(t, (x, y) o None), ...]}"""
+    samples = {}
+    t = columns['t']
+    for hand, label in enumerate(LABELS):
+        present = columns['present'][:, hand]
+        palm = columns['palm'][:, hand]
+        samples[label] = [(float(t[i]), (float(palm[i, 0]), float(palm[i, 1])) if present[i] else None)
+                          for i in range(len(t))]
+    return samples
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extrae trazas de landmarks de vídeos grabados (reanudable)")
+    parser.add_argument('videos', nargs='+')
+    parser.add_argument('--out', default='traces', help="Directorio de salida (una carpeta por vídeo)")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument('--chunk', type=int, default=900, help="Frames por trozo")
+    parser.add_argument('--overlap', type=int, default=30, help="Frames previos para el historial del modo vídeo")
+    parser.add_argument('--static', action='store_true', help="static_image_mode: cada frame independiente")
+    parser.add_argument('--model-complexity', type=int, default=0)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--restart', action='store_true',
+                        help="Descartar una extracción previa hecha con otros parámetros")
+    args = parser.parse_args()
+
+    try:
+        per_worker = extract_videos(args.videos, args.out, workers=args.workers, chunk_frames=args.chunk,
+                                    overlap=args.overlap, width=args.width, height=args.height,
+                                    static_image_mode=args.static, model_complexity=args.model_complexity,
+                                    restart=args.restart)
+    except ValueError as e:
+        parser.error(str(e))
+    for pid, (frames, seconds) in sorted(per_worker.items()):
+        print(f"worker {pid}: {frames} frames en {seconds:.1f}s ({frames / max(seconds, 1e-9):.1f} FPS)")
@@ -0,0 +1,223 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class _HandBlob:
+    """Estado del seguimiento de una mano: modelo de color de piel y última posición"""
+    def __init__(self):
+        self.pos = None          # (x, y) en píxeles de la imagen reducida
+        self.skin = None         # (lo, hi) de Cr/Cb aprendidos
+        self.lost = 0            # frames seguidos sin MediaPipe
+        self.active = False      # True mientras el blob sustituye a MediaPipe
+
+
+class BlobFallbackTracker:
+    """
+    Seguimiento de reserva barato para cuando MediaPipe pierde la mano.
+
+    Trabaja sobre una copia muy reducida del frame (`small_width` px de
+    ancho). Mientras MediaPipe detecta, `seed()` aprende el color de piel
+    (rangos de Cr/Cb en YCrCb) alrededor de la palma; cuando deja de
+    detectar, `track()` busca en una ventana alrededor de la última posición
+    el blob de piel (o, si no hay, de movimiento respecto al frame anterior)
+    más cercano. Tras `max_lost` frames sin MediaPipe se rinde: mejor
+    ninguna posición que seguir a la cara del jugador.
+    Las posiciones entran y salen normalizadas (0-1).
+    """
+    def __init__(self, small_width=80, patch=0.05, window=0.15, window_growth=0.01, max_lost=45,
+                 min_area=4, motion_threshold=14, learn_rate=0.2):
+        self.small_width = small_width
+        self.patch = patch                  # radio del parche de aprendizaje (fracción del ancho)
+        self.window = window                # radio de búsqueda inicial (fracción del ancho)
+        self.window_growth = window_growth  # crecimiento del radio por frame perdido
+        self.max_lost = max_lost
+        self.min_area = min_area            # píxeles (de la imagen reducida) para aceptar un blob
+        self.motion_threshold = motion_threshold
+        self.learn_rate = learn_rate
+        self.hands = {'Right': _HandBlob(), 'Left': _HandBlob()}
+        self._ycrcb = None
+        self._gray = None
+        self._prev_gray = None
+        self.size = None                    # (ancho, alto) de la imagen reducida
+        self.cost_ms = 0.0                  # coste medio (EMA) por frame
+
+    def observe(self, frame):
+        """Preparar la imagen reducida del frame actual (una vez por frame, con o sin detección)"""
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        small_h = max(1, round(h * self.small_width / w))
+        small = cv2.resize(frame, (self.small_width, small_h), interpolation=cv2.INTER_AREA)
+        self.size = (self.small_width, small_h)
+        self._ycrcb = cv2.cvtColor(small, cv2.COLOR_BGR2YCrCb)
+        self._prev_gray = self._gray
+        self._gray = self._ycrcb[:, :, 0]
+        self._spent = time.perf_counter() - start
+
+    def _to_small(self, pos):
+        return int(pos[0] * self.size[0]), int(pos[1] * self.size[1])
+
+    def seed(self, label, pos):
+        """MediaPipe detectó la mano en `pos` (normalizada): aprender el color y devolverle el control"""
+        start = time.perf_counter()
+        hand = self.hands[label]
+        x, y = self._to_small(pos)
+        r = max(2, int(self.patch * self.size[0]))
+        patch = self._ycrcb[max(0, y - r):y + r + 1, max(0, x - r):x + r + 1, 1:].reshape(-1, 2).astype(np.float32)
+        if len(patch):
+            mean = patch.mean(axis=0)
+            spread = np.maximum(8.0, 2.5 * patch.std(axis=0))
+            lo, hi = mean - spread, mean + spread
+            if hand.skin is None:
+                hand.skin = (lo, hi)
+            else:
+                k = self.learn_rate
+                hand.skin = (hand.skin[0] + k * (lo - hand.skin[0]), hand.skin[1] + k * (hi - hand.skin[1]))
+        hand.pos = (x, y)
+        hand.lost = 0
+        hand.active = False
+        self._spent += time.perf_counter() - start
+
+    def track(self, label):
+        """MediaPipe no detectó la mano: posición normalizada del blob, o None"""
+        start = time.perf_counter()
+        hand = self.hands[label]
+        result = None
+        if hand.pos is not None and hand.skin is not None and hand.lost < self.max_lost:
+            hand.lost += 1
+            hand.active = True
+            found = self._search(hand)
+            if found is not None:
+                hand.pos = found
+                result = ((found[0] + 0.5) / self.size[0], (found[1] + 0.5) / self.size[1])
+        else:
+            hand.active = False
+        self._spent += time.perf_counter() - start
+        return result
+
+    def _search(self, hand):
+        w, h = self.size
+        r = int((self.window + self.window_growth * hand.lost) * w)
+        x, y = hand.pos
+        x0, y0 = max(0, x - r), max(0, y - r)
+        x1, y1 = min(w, x + r + 1), min(h, y + r + 1)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        lo, hi = hand.skin
+        crcb = self._ycrcb[y0:y1, x0:x1, 1:]
+        mask = cv2.inRange(np.ascontiguousarray(crcb), np.clip(lo, 0, 255).astype(np.uint8),
+                           np.clip(hi, 0, 255).astype(np.uint8))
+        if cv2.countNonZero(mask) < self.min_area and self._prev_gray is not None:
+            # Sin piel reconocible (luz cambiante): probar con lo que se movió
+            diff = cv2.absdiff(self._gray[y0:y1, x0:x1], self._prev_gray[y0:y1, x0:x1])
+            _, mask = cv2.threshold(diff, self.motion_threshold, 255, cv2.THRESH_BINARY)
+
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        best, best_d = None, None
+        for i in range(1, count):
+            if stats[i, cv2.CC_STAT_AREA] < self.min_area:
+                continue
+            cx, cy = centroids[i]
+            d = (cx + x0 - x) ** 2 + (cy + y0 - y) ** 2
+            if best_d is None or d < best_d:
+                best, best_d = (int(cx + x0), int(cy + y0)), d
+        return best
+
+    def forget(self, label):
+        """Olvidar la última posición (p. ej. MediaPipe ve la mano, pero con la otra etiqueta)"""
+        hand = self.hands[label]
+        hand.pos = None
+        hand.active = False
+
+    def end_frame(self):
+        """Cerrar el frame: actualizar el coste medio"""
+        self.cost_ms += 0.05 * (self._spent * 1000 - self.cost_ms)
+
+    def is_active(self, label):
+        return self.hands[label].active
+
+
+def evaluate(trace_dir, dropout_every=60, dropout_len=15, width=None, height=None, max_frames=None):
+    """
+    Medir el seguimiento de reserva sobre una traza de Controler/batch_extract.py y su vídeo.
+
+    Sobre los frames en que MediaPipe sí detectó se simulan cortes de
+    `dropout_len` frames cada `dropout_every`: ahí MediaPipe es la verdad y
+    se mide cobertura (frames con posición) y error en píxeles. En los
+    cortes reales sólo se puede medir la cobertura.
+    """
+    import json
+    import os
+    from Controler.batch_extract import LABELS, load_columns
+
+    columns = load_columns(trace_dir)
+    with open(os.path.join(trace_dir, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    width = width or meta['width']
+    height = height or meta['height']
+    present, palm, frames = columns['present'], columns['palm'], columns['frame']
+
+    tracker = BlobFallbackTracker()
+    cap = cv2.VideoCapture(meta['video'])
+    cap.set(cv2.CAP_PROP_POS_FRAMES, int(frames[0]) if len(frames) else 0)
+    simulated = {'frames': 0, 'covered': 0, 'errors': []}
+    real = {'frames': 0, 'covered': 0}
+    costs = []
+    total = len(frames) if max_frames is None else min(len(frames), max_frames)
+    for i in range(total):
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        start = time.perf_counter()
+        tracker.observe(frame)
+        for hand, label in enumerate(LABELS):
+            truth = (float(palm[i, hand, 0]), float(palm[i, hand, 1])) if present[i, hand] else None
+            dropped = truth is not None and i % dropout_every >= dropout_every - dropout_len
+            if truth is not None and not dropped:
+                tracker.seed(label, (truth[0] / width, truth[1] / height))
+                continue
+            pos = tracker.track(label)
+            if not tracker.is_active(label):
+                continue
+            stats = simulated if dropped else real
+            stats['frames'] += 1
+            if pos is not None:
+                stats['covered'] += 1
+                if dropped:
+                    stats['errors'].append(np.hypot(pos[0] * width - truth[0], pos[1] * height - truth[1]))
+        tracker.end_frame()
+        costs.append((time.perf_counter() - start) * 1000)
+    cap.release()
+
+    errors = np.array(simulated['errors']) if simulated['errors'] else np.array([np.nan])
+    return {
+        'frames': len(costs),
+        'cost_ms_mean': float(np.mean(costs)) if costs else None,
+        'cost_ms_p95': float(np.percentile(costs, 95)) if costs else None,
+        'simulated_dropout_frames': simulated['frames'],
+        'simulated_coverage': simulated['covered'] / max(1, simulated['frames']),
+        'error_px_mean': float(np.nanmean(errors)),
+        'error_px_p95': float(np.nanpercentile(errors, 95)),
+        'real_dropout_frames': real['frames'],
+        'real_coverage': real['covered'] / max(1, real['frames']),
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evalúa el seguimiento de reserva sobre trazas grabadas")
+    parser.add_argument('trace', help="Carpeta de una traza de Controler/batch_extract.py (con su vídeo)")
+    parser.add_argument('--dropout-every', type=int, default=60)
+    parser.add_argument('--dropout-len', type=int, default=15)
+    parser.add_argument('--max-frames', type=int, default=None)
+    args = parser.parse_args()
+
+    r = evaluate(args.trace, args.dropout_every, args.dropout_len, max_frames=args.max_frames)
+    print(f"{r['frames']} frames | coste {r['cost_ms_mean']:.3f} ms (p95 {r['cost_ms_p95']:.3f} ms)")
+    print(f"cortes simulados: {r['simulated_dropout_frames']} frames, cobertura {r['simulated_coverage']:.1%}, "
+          f"error medio {r['error_px_mean']:.1f}px (p95 {r['error_px_p95']:.1f}px)")
+    print(f"cortes reales: {r['real_dropout_frames']} frames, cobertura {r['real_coverage']:.1%}")
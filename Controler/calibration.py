@@ -0,0 +1,189 @@
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+
+class AffineMapping:
+    """
+    Transformación afín precalculada (x', y') = (a·x + b·y + c, d·x + e·y + f).
+
+    Aplicarla son 4 multiplicaciones y 4 sumas en Python: se puede usar en
+    cada frame sin coste apreciable.
+    """
+    def __init__(self, a=1.0, b=0.0, c=0.0, d=0.0, e=1.0, f=0.0):
+        self.coeffs = (a, b, c, d, e, f)
+
+    @classmethod
+    def from_rects(cls, src, dst):
+        """Llevar el rectángulo src (x0, y0, x1, y1) sobre dst, eje a eje"""
+        sx0, sy0, sx1, sy1 = src
+        dx0, dy0, dx1, dy1 = dst
+        a = (dx1 - dx0) / max(1e-6, sx1 - sx0)
+        e = (dy1 - dy0) / max(1e-6, sy1 - sy0)
+        return cls(a, 0.0, dx0 - a * sx0, 0.0, e, dy0 - e * sy0)
+
+    @classmethod
+    def fit(cls, src_points, dst_points):
+        """Afín general por mínimos cuadrados (al menos 3 pares no colineales)"""
+        src = np.asarray(src_points, dtype=np.float64)
+        dst = np.asarray(dst_points, dtype=np.float64)
+        design = np.hstack([src, np.ones((len(src), 1))])
+        solution, *_ = np.linalg.lstsq(design, dst, rcond=None)  # (3, 2)
+        (a, d), (b, e), (c, f) = solution
+        return cls(float(a), float(b), float(c), float(d), float(e), float(f))
+
+    def apply(self, pos):
+        if pos is None:
+            return None
+        a, b, c, d, e, f = self.coeffs
+        x, y = pos
+        return (a * x + b * y + c, d * x + e * y + f)
+
+    def to_list(self):
+        return list(self.coeffs)
+
+    @classmethod
+    def from_list(cls, coeffs):
+        return cls(*coeffs)
+
+
+class CalibrationRecorder:
+    """
+    Registra hasta dónde llega la mano del jugador (en la pantalla de preparación).
+
+    El área alcanzable se toma con percentiles (`low_pct`, 100 - `low_pct`)
+    para que un par de detecciones espurias no la estiren. `mapping()` lleva
+    esa área al campo de juego menos `margin` píxeles por lado.
+
+    Se guardan sólo las últimas `max_samples` posiciones, y `reach()` (que se
+    pide en cada frame para dibujarla) recalcula los percentiles cada
+    `reach_every` muestras o en cuanto una cae fuera del área ya calculada.
+    """
+    def __init__(self, canvas_width, canvas_height, margin=20, min_samples=45, min_span=0.25, low_pct=2.0,
+                 max_samples=900, reach_every=15):
+        self.canvas_width = canvas_width
+        self.canvas_height = canvas_height
+        self.margin = margin
+        self.min_samples = min_samples
+        self.min_span = min_span  # fracción mínima del frame que debe cubrir cada eje
+        self.low_pct = low_pct
+        self.reach_every = reach_every
+        self.samples = deque(maxlen=max_samples)
+        self.palm_sizes = deque(maxlen=max_samples)
+        self._reach = None
+        self._pending = 0   # muestras añadidas desde el último cálculo de _reach
+
+    def reset(self):
+        self.samples.clear()
+        self.palm_sizes.clear()
+        self._reach = None
+        self._pending = 0
+
+    def add(self, pos, palm_size=None):
+        if pos is not None:
+            self.samples.append(pos)
+            self._pending += 1
+            r = self._reach
+            if r is not None and not (r[0] <= pos[0] <= r[2] and r[1] <= pos[1] <= r[3]):
+                self._pending = self.reach_every  # amplía el área: recalcular en el próximo reach()
+        if palm_size is not None:
+            self.palm_sizes.append(palm_size)
+
+    def reach(self):
+        """Área alcanzable (x0, y0, x1, y1) en píxeles de cámara, o None si aún no hay datos"""
+        if self._reach is None or self._pending >= self.reach_every:
+            self._update_reach()
+        return self._reach
+
+    def _update_reach(self):
+        self._pending = 0
+        if not self.samples:
+            self._reach = None
+            return
+        pts = np.asarray(self.samples, dtype=np.float64)
+        x0, y0 = np.percentile(pts, self.low_pct, axis=0)
+        x1, y1 = np.percentile(pts, 100 - self.low_pct, axis=0)
+        self._reach = (float(x0), float(y0), float(x1), float(y1))
+
+    def is_sufficient(self):
+        self._update_reach()  # al cerrar la calibración, con todas las muestras
+        reach = self._reach
+        if reach is None or len(self.samples) < self.min_samples:
+            return False
+        x0, y0, x1, y1 = reach
+        return (x1 - x0 >= self.min_span * self.canvas_width and
+                y1 - y0 >= self.min_span * self.canvas_height)
+
+    def mapping(self):
+        """AffineMapping del área alcanzada al campo, o None si la calibración no basta"""
+        if not self.is_sufficient():
+            return None
+        m = self.margin
+        return AffineMapping.from_rects(self.reach(), (m, m, self.canvas_width - m, self.canvas_height - m))
+
+    def palm_reference(self):
+        """Tamaño de palma mediano durante la calibración (referencia de profundidad del jugador)"""
+        if not self.palm_sizes:
+            return None
+        return float(np.median(self.palm_sizes))
+
+
+class ProfileStore:
+    """Perfiles de calibración por jugador en un JSON: {jugador: {'mapping': [...], ...}}"""
+    def __init__(self, path):
+        self.path = path
+        self.profiles = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.profiles = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError):
+            # Perfil corrupto: se empieza de cero (y se reescribe en la próxima calibración)
+            self.profiles = {}
+
+    def get(self, player):
+        return self.profiles.get(player)
+
+    def mapping(self, player):
+        profile = self.get(player)
+        if not profile or 'mapping' not in profile:
+            return None
+        return AffineMapping.from_list(profile['mapping'])
+
+    def save(self, player, mapping, reach=None, palm_reference=None):
+        self.profiles[player] = {
+            'mapping': mapping.to_list(),
+            'reach': list(reach) if reach is not None else None,
+            'palm_reference_px': palm_reference,
+            'updated': time.time(),
+        }
+        # Escritura atómica: un corte a mitad no deja el JSON a medias
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.profiles, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+if __name__ == '__main__':
+    # Un jugador bajo sólo alcanza la mitad inferior-central del frame: calibrar y medir el coste de apply()
+    import random
+
+    rng = random.Random(0)
+    recorder = CalibrationRecorder(640, 480)
+    for _ in range(300):
+        recorder.add((rng.uniform(160, 480), rng.uniform(200, 470)), rng.gauss(60, 3))
+    mapping = recorder.mapping()
+    print(f"alcance {tuple(round(v) for v in recorder.reach())} -> coeficientes "
+          f"{tuple(round(v, 3) for v in mapping.coeffs)}; palma de referencia {recorder.palm_reference():.1f} px")
+    print(f"esquina alcanzada (165, 205) -> {tuple(round(v) for v in mapping.apply((165, 205)))}")
+
+    frames = 200_000
+    pos = (300.0, 300.0)
+    start = time.perf_counter()
+    for _ in range(frames):
+        mapping.apply(pos)
+    print(f"apply(): {(time.perf_counter() - start) / frames * 1e9:.0f} ns por posición")
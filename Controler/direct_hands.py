@@ -0,0 +1,371 @@
+import math
+import os
+import time
+
+import cv2
+import numpy as np
+
+PALM_MODELS = {0: 'palm_detection_lite.tflite', 1: 'palm_detection_full.tflite'}
+LANDMARK_MODELS = {0: 'hand_landmark_lite.tflite', 1: 'hand_landmark_full.tflite'}
+
+# Landmarks que usa MediaPipe para encuadrar la mano del frame siguiente
+_ROI_LANDMARKS = [0, 1, 2, 3, 5, 6, 9, 10, 13, 14, 17, 18]
+
+
+def find_model(filename):
+    """Buscar un modelo incluido en el paquete mediapipe (modules/palm_detection, modules/hand_landmark)"""
+    import mediapipe as mp
+    root = os.path.dirname(mp.__file__)
+    for subdir in ('palm_detection', 'hand_landmark'):
+        path = os.path.join(root, 'modules', subdir, filename)
+        if os.path.exists(path):
+            return path
+    for folder, _, files in os.walk(root):
+        if filename in files:
+            return os.path.join(folder, filename)
+    raise FileNotFoundError(f"No se encontró {filename} en {root}")
+
+
+def _interpreter_class():
+    """Intérprete TFLite disponible (o None: se usa OpenCV DNN)"""
+    for module, attr in (('ai_edge_litert.interpreter', 'Interpreter'), ('tflite_runtime.interpreter', 'Interpreter'),
+                         ('tensorflow.lite', 'Interpreter')):
+        try:
+            mod = __import__(module, fromlist=[attr])
+            return getattr(mod, attr)
+        except ImportError:
+            continue
+    return None
+
+
+class TFLiteModel:
+    """
+    Un modelo .tflite con el tensor de entrada reutilizable.
+
+    Con un intérprete TFLite, `input` es una vista del propio tensor de
+    entrada: se escribe ahí directamente y `run()` no copia nada. Con OpenCV
+    DNN (sin intérprete instalado) `input` es un buffer NHWC propio que se
+    pasa a NCHW en un segundo buffer también preasignado.
+    Las salidas se devuelven ordenadas por nombre (Identity, Identity_1, ...).
+    """
+    def __init__(self, path, num_threads=1, runtime='auto'):
+        Interpreter = _interpreter_class() if runtime in ('auto', 'tflite') else None
+        if runtime == 'tflite' and Interpreter is None:
+            raise ImportError("No hay intérprete TFLite instalado (ai_edge_litert / tflite_runtime / tensorflow)")
+        self.runtime = 'tflite' if Interpreter is not None else 'opencv'
+        if self.runtime == 'tflite':
+            self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+            self.interpreter.allocate_tensors()
+            detail = self.interpreter.get_input_details()[0]
+            self.input_shape = tuple(detail['shape'])
+            self._input_index = detail['index']
+            outputs = sorted(self.interpreter.get_output_details(), key=lambda d: d['name'])
+            self._output_indices = [d['index'] for d in outputs]
+            self._input = None
+        else:
+            self.net = cv2.dnn.readNetFromTFLite(path)
+            cv2.setNumThreads(num_threads)
+            self.input_shape = tuple(self._opencv_input_shape(path))
+            self._output_names = sorted(self.net.getUnconnectedOutLayersNames())
+            self._input = np.zeros(self.input_shape, dtype=np.float32)
+            n, h, w, c = self.input_shape
+            self._nchw = np.zeros((n, c, h, w), dtype=np.float32)
+
+    @staticmethod
+    def _opencv_input_shape(path):
+        # OpenCV no expone la forma de entrada del .tflite: los modelos de manos son cuadrados y
+        # el tamaño va en el nombre de la familia (palm 192, landmark 224)
+        return (1, 192, 192, 3) if 'palm' in os.path.basename(path) else (1, 224, 224, 3)
+
+    @property
+    def input(self):
+        """Buffer (1, H, W, 3) float32 donde escribir la entrada del próximo run()"""
+        if self.runtime == 'tflite':
+            return self.interpreter.tensor(self._input_index)()
+        return self._input
+
+    def run(self):
+        if self.runtime == 'tflite':
+            self.interpreter.invoke()
+            return [self.interpreter.get_tensor(i) for i in self._output_indices]
+        np.copyto(self._nchw, self._input.transpose(0, 3, 1, 2))
+        self.net.setInput(self._nchw)
+        return self.net.forward(self._output_names)
+
+
+def ssd_anchors(input_size, strides=(8, 16, 16, 16)):
+    """Centros de anclas del detector de palmas (SsdAnchorsCalculator, 2 anclas por capa y celda)"""
+    centers = []
+    layer = 0
+    while layer < len(strides):
+        last = layer
+        while last < len(strides) and strides[last] == strides[layer]:
+            last += 1
+        per_cell = 2 * (last - layer)
+        cells = math.ceil(input_size / strides[layer])
+        ys, xs = np.mgrid[0:cells, 0:cells]
+        grid = np.stack([(xs + 0.5) / cells, (ys + 0.5) / cells], axis=-1).reshape(-1, 1, 2)
+        centers.append(np.repeat(grid, per_cell, axis=1).reshape(-1, 2))
+        layer = last
+    return np.concatenate(centers).astype(np.float32)
+
+
+def _weighted_nms(boxes, keypoints, scores, threshold):
+    """NMS ponderada como la de MediaPipe: cada grupo solapado se promedia por puntuación"""
+    order = np.argsort(-scores)
+    results = []
+    remaining = order
+    while len(remaining):
+        best = remaining[0]
+        x0 = np.maximum(boxes[best, 0], boxes[remaining, 0])
+        y0 = np.maximum(boxes[best, 1], boxes[remaining, 1])
+        x1 = np.minimum(boxes[best, 2], boxes[remaining, 2])
+        y1 = np.minimum(boxes[best, 3], boxes[remaining, 3])
+        inter = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+        area = (boxes[remaining, 2] - boxes[remaining, 0]) * (boxes[remaining, 3] - boxes[remaining, 1])
+        iou = inter / (area[0] + area - inter + 1e-9)
+        group = remaining[iou > threshold]
+        w = scores[group][:, None]
+        results.append(((boxes[group] * w).sum(0) / w.sum(), (keypoints[group] * w[:, :, None]).sum(0) / w.sum(),
+                        float(scores[best])))
+        remaining = remaining[iou <= threshold]
+    return results
+
+
+class _Roi:
+    """Rectángulo girado en píxeles de la imagen: centro, lado y rotación (radianes)"""
+    __slots__ = ('cx', 'cy', 'size', 'rotation')
+
+    def __init__(self, cx, cy, size, rotation):
+        self.cx, self.cy, self.size, self.rotation = cx, cy, size, rotation
+
+    def corners(self):
+        """Esquinas superior izquierda, superior derecha e inferior izquierda (para getAffineTransform)"""
+        c, s = math.cos(self.rotation), math.sin(self.rotation)
+        half = self.size / 2
+        def point(dx, dy):
+            return (self.cx + dx * c - dy * s, self.cy + dx * s + dy * c)
+        return np.float32([point(-half, -half), point(half, -half), point(-half, half)])
+
+
+def _transform_roi(cx, cy, w, h, rotation, scale, shift_y):
+    """RectTransformationCalculator: desplazar en el eje de la mano, hacer cuadrado y agrandar"""
+    cx += -h * shift_y * math.sin(rotation)
+    cy += h * shift_y * math.cos(rotation)
+    return _Roi(cx, cy, max(w, h) * scale, rotation)
+
+
+def _normalize_angle(angle):
+    return angle - 2 * math.pi * math.floor((angle + math.pi) / (2 * math.pi))
+
+
+class DirectHandLandmarker:
+    """
+    Detector de manos que ejecuta directamente los modelos .tflite de MediaPipe.
+
+    Mismo algoritmo que el grafo de mp.solutions.hands: detector de palmas
+    sólo cuando hay menos manos seguidas que `max_num_hands`, y en el resto
+    de frames el recuadro sale de los landmarks del frame anterior. Sin
+    protobuf: `detect()` devuelve [(etiqueta, landmarks (21, 3) float32
+    normalizados, puntuación)]. Los buffers de recorte y letterbox se
+    reutilizan entre frames; `num_threads` se pasa al intérprete.
+    Con static_image_mode se buscan palmas en cada frame.
+    """
+    def __init__(self, max_num_hands=1, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 model_complexity=0, num_threads=1, runtime='auto', palm_model=None, landmark_model=None,
+                 static_image_mode=False):
+        self.max_num_hands = max_num_hands
+        self.static_image_mode = static_image_mode
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.palm = TFLiteModel(palm_model or find_model(PALM_MODELS[model_complexity]), num_threads, runtime)
+        self.landmark = TFLiteModel(landmark_model or find_model(LANDMARK_MODELS[model_complexity]),
+                                    num_threads, runtime)
+        self.runtime = self.palm.runtime
+        self.palm_size = self.palm.input_shape[1]
+        self.landmark_size = self.landmark.input_shape[1]
+        self.anchors = ssd_anchors(self.palm_size)
+        self._letterbox = np.zeros((self.palm_size, self.palm_size, 3), dtype=np.uint8)
+        self._crop = np.zeros((self.landmark_size, self.landmark_size, 3), dtype=np.uint8)
+        self._rois = []   # recuadros a seguir en el próximo frame
+        self.palm_runs = 0
+
+    # --- Detector de palmas ---
+    def _detect_palms(self, rgb):
+        h, w = rgb.shape[:2]
+        size = self.palm_size
+        scale = size / max(w, h)
+        rw, rh = round(w * scale), round(h * scale)
+        ox, oy = (size - rw) // 2, (size - rh) // 2
+        self._letterbox.fill(0)
+        self._letterbox[oy:oy + rh, ox:ox + rw] = cv2.resize(rgb, (rw, rh), interpolation=cv2.INTER_AREA)
+        np.multiply(self._letterbox, np.float32(1 / 255), out=self.palm.input[0], casting='unsafe')
+        outputs = self.palm.run()
+        self.palm_runs += 1
+
+        regressors = next(o for o in outputs if o.shape[-1] == 18)[0]
+        logits = next(o for o in outputs if o.shape[-1] == 1)[0, :, 0]
+        scores = 1 / (1 + np.exp(-np.clip(logits, -100, 100)))
+        keep = scores >= self.min_detection_confidence
+        if not keep.any():
+            return []
+        reg, anchors, scores = regressors[keep], self.anchors[keep], scores[keep]
+
+        # Caja y 7 puntos clave, en píxeles de la imagen original (deshaciendo el letterbox)
+        centers = reg[:, :2] / size + anchors
+        sizes = reg[:, 2:4] / size
+        boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+        keypoints = reg[:, 4:].reshape(-1, 7, 2) / size + anchors[:, None, :]
+        to_px = lambda p: (p * size - (ox, oy)) / scale  # noqa: E731
+        rois = []
+        for box, kps, score in _weighted_nms(boxes, keypoints, scores, 0.3)[:self.max_num_hands]:
+            x0, y0 = to_px(box[:2])
+            x1, y1 = to_px(box[2:])
+            wrist, middle = to_px(kps[0]), to_px(kps[2])
+            rotation = _normalize_angle(math.pi / 2 - math.atan2(-(middle[1] - wrist[1]), middle[0] - wrist[0]))
+            rois.append(_transform_roi((x0 + x1) / 2, (y0 + y1) / 2, x1 - x0, y1 - y0, rotation,
+                                       scale=2.6, shift_y=-0.5))
+        return rois
+
+    # --- Landmarks ---
+    def _landmarks(self, rgb, roi):
+        size = self.landmark_size
+        matrix = cv2.getAffineTransform(roi.corners(), np.float32([[0, 0], [size, 0], [0, size]]))
+        cv2.warpAffine(rgb, matrix, (size, size), dst=self._crop, flags=cv2.INTER_LINEAR,
+                       borderMode=cv2.BORDER_CONSTANT)
+        np.multiply(self._crop, np.float32(1 / 255), out=self.landmark.input[0], casting='unsafe')
+        outputs = self.landmark.run()
+        # Identity: landmarks (1, 63) en píxeles del recorte, Identity_1: presencia, Identity_2: mano derecha.
+        # Presencia y lateralidad ya salen del modelo como probabilidades: el grafo de MediaPipe
+        # (hand_landmark_cpu) umbraliza ambas a 0.5 sin aplicar ninguna activación
+        points = outputs[0].reshape(21, 3)
+        presence = float(outputs[1].ravel()[0])
+        right_score = float(outputs[2].ravel()[0])
+
+        inverse = cv2.invertAffineTransform(matrix)
+        xy = points[:, :2] @ inverse[:, :2].T + inverse[:, 2]
+        h, w = rgb.shape[:2]
+        landmarks = np.empty((21, 3), dtype=np.float32)
+        landmarks[:, 0] = xy[:, 0] / w
+        landmarks[:, 1] = xy[:, 1] / h
+        landmarks[:, 2] = points[:, 2] / size * roi.size / w
+        return landmarks, presence, right_score, xy
+
+    @staticmethod
+    def _roi_from_landmarks(xy):
+        """HandLandmarksToRectCalculator: recuadro del frame siguiente a partir de los landmarks"""
+        wrist = xy[0]
+        knuckles = ((xy[5] + xy[13]) / 2 + xy[9]) / 2
+        rotation = _normalize_angle(math.pi / 2 - math.atan2(-(knuckles[1] - wrist[1]), knuckles[0] - wrist[0]))
+        pts = xy[_ROI_LANDMARKS]
+        center = (pts.min(0) + pts.max(0)) / 2
+        c, s = math.cos(-rotation), math.sin(-rotation)
+        local = (pts - center) @ np.float32([[c, s], [-s, c]])
+        lo, hi = local.min(0), local.max(0)
+        mid = (lo + hi) / 2
+        c, s = math.cos(rotation), math.sin(rotation)
+        cx = center[0] + mid[0] * c - mid[1] * s
+        cy = center[1] + mid[0] * s + mid[1] * c
+        return _transform_roi(cx, cy, hi[0] - lo[0], hi[1] - lo[1], rotation, scale=2.0, shift_y=-0.1)
+
+    def detect(self, rgb):
+        """Manos en una imagen RGB: [(etiqueta, landmarks (21, 3) normalizados, presencia)]"""
+        rois = [] if self.static_image_mode else self._rois
+        if len(rois) < self.max_num_hands:
+            for roi in self._detect_palms(rgb):
+                # No duplicar una mano que ya se está siguiendo
+                if all(math.hypot(roi.cx - r.cx, roi.cy - r.cy) > r.size / 4 for r in rois):
+                    rois.append(roi)
+                    if len(rois) >= self.max_num_hands:
+                        break
+
+        hands = []
+        next_rois = []
+        for roi in rois:
+            landmarks, presence, right_score, xy = self._landmarks(rgb, roi)
+            if presence < self.min_tracking_confidence:
+                continue
+            hands.append(('Right' if right_score > 0.5 else 'Left', landmarks, presence))
+            next_rois.append(self._roi_from_landmarks(xy))
+        self._rois = next_rois
+        return hands
+
+    def close(self):
+        self._rois = []
+
+
+if __name__ == '__main__':
+    # Comparación directa con mp.solutions.hands sobre el mismo vídeo (o frames sintéticos)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backend directo TFLite frente a mp.solutions.hands")
+    parser.add_argument('video', nargs='?', help="Vídeo con manos (sin él, frames sintéticos: sólo latencia)")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--model-complexity', type=int, default=0)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--palm-model', help="Ruta al .tflite del detector (por defecto, el de mediapipe)")
+    parser.add_argument('--landmark-model', help="Ruta al .tflite de landmarks (por defecto, el de mediapipe)")
+    args = parser.parse_args()
+
+    frames = []
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        while len(frames) < args.frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(cv2.cvtColor(cv2.resize(frame, (args.width, args.height)), cv2.COLOR_BGR2RGB))
+        cap.release()
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8) for _ in range(30)]
+        frames = (frames * (args.frames // len(frames) + 1))[:args.frames]
+
+    def measure(detect):
+        times, outputs = [], []
+        for rgb in frames:
+            start = time.perf_counter()
+            outputs.append(detect(rgb))
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        return times, outputs
+
+    def summary(name, times, outputs):
+        detected = sum(1 for o in outputs if o)
+        print(f"{name:>24}: media {np.mean(times):.2f} ms | p95 {times[int(len(times) * 0.95)]:.2f} ms | "
+              f"manos en {detected}/{len(outputs)} frames")
+
+    reference = None
+    try:
+        import mediapipe as mp
+        hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1,
+                                         model_complexity=args.model_complexity)
+
+        def solutions_detect(rgb):
+            results = hands.process(rgb)
+            if not results.multi_hand_landmarks:
+                return []
+            return [np.array([(p.x, p.y, p.z) for p in results.multi_hand_landmarks[0].landmark], dtype=np.float32)]
+
+        times, reference = measure(solutions_detect)
+        hands.close()
+        summary("mp.solutions.hands", times, reference)
+    except AttributeError:
+        print("mp.solutions no está disponible en esta versión de mediapipe: sólo se mide el backend directo")
+
+    for threads in args.threads:
+        try:
+            landmarker = DirectHandLandmarker(max_num_hands=1, model_complexity=args.model_complexity,
+                                              num_threads=threads, palm_model=args.palm_model,
+                                              landmark_model=args.landmark_model)
+        except FileNotFoundError as e:
+            raise SystemExit(f"{e}: indica los modelos con --palm-model y --landmark-model")
+        times, outputs = measure(lambda rgb: [lm for _, lm, _ in landmarker.detect(rgb)])
+        summary(f"directo ({landmarker.runtime}, {threads} hilos)", times, outputs)
+        if reference is not None:
+            diffs = [np.abs(a[0][:, :2] - b[0][:, :2]).mean() * args.width
+                     for a, b in zip(reference, outputs) if a and b]
+            if diffs:
+                print(f"{'':>24}  diferencia media con solutions: {np.mean(diffs):.1f} px en {len(diffs)} frames")
@@ -0,0 +1,186 @@
+import time
+from collections import deque
+
+import numpy as np
+
+# Índices de MediaPipe Hands
+WRIST = 0
+THUMB_TIP = 4
+INDEX_MCP, INDEX_TIP = 5, 8
+MIDDLE_MCP = 9
+# Índice, medio, anular y meñique: articulación PIP y punta
+FINGER_PIPS = [6, 10, 14, 18]
+FINGER_TIPS = [8, 12, 16, 20]
+# Todas las distancias de un frame en una sola operación: puntas y PIPs a la muñeca,
+# palma (muñeca -> nudillo del medio) y pinza (pulgar -> índice)
+_DIST_FROM = np.array(FINGER_TIPS + FINGER_PIPS + [MIDDLE_MCP, THUMB_TIP])
+_DIST_TO = np.array([WRIST] * 9 + [INDEX_TIP])
+_CENTER = np.array([WRIST, INDEX_MCP, MIDDLE_MCP])
+
+# Gesto -> acción de la máquina de estados (sólo en menú, preparación, game over y repetición).
+# 'back' sólo navega (preparación -> menú, repetición -> game over): ningún gesto sale del juego
+GESTURE_ACTIONS = {
+    'pinch': 'confirm',
+    'fist': 'back',
+}
+
+
+class GestureState:
+    """Histéresis temporal: el gesto debe mantenerse `enter_ms` para activarse y faltar `exit_ms` para soltarse"""
+    def __init__(self, enter_ms, exit_ms):
+        self.enter_ms = enter_ms
+        self.exit_ms = exit_ms
+        self.active = False
+        self._since = None  # inicio de la racha actual (presente si inactivo, ausente si activo)
+
+    def update(self, present, now_ms):
+        """Devuelve True sólo en el instante en que el gesto se activa"""
+        if present != self.active:
+            if self._since is None:
+                self._since = now_ms
+            if now_ms - self._since >= (self.enter_ms if present else self.exit_ms):
+                self.active = present
+                self._since = None
+                return present
+        else:
+            self._since = None
+        return False
+
+
+class GestureRecognizer:
+    """
+    Gestos de una mano a partir de los 21 landmarks (array (21, 3) normalizado).
+
+    - open_palm: cuatro dedos extendidos
+    - fist: ningún dedo extendido
+    - pinch: punta del pulgar junto a la del índice (umbral de entrada y de salida distintos)
+    - swipe_left / swipe_right: desplazamiento horizontal rápido de la palma
+
+    Las distancias se miden en tamaños de palma (muñeca -> nudillo del medio),
+    así que no dependen de lo cerca que esté la mano de la cámara.
+    """
+    def __init__(self, pinch_enter=0.35, pinch_exit=0.5, swipe_speed=4.0, swipe_window_ms=180,
+                 swipe_cooldown_ms=600):
+        self.pinch_enter = pinch_enter
+        self.pinch_exit = pinch_exit
+        self.swipe_speed = swipe_speed          # tamaños de palma por segundo
+        self.swipe_window_ms = swipe_window_ms
+        self.swipe_cooldown_ms = swipe_cooldown_ms
+        self.states = {
+            'open_palm': GestureState(enter_ms=200, exit_ms=150),
+            'fist': GestureState(enter_ms=800, exit_ms=150),   # mantener el puño: evita salir sin querer
+            'pinch': GestureState(enter_ms=120, exit_ms=100),
+        }
+        self._pinching = False
+        self._palm_track = deque()  # (ms, x en tamaños de palma)
+        self._last_swipe = -float('inf')
+
+    def features(self, landmarks):
+        """Dedos extendidos (4 bools), distancia de pinza y centro de la palma, todo vectorizado"""
+        pts = landmarks[:, :2]
+        diff = pts[_DIST_FROM] - pts[_DIST_TO]
+        dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        palm = float(dist[8]) + 1e-6
+        # Un dedo está extendido si su punta queda claramente más lejos de la muñeca que su PIP
+        extended = dist[:4] > dist[4:8] * 1.15
+        pinch = float(dist[9]) / palm
+        center = pts[_CENTER].mean(axis=0)
+        return extended, pinch, center, palm
+
+    def update(self, landmarks, now_ms=None):
+        """Procesar un frame (landmarks o None); devuelve los gestos que empiezan en este frame"""
+        if now_ms is None:
+            now_ms = time.perf_counter() * 1000
+        started = []
+
+        if landmarks is None:
+            for name, state in self.states.items():
+                state.update(False, now_ms)
+            self._palm_track.clear()
+            self._pinching = False
+            return started
+
+        extended, pinch, center, palm = self.features(landmarks)
+        count = int(extended.sum())
+
+        # Histéresis sobre la métrica: entrar con pinch_enter, salir sólo al superar pinch_exit
+        self._pinching = pinch < (self.pinch_exit if self._pinching else self.pinch_enter)
+        present = {
+            'open_palm': count == 4 and not self._pinching,
+            'fist': count == 0 and not self._pinching,
+            'pinch': self._pinching,
+        }
+        for name, state in self.states.items():
+            if state.update(present[name], now_ms):
+                started.append(name)
+
+        # Swipe: velocidad horizontal media en la ventana reciente
+        track = self._palm_track
+        track.append((now_ms, center[0] / palm))
+        while track and now_ms - track[0][0] > self.swipe_window_ms:
+            track.popleft()
+        if len(track) >= 3 and now_ms - self._last_swipe >= self.swipe_cooldown_ms:
+            dt = (track[-1][0] - track[0][0]) / 1000
+            if dt > 0:
+                speed = (track[-1][1] - track[0][1]) / dt
+                if abs(speed) >= self.swipe_speed:
+                    started.append('swipe_right' if speed > 0 else 'swipe_left')
+                    self._last_swipe = now_ms
+                    track.clear()
+        return started
+
+    @property
+    def active(self):
+        return {name for name, state in self.states.items() if state.active}
+
+
+class HandGestures:
+    """Un reconocedor por mano; traduce gestos nuevos a acciones del juego"""
+    def __init__(self, actions=None, **kwargs):
+        self.actions = GESTURE_ACTIONS if actions is None else actions
+        self.recognizers = {'Right': GestureRecognizer(**kwargs), 'Left': GestureRecognizer(**kwargs)}
+
+    def update(self, landmarks_by_hand, now_ms=None):
+        """landmarks_by_hand: {'Right': array | None, 'Left': ...} -> (gestos, acciones)"""
+        if now_ms is None:
+            now_ms = time.perf_counter() * 1000
+        gestures = []
+        for label, recognizer in self.recognizers.items():
+            for gesture in recognizer.update(landmarks_by_hand.get(label), now_ms):
+                gestures.append((label, gesture))
+        actions = [self.actions[g] for _, g in gestures if g in self.actions]
+        return gestures, actions
+
+
+if __name__ == '__main__':
+    # Coste por frame y una secuencia sintética: mano abierta -> pinza -> puño mantenido -> swipe
+    def hand(open_fingers=True, pinch=False, x=0.5):
+        lm = np.zeros((21, 3))
+        lm[WRIST] = (x, 0.8, 0)
+        for finger, base_x in enumerate((x - 0.06, x - 0.02, x + 0.02, x + 0.06)):
+            mcp, pip, dip, tip = 5 + 4 * finger, 6 + 4 * finger, 7 + 4 * finger, 8 + 4 * finger
+            lm[mcp] = (base_x, 0.6, 0)
+            lm[pip] = (base_x, 0.5, 0)
+            lm[dip] = (base_x, 0.45 if open_fingers else 0.55, 0)
+            lm[tip] = (base_x, 0.4 if open_fingers else 0.62, 0)
+        lm[1:5] = [(x - 0.08, 0.75, 0), (x - 0.12, 0.7, 0), (x - 0.14, 0.65, 0), (x - 0.15, 0.6, 0)]
+        if pinch:
+            lm[THUMB_TIP] = lm[INDEX_TIP] + (0.01, 0.01, 0)
+        return lm
+
+    recognizer = HandGestures()
+    sequence = ([hand()] * 10 + [hand(pinch=True)] * 10 + [hand()] * 10 + [hand(open_fingers=False)] * 40
+                + [hand(x=0.5 + 0.04 * i) for i in range(8)])
+    now = 0.0
+    for lm in sequence:
+        now += 33
+        gestures, actions = recognizer.update({'Right': lm, 'Left': None}, now)
+        if gestures:
+            print(f"{now:6.0f} ms  {gestures} -> {actions}")
+
+    frames = 20_000
+    lm = hand()
+    start = time.perf_counter()
+    for i in range(frames):
+        recognizer.update({'Right': lm, 'Left': lm}, i * 16.0)
+    print(f"{(time.perf_counter() - start) / frames * 1e6:.1f} us por frame (dos manos)")
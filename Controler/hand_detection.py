@@ -1,76 +1,186 @@
-import cv2
-from Controler.optimized_tracker import OptimizedHandTracker
+import os
+import time
+from game_clock import MonotonicClock
+from game_log import get_logger, setup_logging, shutdown_logging
+from game_profiler import set_tag
+from Controler.startup import StartupMetrics, TrackingWarmup
+from Controler.quality_governor import QualityGovernor
+from Controler.gestures import HandGestures
+from Controler.calibration import CalibrationRecorder, ProfileStore
 from vista.pygame_renderer import PygameRenderer
 
 # Configuración básica
 
 camera_width, camera_height = 640, 480
-renderer = PygameRenderer(camera_width=camera_width, camera_height=camera_height, title='Hand Detection Game')
 
-cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_height)
+log = get_logger("main")
 
-tracker = OptimizedHandTracker(
-    camera_width=camera_width,
-    camera_height=camera_height,
+profiles_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "player_profiles.json"))
+
+tracker_kwargs = dict(
     max_num_hands=1,
     min_detection_confidence=0.5,
     min_tracking_confidence=0.5,
     smoothness_level=0.92,  # ¡Ultra-suave!
-    model_complexity=0
+    model_complexity=0,
+    low_light=True          # Gamma/CLAHE sólo cuando la escena está oscura
 )
 
-print("Modo simple: Una mano controla ambos guantes")
 
-# --- Sistema de detección robusto con memoria ---
-last_known_hand_pos = None  # Última posición válida conocida
-last_active_hand_label = None # 'Right' o 'Left', para dar prioridad
+def _finish_calibration(recorder, profiles, player, tracker):
+    """Al salir de la preparación: nuevo mapeo si la calibración alcanza, si no None"""
+    mapping = recorder.mapping()
+    if mapping is None:
+        log.info("Calibración insuficiente; se mantiene el mapeo anterior",
+                 extra={'fields': {'muestras': len(recorder.samples), 'alcance': recorder.reach()}})
+        return None
+    palm_reference = recorder.palm_reference()
+    if palm_reference:
+        for estimator in tracker.depth_estimators.values():
+            estimator.reference_px = palm_reference
+    profiles.save(player, mapping, recorder.reach(), palm_reference)
+    log.info("Calibración guardada para '%s'", player, extra={'fields': {
+        'alcance': tuple(round(v) for v in recorder.reach()), 'palma_px': palm_reference}})
+    return mapping
+
+
+def main(process_start=None, player="default", tracking_server=None):
+    # Arranque por etapas: primero la ventana y el menú (sólo pygame),
+    # luego cámara y MediaPipe en segundo plano mientras el jugador está en el menú.
+    # Todo el registro pasa por una cola: el bucle nunca espera a la consola
+    setup_logging()
+    metrics = StartupMetrics(process_start)
+    # Un único instante por frame, compartido por el tracker y el renderer
+    clock = MonotonicClock()
+    renderer = PygameRenderer(camera_width=camera_width, camera_height=camera_height, title='Hand Detection Game',
+                              clock=clock)
+
+    warmup = TrackingWarmup(camera_width, camera_height, dict(tracker_kwargs, clock=clock), metrics=metrics,
+                            server_address=tracking_server, station=player)
+    warmup.start()
+
+    # Gobernador de calidad: primero se sacrifica lo visual, al final la precisión del tracking
+    governor = QualityGovernor(budget_ms=1000 / renderer.machine.tick_rate)
+    governor.add_knob('ball_animation_ms', (75, 110, 150), renderer.set_ball_animation_speed,
+                      renderer.ball_animation.animation_speed)
+    governor.add_knob('fullscreen_smooth', (True, False), renderer.set_fullscreen_smooth, renderer.fullscreen_smooth)
+    tracking_knobs_added = False
+
+    # Menú, preparación y game over también se manejan con gestos (pinza = ENTER, puño = volver)
+    gestures = HandGestures()
+
+    # Calibración: en la pantalla de preparación se registra hasta dónde llega el jugador
+    # y ese área se lleva al campo completo (perfil guardado por jugador)
+    profiles = ProfileStore(profiles_path)
+    mapping = profiles.mapping(player)
+    recorder = CalibrationRecorder(camera_width, camera_height)
+    previous_state = None
+
+    log.info("Modo simple: Una mano controla ambos guantes")
+
+    # --- Sistema de detección robusto con memoria ---
+    last_known_hand_pos = None  # Última posición válida conocida
+    last_active_hand_label = None # 'Right' o 'Left', para dar prioridad
 
-try:
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    try:
+        while True:
+            clock.tick()
+            if not warmup.ready:
+                if warmup.failed:
+                    break
+                # Tracking aún cargando: el juego sigue respondiendo sin manos
+                if not renderer.render(None, None):
+                    break
+                metrics.mark_first_frame()
+                continue
 
-        frame = cv2.flip(frame, 1)
-        right_pos, left_pos = tracker.process_frame(frame)
+            tracker = warmup.tracker
+            if not tracking_knobs_added:
+                profile = profiles.get(player)
+                if profile and profile.get('palm_reference_px'):
+                    for estimator in tracker.depth_estimators.values():
+                        estimator.reference_px = profile['palm_reference_px']
+                governor.add_knob('inference_scale', (1.0, 0.75, 0.5), tracker.set_inference_scale,
+                                  tracker.inference_scale)
+                if tracker.model_complexity > 0:
+                    # Con el modelo ligero (0) ya no hay nivel más barato: el ajuste no se registra
+                    governor.add_knob('model_complexity', (1, 0), tracker.set_model_complexity,
+                                      tracker.model_complexity)
+                tracking_knobs_added = True
 
-        # --- Lógica de selección de mano activa ---
-        active_hand_pos = None
+            capture_time = clock.now
+            set_tag('stage', 'captura')
+            frame = warmup.read_frame()
+            if frame is None:
+                break
+            # El tiempo de frame empieza tras leer la cámara: esperar al sensor no es trabajo del juego
+            work_start = time.perf_counter()
 
-        # Caso 1: Ambas manos detectadas. Priorizar la última que estuvo activa.
-        if right_pos and left_pos:
-            if last_active_hand_label == 'Left':
+            right_pos, left_pos = tracker.process_frame(frame)
+            set_tag('stage', 'juego')
+            detected, actions = gestures.update(tracker.landmarks, clock.now * 1000)
+            for label, gesture in detected:
+                log.debug("Gesto %s", gesture, extra={'fields': {'mano': label}})
+
+            # --- Lógica de selección de mano activa ---
+            active_hand_pos = None
+
+            # Caso 1: Ambas manos detectadas. Priorizar la última que estuvo activa.
+            if right_pos and left_pos:
+                if last_active_hand_label == 'Left':
+                    active_hand_pos = left_pos
+                else: # Si es 'Right' o None, se prefiere la derecha por defecto
+                    active_hand_pos = right_pos
+                    last_active_hand_label = 'Right'
+            # Caso 2: Solo se detecta la mano izquierda.
+            elif left_pos:
                 active_hand_pos = left_pos
-            else: # Si es 'Right' o None, se prefiere la derecha por defecto
+                last_active_hand_label = 'Left'
+            # Caso 3: Solo se detecta la mano derecha.
+            elif right_pos:
                 active_hand_pos = right_pos
                 last_active_hand_label = 'Right'
-        # Caso 2: Solo se detecta la mano izquierda.
-        elif left_pos:
-            active_hand_pos = left_pos
-            last_active_hand_label = 'Left'
-        # Caso 3: Solo se detecta la mano derecha.
-        elif right_pos:
-            active_hand_pos = right_pos
-            last_active_hand_label = 'Right'
-
-        # Actualizar la última posición conocida si tenemos una mano activa
-        if active_hand_pos:
-            last_known_hand_pos = active_hand_pos
-
-        # Si hay una posición final (ya sea de este frame o una recordada), calcular la posición de los guantes
-        if last_known_hand_pos:
-            x, y = last_known_hand_pos
-            right_pos = (min(camera_width - renderer.hand_w // 2, x + 60), y)
-            left_pos = (max(renderer.hand_w // 2, x - 60), y)
-        
-        if not renderer.render(right_pos, left_pos):
-            break
-
-except Exception as e:
-    print(f"Error: {e}")
-finally:
-    cap.release()
-    tracker.release()
-    renderer.cleanup()
\ No newline at end of file
+
+            # Actualizar la última posición conocida si tenemos una mano activa
+            if active_hand_pos:
+                last_known_hand_pos = active_hand_pos
+
+            # Si hay una posición final (ya sea de este frame o una recordada), calcular la posición de los guantes
+            if last_known_hand_pos:
+                # Mapeo de calibración: área alcanzable del jugador -> campo completo
+                hand_pos = mapping.apply(last_known_hand_pos) if mapping is not None else last_known_hand_pos
+                right_pos, left_pos = renderer.logic.glove_positions(hand_pos)
+
+            # Profundidad de la mano que controla los guantes
+            hand_depth = tracker.hand_depth.get(last_active_hand_label) if last_active_hand_label else None
+
+            if not renderer.render(right_pos, left_pos, actions, hand_depth):
+                break
+            metrics.mark_first_frame()
+
+            state = renderer.machine.state.name
+            if state == "prep":
+                if previous_state != "prep":
+                    recorder.reset()
+                if active_hand_pos:
+                    recorder.add(active_hand_pos, tracker.depth_estimators[last_active_hand_label].size_px)
+                renderer.calibration_reach = recorder.reach()
+            elif previous_state == "prep":
+                renderer.calibration_reach = None
+                if state == "countdown":  # con el puño se vuelve al menú sin calibrar
+                    mapping = _finish_calibration(recorder, profiles, player, tracker) or mapping
+            previous_state = state
+
+            # Retroalimentar la latencia medida para la predicción del tracker
+            tracker.report_presented(capture_time, renderer.last_present_time)
+            governor.observe((renderer.last_present_time - work_start) * 1000,
+                             budget_ms=1000 / renderer.machine.tick_rate)
+
+    except Exception as e:
+        log.exception("Error en el bucle principal: %s", e)
+    finally:
+        warmup.release()
+        renderer.cleanup()
+        log.info("Métricas de arranque", extra={'fields': metrics.as_dict()})
+        log.info("Calidad: %d cambios", len(governor.changes), extra={'fields': governor.state()})
+        shutdown_logging()
@@ -0,0 +1,197 @@
+import csv
+import math
+import time
+from bisect import bisect_left
+
+
+class LatencyEstimator:
+    """Mide la latencia del pipeline (captura -> presentación en pantalla)"""
+    def __init__(self, alpha=0.1, initial_latency=0.06, max_latency=0.25):
+        self.alpha = alpha                  # Peso de cada nueva muestra en la media exponencial
+        self.max_latency = max_latency      # Descartar muestras absurdas (pausas, breakpoints)
+        self.latency = initial_latency      # Latencia estimada en segundos
+        self.last_sample = None
+        self.samples = 0
+
+    def observe(self, capture_time, display_time):
+        """Registrar el tiempo entre la captura de un frame y su presentación"""
+        sample = display_time - capture_time
+        if sample <= 0 or sample > self.max_latency:
+            return self.latency
+        self.last_sample = sample
+        self.samples += 1
+        self.latency = self.latency * (1 - self.alpha) + sample * self.alpha
+        return self.latency
+
+
+class ForwardPredictor:
+    """Extrapola la posición filtrada hasta el instante esperado de presentación"""
+    def __init__(self, max_overshoot_px=45, velocity_blend=0.5, min_speed=40, bounds=None):
+        self.max_overshoot_px = max_overshoot_px  # Desplazamiento máximo permitido por la predicción
+        self.velocity_blend = velocity_blend      # Peso de UltraSmoothFilter frente a la tendencia del suavizado doble
+        self.min_speed = min_speed                # Por debajo (px/s) no se predice: evita amplificar temblores
+        self.bounds = bounds                      # (ancho, alto) del lienzo para no salir de pantalla
+
+    def combine_velocity(self, filter_velocity, trend):
+        """Mezclar las dos estimaciones de velocidad; si se contradicen, no predecir"""
+        if filter_velocity is None or trend is None:
+            return (0.0, 0.0)
+        # Direcciones opuestas = cambio de sentido: extrapolar aquí produce el rebote más visible
+        if filter_velocity[0] * trend[0] + filter_velocity[1] * trend[1] < 0:
+            return (0.0, 0.0)
+        w = self.velocity_blend
+        return (
+            filter_velocity[0] * w + trend[0] * (1 - w),
+            filter_velocity[1] * w + trend[1] * (1 - w)
+        )
+
+    def predict(self, position, filter_velocity, trend, horizon):
+        """Posición esperada dentro de `horizon` segundos, con sobrepaso acotado"""
+        if position is None or horizon <= 0:
+            return position
+
+        vx, vy = self.combine_velocity(filter_velocity, trend)
+        if math.hypot(vx, vy) < self.min_speed:
+            return position
+
+        dx = vx * horizon
+        dy = vy * horizon
+        distance = math.hypot(dx, dy)
+        if distance > self.max_overshoot_px:
+            k = self.max_overshoot_px / distance
+            dx *= k
+            dy *= k
+
+        x = position[0] + dx
+        y = position[1] + dy
+        if self.bounds is not None:
+            x = max(0, min(x, self.bounds[0] - 1))
+            y = max(0, min(y, self.bounds[1] - 1))
+        return (x, y)
+
+
+class TraceRecorder:
+    """Graba las posiciones crudas del tracker (antes de filtrar) en CSV: t,label,x,y"""
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['t', 'label', 'x', 'y'])
+
+    def write(self, timestamp, raw_detected):
+        for label, pos in raw_detected.items():
+            if pos is None:
+                self._writer.writerow([f"{timestamp:.6f}", label, '', ''])
+            else:
+                self._writer.writerow([f"{timestamp:.6f}", label, pos[0], pos[1]])
+
+    def close(self):
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+
+def load_trace(path):
+    """Leer una traza grabada: {label: [(t, (x, y) o None), ...]}"""
+    samples = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            pos = None
+            if row['x'] != '' and row['y'] != '':
+                pos = (float(row['x']), float(row['y']))
+            samples.setdefault(row['label'], []).append((float(row['t']), pos))
+    return samples
+
+
+def _interpolate(times, positions, t, max_gap=0.1):
+    """Posición real en el instante t, interpolando entre detecciones cercanas"""
+    i = bisect_left(times, t)
+    if i == 0 or i >= len(times):
+        return None
+    t0, t1 = times[i - 1], times[i]
+    if t1 - t0 > max_gap:
+        return None
+    k = (t - t0) / max(1e-9, t1 - t0)
+    p0, p1 = positions[i - 1], positions[i]
+    return (p0[0] + (p1[0] - p0[0]) * k, p0[1] + (p1[1] - p0[1]) * k)
+
+
+def evaluate_trace(samples, horizon, smoothness=0.92, **predictor_kwargs):
+    """
+    Validación offline: compara posición filtrada y predicha contra la posición
+    real `horizon` segundos después.
+
+    - samples: lista [(t, (x, y) o None)] de una mano (ver load_trace)
+    - horizon: latencia a compensar en segundos
+    Devuelve errores medio/p95 (px) sin y con predicción.
+    """
+    # Import diferido: evita ciclo con optimized_tracker, que usa este módulo
+    from Controler.optimized_tracker import UltraSmoothFilter, DoubleExponentialSmoother
+
+    detected = [(t, pos) for t, pos in samples if pos is not None]
+    if len(detected) < 2:
+        return None
+    times = [t for t, _ in detected]
+    positions = [pos for _, pos in detected]
+
+    # Mismos parámetros que OptimizedHandTracker
+    ultra = UltraSmoothFilter(smoothness=smoothness)
+    double = DoubleExponentialSmoother(alpha=0.85, beta=0.05)
+    ultra.last_time = double.last_time = samples[0][0]
+    predictor = ForwardPredictor(**predictor_kwargs)
+
+    base_errors = []
+    pred_errors = []
+    for t, pos in samples:
+        smooth = double.update(ultra.update(pos, timestamp=t), timestamp=t)
+        if smooth is None:
+            continue
+        actual = _interpolate(times, positions, t + horizon)
+        if actual is None:
+            continue
+        # Igual que el tracker: no se predice sobre una posición ya extrapolada por el filtro
+        predicted = smooth if ultra.extrapolating else predictor.predict(smooth, ultra.velocity, double.trend, horizon)
+        base_errors.append(math.hypot(smooth[0] - actual[0], smooth[1] - actual[1]))
+        pred_errors.append(math.hypot(predicted[0] - actual[0], predicted[1] - actual[1]))
+
+    if not base_errors:
+        return None
+
+    def p95(values):
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    return {
+        'samples': len(base_errors),
+        'mean_error_filtered': sum(base_errors) / len(base_errors),
+        'mean_error_predicted': sum(pred_errors) / len(pred_errors),
+        'p95_error_filtered': p95(base_errors),
+        'p95_error_predicted': p95(pred_errors),
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Valida la compensación de latencia sobre trazas grabadas")
+    parser.add_argument('trace', help="CSV grabado con TraceRecorder o carpeta de Controler/batch_extract.py")
+    parser.add_argument('--latency', type=float, default=0.06, help="Horizonte de predicción en segundos")
+    parser.add_argument('--max-overshoot', type=float, default=45, help="Sobrepaso máximo en píxeles")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if os.path.isdir(args.trace):
+        from Controler.batch_extract import load_columns, as_samples
+        traces = as_samples(load_columns(args.trace))
+    else:
+        traces = load_trace(args.trace)
+    for label, hand_samples in traces.items():
+        result = evaluate_trace(hand_samples, args.latency, max_overshoot_px=args.max_overshoot)
+        if result is None:
+            print(f"{label}: sin datos suficientes")
+            continue
+        print(f"{label}: {result['samples']} muestras | "
+              f"error medio {result['mean_error_filtered']:.1f}px -> {result['mean_error_predicted']:.1f}px | "
+              f"p95 {result['p95_error_filtered']:.1f}px -> {result['p95_error_predicted']:.1f}px")
+    print(f"Evaluado en {time.perf_counter() - start:.2f}s")
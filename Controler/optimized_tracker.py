@@ -4,37 +4,59 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import math
+from Controler.latency_compensation import LatencyEstimator, ForwardPredictor, TraceRecorder
+from Controler.hand_depth import PalmDepthEstimator
+from Controler.low_light import LowLightEnhancer
+from Controler.blob_tracker import BlobFallbackTracker
+from game_log import get_logger
+from game_profiler import set_tag
+from game_clock import MonotonicClock
+
+log = get_logger("tracker")
 
 class UltraSmoothFilter:
     """Filtro ultra-suave que elimina tirones y movimientos bruscos"""
-    def __init__(self, smoothness=0.85, max_prediction=0.3):
+    def __init__(self, smoothness=0.85, max_prediction=0.3, clock=None):
         self.smoothness = smoothness  # 0-1: más alto = más suave
         self.max_prediction = max_prediction
         self.position_history = deque(maxlen=8)  # Historial más largo
         self.velocity_history = deque(maxlen=5)
         self.acceleration_history = deque(maxlen=3)
         self.last_raw_position = None
-        self.last_time = time.time()
-        
-    def update(self, new_position):
-        current_time = time.time()
+        self.clock = clock
+        self.last_time = clock.now if clock is not None else time.perf_counter()
+        self._now = self.last_time
+        self.velocity = (0, 0)  # Última velocidad suavizada (px/s), usada por la predicción
+        self.extrapolating = False  # True si la última salida es una predicción (sin medida válida)
+        
+    def update(self, new_position, timestamp=None):
+        # timestamp permite reproducir trazas grabadas con su dt real
+        if timestamp is None:
+            timestamp = self.clock.now if self.clock is not None else time.perf_counter()
+        current_time = timestamp
+        self._now = current_time
         
         if new_position is None:
             # Predicción avanzada cuando no hay detección
+            self.extrapolating = True
             return self._predict_position()
         
         # Detectar y filtrar tirones (movimientos físicamente imposibles)
         if self.last_raw_position and len(self.position_history) > 1:
             if self._is_jerk_movement(new_position):
                 # Ignorar movimiento brusco y usar predicción
-                print("Movimiento brusco detectado - aplicando filtro")
+                log.info("Movimiento brusco detectado - aplicando filtro",
+                         extra={'fields': {'pos': new_position, 'last': self.last_raw_position}})
+                self.extrapolating = True
                 return self._predict_position()
         
+        self.extrapolating = False
         self.last_raw_position = new_position
         
         # Calcular derivadas (velocidad y aceleración)
         dt = max(0.001, current_time - self.last_time)
         velocity = self._calculate_velocity(new_position, dt)
+        self.velocity = velocity
         acceleration = self._calculate_acceleration(velocity, dt)
         
         # Suavizado multi-nivel
@@ -57,8 +79,7 @@ class UltraSmoothFilter:
         # Velocidad máxima razonable (píxeles por segundo)
         max_reasonable_speed = 800  # Ajustado para movimientos rápidos pero realistas
         
-        current_time = time.time()
-        dt = current_time - self.last_time
+        dt = self._now - self.last_time
         speed = distance / max(0.001, dt)
         
         # Si la velocidad es físicamente imposible, es un tirón
@@ -111,7 +132,7 @@ class UltraSmoothFilter:
             )
         
         # 2. Aplicar corrección por inercia
-        dt = time.time() - self.last_time
+        dt = self._now - self.last_time
         inertia_corrected = (
             smoothed[0] + velocity[0] * dt * 0.1,  # Factor de inercia pequeño
             smoothed[1] + velocity[1] * dt * 0.1
@@ -137,7 +158,7 @@ class UltraSmoothFilter:
         pos2 = self.position_history[-2] if len(self.position_history) > 1 else pos1
         
         # Calcular velocidad de predicción
-        dt = time.time() - self.last_time
+        dt = self._now - self.last_time
         pred_velocity = (
             (pos1[0] - pos2[0]) / max(0.001, dt),
             (pos1[1] - pos2[1]) / max(0.001, dt)
@@ -155,25 +176,28 @@ class UltraSmoothFilter:
 
 class DoubleExponentialSmoother:
     """Suavizado exponencial doble para tendencias"""
-    def __init__(self, alpha=0.8, beta=0.1):
+    def __init__(self, alpha=0.8, beta=0.1, clock=None):
         self.alpha = alpha  # Suavizado de posición
         self.beta = beta    # Suavizado de tendencia
         self.level = None
         self.trend = (0, 0)
-        self.last_time = time.time()
+        self.clock = clock
+        self.last_time = clock.now if clock is not None else time.perf_counter()
         
-    def update(self, new_position):
+    def update(self, new_position, timestamp=None):
+        if timestamp is None:
+            timestamp = self.clock.now if self.clock is not None else time.perf_counter()
+        current_time = timestamp
         if new_position is None:
             # Predicción basada en nivel + tendencia
             if self.level is None:
                 return None
-            dt = time.time() - self.last_time
+            dt = current_time - self.last_time
             return (
                 self.level[0] + self.trend[0] * dt,
                 self.level[1] + self.trend[1] * dt
             )
         
-        current_time = time.time()
         dt = max(0.001, current_time - self.last_time)
         
         if self.level is None:
@@ -208,43 +232,86 @@ class OptimizedHandTracker:
                  min_tracking_confidence=0.5,
                  smoothness_level=0.9,  # Nuevo: control de suavidad (0-1)
                  model_complexity=0,
-                 static_image_mode=False):
+                 static_image_mode=False,
+                 enable_prediction=True,  # Compensar la latencia extrapolando con la velocidad de los filtros
+                 trace_path=None,         # CSV opcional con las posiciones crudas (validación offline)
+                 low_light=False,         # Corrección de poca luz antes de MediaPipe (True o un LowLightEnhancer)
+                 hands=None,              # Grafo de manos compartido (servidor de tracking); no se cierra en release()
+                 clock=None,              # Reloj del juego (game_clock); si no se pasa, el tracker hace tick() por frame
+                 fallback=True,           # Seguimiento por color/movimiento mientras MediaPipe pierde la mano
+                 backend='solutions',     # 'solutions' (mp.solutions.hands) o 'direct' (modelos .tflite sin el grafo)
+                 num_threads=1):          # Hilos del intérprete con backend='direct'
         
         self.camera_width = camera_width
         self.camera_height = camera_height
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(
+        self._hands_kwargs = dict(
             static_image_mode=static_image_mode,
             max_num_hands=max_num_hands,
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence,
-            model_complexity=model_complexity
         )
+        self.model_complexity = model_complexity
+        self.backend = backend if hands is None else 'solutions'
+        self.num_threads = num_threads
+        self.mp_hands = None
+        self._owns_hands = hands is None
+        # Antes de crear el backend: con backend='direct' sobre OpenCV DNN, TFLiteModel
+        # fija cv2.setNumThreads(num_threads) y no debe quedar sobrescrito aquí
+        try:
+            cv2.setUseOptimized(True)
+            cv2.setNumThreads(4)
+        except Exception:
+            pass
+        self.hands = self._create_hands(model_complexity) if self._owns_hands else hands
+        # Fracción de la resolución de la cámara con la que se ejecuta MediaPipe (ajustable en caliente)
+        self.inference_scale = 1.0
+        if low_light is True:
+            low_light = LowLightEnhancer()
+        self.low_light = low_light or None
+        self.fallback = BlobFallbackTracker() if fallback else None
+        # De dónde salió la posición cruda de cada mano en el último frame: 'mediapipe', 'blob' o None
+        self.position_sources = {'Right': None, 'Left': None}
+        
+        # Un único instante por frame para todos los filtros (VirtualClock para procesar grabaciones)
+        self._owns_clock = clock is None
+        self.clock = clock if clock is not None else MonotonicClock()
         
         # Filtros ultra-suaves
         self.ultra_smooth_filters = {
-            'Right': UltraSmoothFilter(smoothness=smoothness_level),
-            'Left': UltraSmoothFilter(smoothness=smoothness_level)
+            'Right': UltraSmoothFilter(smoothness=smoothness_level, clock=self.clock),
+            'Left': UltraSmoothFilter(smoothness=smoothness_level, clock=self.clock)
         }
         
         self.double_smoothers = {
-            'Right': DoubleExponentialSmoother(alpha=0.85, beta=0.05),
-            'Left': DoubleExponentialSmoother(alpha=0.85, beta=0.05)
+            'Right': DoubleExponentialSmoother(alpha=0.85, beta=0.05, clock=self.clock),
+            'Left': DoubleExponentialSmoother(alpha=0.85, beta=0.05, clock=self.clock)
         }
         
+        # Predicción hacia el instante de presentación
+        self.enable_prediction = enable_prediction
+        self.latency = LatencyEstimator()
+        self.predictors = {
+            'Right': ForwardPredictor(bounds=(camera_width, camera_height)),
+            'Left': ForwardPredictor(bounds=(camera_width, camera_height))
+        }
+        self.trace_recorder = TraceRecorder(trace_path) if trace_path else None
+        
         self.smoothness_level = smoothness_level
+        # Los 21 landmarks del último frame por mano (array (21, 3) normalizado), para los gestos
+        self.landmarks = {'Right': None, 'Left': None}
+        # Profundidad relativa por mano (tamaño de palma suavizado; 1.0 = distancia de referencia)
+        self.depth_estimators = {
+            'Right': PalmDepthEstimator(camera_width, camera_height),
+            'Left': PalmDepthEstimator(camera_width, camera_height)
+        }
+        self.hand_depth = {'Right': None, 'Left': None}
+        self.depth_cost_ms = 0.0  # coste medio (EMA) de estimar la profundidad de ambas manos
         self._last_positions = {'Right': None, 'Left': None}
         self._stability_counters = {'Right': 0, 'Left': 0}
         
         # Estadísticas para debug
         self.jerk_detections = 0
         self.total_frames = 0
-        
-        try:
-            cv2.setUseOptimized(True)
-            cv2.setNumThreads(4)
-        except Exception:
-            pass
 
     def _palm_center_fast(self, landmarks):
         """Centro de palma optimizado"""
@@ -279,45 +346,141 @@ class OptimizedHandTracker:
         
         return comfortable_position
 
+    def _create_hands(self, model_complexity):
+        if self.backend == 'direct':
+            from Controler.direct_hands import DirectHandLandmarker
+            return DirectHandLandmarker(model_complexity=model_complexity, num_threads=self.num_threads,
+                                        **self._hands_kwargs)
+        if self.mp_hands is None:
+            self.mp_hands = mp.solutions.hands
+        return self.mp_hands.Hands(model_complexity=model_complexity, **self._hands_kwargs)
+
+    def _to_pixels(self, x_norm, y_norm):
+        px = int(x_norm * self.camera_width)
+        py = int(y_norm * self.camera_height)
+        return (max(0, min(px, self.camera_width - 1)), max(0, min(py, self.camera_height - 1)))
+
+    def set_model_complexity(self, model_complexity):
+        """Recrear el grafo de MediaPipe con otra complejidad (0 = más rápido)"""
+        if model_complexity == self.model_complexity or not self._owns_hands:
+            return
+        old_hands = self.hands
+        self.hands = self._create_hands(model_complexity)
+        self.model_complexity = model_complexity
+        try:
+            old_hands.close()
+        except Exception:
+            pass
+
+    def set_inference_scale(self, scale):
+        """Procesar a `scale` de la resolución; los landmarks son normalizados, las posiciones no cambian"""
+        self.inference_scale = scale
+
     def process_frame(self, frame):
         """Procesamiento con suavizado ultra-fluido"""
         self.total_frames += 1
+        set_tag('stage', 'preproceso')
         
-        # Redimensionar
-        if frame.shape[1] != self.camera_width or frame.shape[0] != self.camera_height:
-            frame = cv2.resize(frame, (self.camera_width, self.camera_height))
+        # Redimensionar (a la resolución de inferencia si el gobernador de calidad la bajó)
+        target_w = max(1, int(self.camera_width * self.inference_scale))
+        target_h = max(1, int(self.camera_height * self.inference_scale))
+        if frame.shape[1] != target_w or frame.shape[0] != target_h:
+            frame = cv2.resize(frame, (target_w, target_h), interpolation=cv2.INTER_AREA)
+
+        # Después de redimensionar: la corrección se hace sobre menos píxeles
+        if self.low_light is not None:
+            frame = self.low_light.process(frame)
         
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb)
 
         raw_detected = {'Right': None, 'Left': None}
+        self.landmarks = {'Right': None, 'Left': None}
+
+        set_tag('stage', 'inferencia')
+        if self.backend == 'direct':
+            # Sin protobuf: los landmarks ya llegan como array
+            for label, points, _ in self.hands.detect(rgb):
+                self.landmarks[label] = points
+                x_norm, y_norm = points[[0, 5, 17], :2].mean(axis=0)
+                raw_detected[label] = self._to_pixels(float(x_norm), float(y_norm))
+        else:
+            results = self.hands.process(rgb)
+            if results.multi_hand_landmarks and results.multi_handedness:
+                for lm, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
+                    label = handedness.classification[0].label
+                    self.landmarks[label] = np.array([(p.x, p.y, p.z) for p in lm.landmark], dtype=np.float32)
+                    
+                    # Centro de palma, en píxeles
+                    x_norm, y_norm = self._palm_center_fast(lm.landmark)
+                    raw_detected[label] = self._to_pixels(x_norm, y_norm)
+
+        self.position_sources = {label: 'mediapipe' if pos else None for label, pos in raw_detected.items()}
+        if self.fallback is not None:
+            set_tag('stage', 'reserva')
+            self._apply_fallback(frame, raw_detected)
+
+        set_tag('stage', 'suavizado')
+        final_positions = self.smooth_detections(raw_detected)
+
+        # Profundidad a partir del tamaño de la palma (barato: un slice de 5 landmarks por mano)
+        set_tag('stage', 'profundidad')
+        depth_start = time.perf_counter()
+        for label, estimator in self.depth_estimators.items():
+            self.hand_depth[label] = estimator.update(self.landmarks[label])
+        self.depth_cost_ms += 0.05 * ((time.perf_counter() - depth_start) * 1000 - self.depth_cost_ms)
+
+        # Debug opcional
+        if self.total_frames % 60 == 0:  # Cada segundo aproximadamente
+            log.debug("Estado del tracker", extra={'fields': {
+                'frames': self.total_frames, 'tirones': self.jerk_detections,
+                'latencia_ms': round(self.latency.latency * 1000, 1),
+                'profundidad_ms': round(self.depth_cost_ms, 3),
+                'reserva_ms': round(self.fallback.cost_ms, 3) if self.fallback is not None else None,
+                'poca_luz': self.low_light.stats() if self.low_light is not None else None}})
+
+        return final_positions['Right'], final_positions['Left']
+
+    def _apply_fallback(self, frame, raw_detected):
+        """Rellenar las manos que MediaPipe no vio con el blob seguido desde su última detección"""
+        fallback = self.fallback
+        fallback.observe(frame)
+        # Con una sola mano, si MediaPipe la ve con la otra etiqueta no hay nada que buscar
+        single_detected = self._hands_kwargs['max_num_hands'] == 1 and any(raw_detected.values())
+        for label, pos in raw_detected.items():
+            if pos is not None:
+                fallback.seed(label, (pos[0] / self.camera_width, pos[1] / self.camera_height))
+                continue
+            if single_detected:
+                fallback.forget(label)
+                continue
+            blob = fallback.track(label)
+            if blob is not None:
+                raw_detected[label] = (int(blob[0] * self.camera_width), int(blob[1] * self.camera_height))
+                self.position_sources[label] = 'blob'
+        fallback.end_frame()
+
+    def smooth_detections(self, raw_detected):
+        """
+        Cadena de filtros sobre las posiciones crudas {'Right': (x, y) o None, ...}.
+
+        Usa un único instante por frame (`clock.now`); con un VirtualClock se
+        pueden reproducir detecciones grabadas sin esperar y con resultados idénticos.
+        """
+        now = self.clock.tick() if self._owns_clock else self.clock.now
         final_positions = {'Right': None, 'Left': None}
 
-        if results.multi_hand_landmarks and results.multi_handedness:
-            for lm, handedness in zip(results.multi_hand_landmarks, results.multi_handedness):
-                label = handedness.classification[0].label
-                
-                # Centro de palma
-                x_norm, y_norm = self._palm_center_fast(lm.landmark)
-                
-                # Convertir a píxeles
-                px = int(x_norm * self.camera_width)
-                py = int(y_norm * self.camera_height)
-                
-                px = max(0, min(px, self.camera_width - 1))
-                py = max(0, min(py, self.camera_height - 1))
-                
-                raw_detected[label] = (px, py)
+        if self.trace_recorder is not None:
+            self.trace_recorder.write(now, raw_detected)
 
         # Aplicar suavizado ultra-fluido
         for label in ['Right', 'Left']:
             raw_position = raw_detected.get(label)
             
             # Primera etapa: filtro ultra-suave
-            ultra_smooth = self.ultra_smooth_filters[label].update(raw_position)
+            ultra_smooth = self.ultra_smooth_filters[label].update(raw_position, now)
             
             # Segunda etapa: suavizado exponencial doble
-            double_smooth = self.double_smoothers[label].update(ultra_smooth)
+            double_smooth = self.double_smoothers[label].update(ultra_smooth, now)
             
             # Tercera etapa: zona de confort
             final_position = self._apply_comfort_zone(label, double_smooth)
@@ -327,17 +490,31 @@ class OptimizedHandTracker:
             # Actualizar última posición estable
             if final_position:
                 self._last_positions[label] = final_position
+            
+            # Cuarta etapa: predicción hasta el momento en que el frame llegue a pantalla.
+            # Si el filtro ya extrapoló (mano perdida o tirón descartado), su velocidad es la del
+            # último frame válido: sumarla otra vez duplicaría el avance, así que no se predice
+            if self.enable_prediction and final_position and not self.ultra_smooth_filters[label].extrapolating:
+                final_positions[label] = self.predictors[label].predict(
+                    final_position,
+                    self.ultra_smooth_filters[label].velocity,
+                    self.double_smoothers[label].trend,
+                    self.latency.latency
+                )
 
-        # Debug opcional
-        if self.total_frames % 60 == 0:  # Cada segundo aproximadamente
-            print(f"Frames: {self.total_frames}, Tirones detectados: {self.jerk_detections}")
+        return final_positions
 
-        return final_positions['Right'], final_positions['Left']
+    def report_presented(self, capture_time, display_time):
+        """Informar cuándo se mostró el frame capturado en capture_time (perf_counter)"""
+        self.latency.observe(capture_time, display_time)
 
     def release(self):
         """Liberación de recursos"""
+        if self.trace_recorder is not None:
+            self.trace_recorder.close()
+            self.trace_recorder = None
         try:
-            if hasattr(self, 'hands') and self.hands is not None:
+            if self._owns_hands and self.hands is not None:
                 self.hands.close()
         except Exception:
             pass
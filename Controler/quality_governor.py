@@ -0,0 +1,123 @@
+import time
+from collections import deque
+
+from game_log import get_logger
+
+log = get_logger("calidad")
+
+
+class QualityKnob:
+    """Ajuste de calidad con niveles ordenados de mejor a peor"""
+    def __init__(self, name, levels, apply, current):
+        self.name = name
+        self.levels = tuple(levels)
+        self.apply = apply
+        # Nunca se sube por encima de la calidad configurada al arrancar
+        self.ceiling = self.levels.index(current) if current in self.levels else 0
+        self.level = self.ceiling
+
+    @property
+    def value(self):
+        return self.levels[self.level]
+
+    def set_level(self, level):
+        self.level = level
+        self.apply(self.value)
+
+
+class QualityGovernor:
+    """
+    Mantiene el tiempo de frame dentro de un presupuesto bajando o subiendo calidad.
+
+    - observe() recibe el tiempo de trabajo de cada frame (sin la espera del clock).
+    - Cada `window` frames se mira el percentil 90: si supera el presupuesto se
+      baja un nivel del primer ajuste que aún pueda bajar (en orden de registro,
+      del más barato de perder al más caro); si queda por debajo de
+      `headroom` * presupuesto durante `recover_windows` ventanas seguidas, se
+      recupera un nivel en orden inverso.
+    - Cada cambio se imprime y queda en `changes` con el motivo.
+    """
+    def __init__(self, budget_ms=1000 / 60, window=30, headroom=0.7, recover_windows=3):
+        self.budget_ms = budget_ms
+        self.window = window
+        self.headroom = headroom
+        self.recover_windows = recover_windows
+        self.knobs = []
+        self.changes = []
+        self._samples = deque(maxlen=window)
+        self._good_windows = 0
+        self.frames = 0
+
+    def add_knob(self, name, levels, apply, current):
+        knob = QualityKnob(name, levels, apply, current)
+        self.knobs.append(knob)
+        return knob
+
+    def observe(self, frame_ms, budget_ms=None):
+        """Registrar un frame; devuelve el ajuste cambiado o None"""
+        if budget_ms is not None:
+            self.budget_ms = budget_ms
+        self.frames += 1
+        self._samples.append(frame_ms)
+        if len(self._samples) < self.window:
+            return None
+
+        samples = sorted(self._samples)
+        p90 = samples[int(0.9 * (len(samples) - 1))]
+        # Ventana nueva tras cada decisión: el efecto de un cambio se mide limpio
+        self._samples.clear()
+
+        if p90 > self.budget_ms:
+            self._good_windows = 0
+            for knob in self.knobs:
+                if knob.level < len(knob.levels) - 1:
+                    return self._change(knob, knob.level + 1, p90,
+                                        f"p90 {p90:.1f} ms > presupuesto {self.budget_ms:.1f} ms")
+            return None
+
+        if p90 < self.budget_ms * self.headroom:
+            self._good_windows += 1
+            if self._good_windows >= self.recover_windows:
+                self._good_windows = 0
+                for knob in reversed(self.knobs):
+                    if knob.level > knob.ceiling:
+                        return self._change(knob, knob.level - 1, p90,
+                                            f"p90 {p90:.1f} ms < {self.headroom:.0%} del presupuesto "
+                                            f"durante {self.recover_windows} ventanas")
+        else:
+            self._good_windows = 0
+        return None
+
+    def _change(self, knob, level, p90, reason):
+        old = knob.value
+        knob.set_level(level)
+        change = {'frame': self.frames, 'time': time.time(), 'knob': knob.name, 'old': old, 'new': knob.value,
+                  'p90_ms': p90, 'budget_ms': self.budget_ms, 'reason': reason}
+        self.changes.append(change)
+        log.info("%s: %s -> %s (%s)", knob.name, old, knob.value, reason, extra={'kind': f"calidad.{knob.name}"})
+        return knob
+
+    def state(self):
+        return {knob.name: knob.value for knob in self.knobs}
+
+
+if __name__ == '__main__':
+    # Carga sintética: cada nivel bajado ahorra tiempo; a mitad de la prueba la CPU se libera
+    import random
+    from game_log import setup_logging, shutdown_logging
+
+    setup_logging()
+    rng = random.Random(0)
+    governor = QualityGovernor(budget_ms=1000 / 60)
+    savings = {'ball_animation_ms': 0.5, 'fullscreen_smooth': 2.0, 'inference_scale': 4.0, 'model_complexity': 6.0}
+    governor.add_knob('ball_animation_ms', (75, 110, 150), lambda v: None, 75)
+    governor.add_knob('fullscreen_smooth', (True, False), lambda v: None, True)
+    governor.add_knob('inference_scale', (1.0, 0.75, 0.5), lambda v: None, 1.0)
+    governor.add_knob('model_complexity', (1, 0), lambda v: None, 1)
+
+    for frame in range(3000):
+        base = 30.0 if frame < 1500 else 8.0  # MediaPipe con la CPU ocupada y luego libre
+        saved = sum(savings[k.name] * k.level for k in governor.knobs)
+        governor.observe(max(2.0, base - saved + rng.gauss(0, 1.5)))
+    shutdown_logging()
+    print(f"{len(governor.changes)} cambios; estado final: {governor.state()}")
@@ -0,0 +1,119 @@
+import threading
+import time
+
+from game_log import get_logger
+
+log = get_logger("startup")
+
+
+class StartupMetrics:
+    """Tiempos de arranque medidos desde el inicio del proceso"""
+    def __init__(self, process_start=None):
+        self.process_start = process_start if process_start is not None else time.perf_counter()
+        self.time_to_first_frame = None     # s hasta que el menú se presentó por primera vez
+        self.time_to_tracking_ready = None  # s hasta tener cámara y modelo de manos listos
+
+    def mark_first_frame(self):
+        if self.time_to_first_frame is None:
+            self.time_to_first_frame = time.perf_counter() - self.process_start
+            log.info("Primer frame en %.0f ms", self.time_to_first_frame * 1000)
+
+    def mark_tracking_ready(self):
+        if self.time_to_tracking_ready is None:
+            self.time_to_tracking_ready = time.perf_counter() - self.process_start
+            log.info("Tracking listo en %.0f ms", self.time_to_tracking_ready * 1000)
+
+    def as_dict(self):
+        return {
+            'time_to_first_frame_ms': None if self.time_to_first_frame is None else self.time_to_first_frame * 1000,
+            'time_to_tracking_ready_ms': None if self.time_to_tracking_ready is None else self.time_to_tracking_ready * 1000,
+        }
+
+
+class TrackingWarmup(threading.Thread):
+    """
+    Inicializa OpenCV, la cámara y MediaPipe en segundo plano.
+
+    Los imports de cv2/mediapipe/numpy y la creación del grafo de manos
+    tardan segundos; hacerlo en este hilo permite que el menú se muestre
+    de inmediato. Cuando `ready` es True, `read_frame()` y `tracker` se
+    pueden usar desde el hilo principal. Con `server_address` el tracker es
+    un cliente del servidor de tracking compartido (Controler/tracking_server.py).
+    """
+    def __init__(self, camera_width, camera_height, tracker_kwargs=None, metrics=None, server_address=None,
+                 station="default"):
+        super().__init__(name="tracking-warmup", daemon=True)
+        self.camera_width = camera_width
+        self.camera_height = camera_height
+        self.tracker_kwargs = tracker_kwargs or {}
+        self.metrics = metrics
+        self.server_address = server_address
+        self.station = station
+        self.cap = None
+        self.tracker = None
+        self.error = None
+        self._cv2 = None
+        self._ready = threading.Event()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    def run(self):
+        try:
+            import cv2
+            import numpy as np
+            from Controler.optimized_tracker import OptimizedHandTracker
+            self._cv2 = cv2
+
+            cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera_width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera_height)
+            if not cap.isOpened():
+                raise RuntimeError("no se pudo abrir la cámara")
+
+            if self.server_address:
+                # El servidor ya tiene el grafo cargado: no hace falta inferencia de calentamiento
+                from Controler.tracking_server import TrackingClient
+                tracker = TrackingClient(self.station, self.camera_width, self.camera_height, self.server_address)
+            else:
+                tracker = OptimizedHandTracker(
+                    camera_width=self.camera_width,
+                    camera_height=self.camera_height,
+                    **self.tracker_kwargs
+                )
+                # La primera inferencia inicializa el grafo y es varias veces más lenta: hacerla aquí
+                tracker.process_frame(np.zeros((self.camera_height, self.camera_width, 3), dtype=np.uint8))
+
+            self.cap = cap
+            self.tracker = tracker
+            if self.metrics is not None:
+                self.metrics.mark_tracking_ready()
+            self._ready.set()
+        except Exception as e:
+            self.error = e
+            log.error("Error inicializando el tracking: %s", e)
+
+    def read_frame(self):
+        """Leer un frame de la cámara en espejo; None si la cámara dejó de responder"""
+        if self.cap is None or not self.cap.isOpened():
+            return None
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        return self._cv2.flip(frame, 1)
+
+    def release(self):
+        # Si el hilo sigue arrancando, esperar un poco para no dejar la cámara abierta
+        if self.is_alive():
+            self.join(timeout=5.0)
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        if self.tracker is not None:
+            self.tracker.release()
+            self.tracker = None
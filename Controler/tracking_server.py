@@ -0,0 +1,478 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import Client, Listener, answer_challenge, deliver_challenge, wait
+
+import numpy as np
+
+from Controler.hand_depth import PalmDepthEstimator
+from game_log import get_logger
+
+log = get_logger("servidor")
+
+if sys.platform == 'win32':
+    DEFAULT_ADDRESS = r'\\.\pipe\hand_detection_tracking'
+else:
+    DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), 'hand_detection_tracking.sock')
+AUTHKEY = b'hand-detection-game'
+HANDSHAKE_TIMEOUT = 2.0   # segundos para que una estación recién conectada se autentique y salude
+
+
+def default_hands_factory(model_complexity=0, min_detection_confidence=0.5, max_num_hands=1):
+    """Un único grafo de MediaPipe para todas las estaciones"""
+    import mediapipe as mp
+    # static_image_mode: los frames de las estaciones llegan intercalados; en modo vídeo
+    # el grafo seguiría en un frame la mano detectada en el frame de otra estación
+    return mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=max_num_hands,
+                                    min_detection_confidence=min_detection_confidence,
+                                    model_complexity=model_complexity)
+
+
+def _attach(name):
+    """Abrir el bloque de una estación sin que este proceso lo destruya al salir (lo crea y borra el cliente)"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if sys.platform != 'win32':
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class _Deadline:
+    """
+    Conexión con un plazo total para el intercambio de claves: deliver_challenge
+    y answer_challenge sólo usan send_bytes/recv_bytes, y aquí cada lectura
+    espera con poll() como mucho lo que quede del plazo.
+    """
+    def __init__(self, conn, timeout):
+        self.conn = conn
+        self.deadline = time.monotonic() + timeout
+
+    def send_bytes(self, data):
+        self.conn.send_bytes(data)
+
+    def recv_bytes(self, maxlength=None):
+        if not self.conn.poll(max(0.0, self.deadline - time.monotonic())):
+            raise TimeoutError("la estación no completó la autenticación a tiempo")
+        return self.conn.recv_bytes(maxlength)
+
+
+class _Station:
+    """Estado de una estación conectada (sólo lo usa el hilo del servidor)"""
+    def __init__(self, name, conn, shm, shape, tracker):
+        self.name = name
+        self.conn = conn
+        self.shm = shm
+        self.frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        self.tracker = tracker
+        self.pending = None     # (seq, instante de llegada) del frame que espera inferencia
+        self.served = 0
+        self.wait_ms = 0.0      # espera media en cola (EMA)
+        self.infer_ms = 0.0     # inferencia + filtros (EMA)
+
+
+class TrackingServer:
+    """
+    Servicio local de tracking: un proceso con un solo grafo de MediaPipe
+    atiende a varias estaciones (instancias del juego) de la misma máquina.
+
+    Cada estación escribe su frame en un bloque de memoria compartida y manda
+    por la conexión sólo ('frame', seq); el servidor responde
+    ('result', seq, derecha, izquierda, landmarks). Cada estación tiene como
+    mucho un frame en vuelo, y el servidor atiende las pendientes por turno
+    rotatorio: una estación rápida no puede dejar sin servicio a las demás.
+    Los filtros de suavizado y la predicción son por estación
+    (un OptimizedHandTracker por estación sobre el grafo compartido).
+    """
+    def __init__(self, address=DEFAULT_ADDRESS, tracker_kwargs=None, hands_factory=default_hands_factory,
+                 authkey=AUTHKEY):
+        self.address = address
+        self.tracker_kwargs = tracker_kwargs or {}
+        self.hands_factory = hands_factory
+        self.authkey = authkey
+        self.stations = {}      # conexión -> _Station
+        self._new = deque()     # conexiones aceptadas por el hilo de escucha
+        self._order = deque()   # turno rotatorio de estaciones
+        self._stop = threading.Event()
+        self.hands = None
+        self.listener = None
+
+    def _accept_loop(self):
+        backoff = 0.0
+        while not self._stop.is_set():
+            try:
+                conn = self.listener.accept()
+            except Exception as e:
+                if self._stop.is_set():
+                    return
+                # Esperar un poco más en cada error seguido, sin girar en vacío
+                backoff = min(1.0, backoff * 2 or 0.01)
+                log.warning("Error aceptando una conexión: %s", e)
+                self._stop.wait(backoff)
+                continue
+            backoff = 0.0
+            # La autenticación y el saludo, en su propio hilo: una estación que
+            # no responde no retrasa a las demás ni al bucle de servicio
+            threading.Thread(target=self._handshake, args=(conn,), name="tracking-handshake", daemon=True).start()
+
+    def _handshake(self, conn):
+        try:
+            timed = _Deadline(conn, HANDSHAKE_TIMEOUT)
+            deliver_challenge(timed, self.authkey)
+            answer_challenge(timed, self.authkey)
+            if not conn.poll(max(0.0, timed.deadline - time.monotonic())):
+                raise TimeoutError(f"sin saludo en {HANDSHAKE_TIMEOUT:.0f} s")
+            hello = conn.recv()
+        except Exception as e:
+            log.warning("Conexión rechazada: %s", e)
+            conn.close()
+            return
+        self._new.append((conn, hello))
+
+    def _register(self, conn, hello):
+        from Controler.optimized_tracker import OptimizedHandTracker
+        try:
+            _, name, shm_name, shape = hello
+            shm = _attach(shm_name)
+        except (OSError, ValueError, TypeError) as e:
+            log.warning("Conexión rechazada: %s", e)
+            conn.close()
+            return
+        height, width = shape[:2]
+        tracker = OptimizedHandTracker(camera_width=width, camera_height=height, hands=self.hands,
+                                       **self.tracker_kwargs)
+        station = _Station(name, conn, shm, shape, tracker)
+        self.stations[conn] = station
+        self._order.append(station)
+        conn.send(('ok', tracker.model_complexity))
+        log.info("Estación conectada: %s", name, extra={'fields': {'frame': shape, 'estaciones': len(self.stations)}})
+
+    def _drop(self, station):
+        self.stations.pop(station.conn, None)
+        self._order.remove(station)
+        station.frame = None
+        station.shm.close()
+        station.tracker.release()
+        station.conn.close()
+        log.info("Estación desconectada: %s", station.name,
+                 extra={'fields': {'servidos': station.served, 'espera_ms': round(station.wait_ms, 2),
+                                   'inferencia_ms': round(station.infer_ms, 2)}})
+
+    def _receive(self, timeout):
+        for conn in wait(list(self.stations), timeout):
+            station = self.stations[conn]
+            try:
+                msg = conn.recv()
+            except (EOFError, OSError):
+                self._drop(station)
+                continue
+            kind = msg[0]
+            if kind == 'frame':
+                station.pending = (msg[1], time.perf_counter())
+            elif kind == 'presented':
+                station.tracker.report_presented(msg[1], msg[2])
+            elif kind == 'scale':
+                station.tracker.set_inference_scale(msg[1])
+            elif kind == 'bye':
+                self._drop(station)
+
+    def _serve_next(self):
+        """Atender la siguiente estación con frame pendiente en el turno rotatorio"""
+        for _ in range(len(self._order)):
+            station = self._order[0]
+            self._order.rotate(-1)
+            if station.pending is None:
+                continue
+            seq, arrived = station.pending
+            station.pending = None
+            start = time.perf_counter()
+            right, left = station.tracker.process_frame(station.frame)
+            done = time.perf_counter()
+            station.wait_ms += 0.1 * ((start - arrived) * 1000 - station.wait_ms)
+            station.infer_ms += 0.1 * ((done - start) * 1000 - station.infer_ms)
+            station.served += 1
+            try:
+                station.conn.send(('result', seq, right, left, station.tracker.landmarks))
+            except (OSError, EOFError):
+                self._drop(station)
+            return True
+        return False
+
+    def serve_forever(self, ready=None):
+        """Atender estaciones hasta stop(); `ready` (Event) se activa cuando ya se aceptan conexiones"""
+        if sys.platform != 'win32' and os.path.exists(self.address):
+            os.unlink(self.address)  # socket de una ejecución anterior
+        self.hands = self.hands_factory()
+        # Sin authkey en el Listener: accept() haría el desafío en el hilo de escucha (ver _handshake)
+        self.listener = Listener(self.address)
+        threading.Thread(target=self._accept_loop, name="tracking-accept", daemon=True).start()
+        log.info("Servidor de tracking escuchando en %s", self.address)
+        if ready is not None:
+            ready.set()
+        try:
+            while not self._stop.is_set():
+                while self._new:
+                    self._register(*self._new.popleft())
+                busy = any(s.pending is not None for s in self.stations.values())
+                if self.stations:
+                    self._receive(0 if busy else 0.05)
+                else:
+                    time.sleep(0.05)
+                self._serve_next()
+        finally:
+            for station in list(self.stations.values()):
+                self._drop(station)
+            self.listener.close()
+            self.hands.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        return {s.name: {'servidos': s.served, 'espera_ms': round(s.wait_ms, 2), 'inferencia_ms': round(s.infer_ms, 2)}
+                for s in self.stations.values()}
+
+
+class TrackingClient:
+    """
+    Lado de la estación: misma interfaz que OptimizedHandTracker para el bucle del juego.
+
+    El frame se copia a memoria compartida (una copia, sin serializar) y se
+    espera la respuesta como mucho `frame_timeout` segundos; si el servidor
+    no contesta, el frame queda sin manos y los siguientes no esperan hasta
+    que llegue la respuesta pendiente (el juego nunca se congela). Si la
+    conexión se pierde, `connected` pasa a False y todo vuelve sin manos y
+    sin enviar nada. La
+    profundidad se calcula aquí con los landmarks devueltos, así que
+    `hand_depth` y `depth_estimators` funcionan igual.
+    """
+    def __init__(self, station, camera_width, camera_height, address=DEFAULT_ADDRESS, authkey=AUTHKEY,
+                 connect_timeout=5.0, frame_timeout=0.25):
+        self.camera_width = camera_width
+        self.camera_height = camera_height
+        self.frame_timeout = frame_timeout
+        self.shape = (camera_height, camera_width, 3)
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)))
+        self.frame = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.conn = None
+        self.connected = False
+        try:
+            self.conn = Client(address, authkey=authkey)
+            self.conn.send(('hello', station, self.shm.name, self.shape))
+            if not self.conn.poll(connect_timeout):
+                raise TimeoutError(f"el servidor de tracking no respondió en {connect_timeout:.0f} s")
+            _, self.model_complexity = self.conn.recv()
+        except BaseException:
+            self.release()
+            raise
+        self.connected = True
+        self.inference_scale = 1.0
+        self.seq = 0
+        self._waiting = False   # hay un frame enviado sin respuesta
+        self.timeouts = 0
+        self.landmarks = {'Right': None, 'Left': None}
+        self.depth_estimators = {
+            'Right': PalmDepthEstimator(camera_width, camera_height),
+            'Left': PalmDepthEstimator(camera_width, camera_height)
+        }
+        self.hand_depth = {'Right': None, 'Left': None}
+
+    def process_frame(self, frame):
+        import cv2
+        if not self.connected:
+            return self._no_hands()
+        if frame.shape != self.shape:
+            frame = cv2.resize(frame, (self.camera_width, self.camera_height), interpolation=cv2.INTER_AREA)
+        # Con un frame aún sin respuesta no se reescribe la memoria compartida
+        # (el servidor podría estar leyéndola): sólo se mira si ya contestó
+        timeout = 0.0
+        result = None
+        try:
+            if not self._waiting:
+                self.frame[...] = frame
+                self.seq += 1
+                self.conn.send(('frame', self.seq))
+                self._waiting = True
+                timeout = self.frame_timeout
+            while self.conn.poll(timeout):
+                msg = self.conn.recv()
+                if msg[1] == self.seq:
+                    result = msg
+                    break
+                timeout = 0.0  # respuesta atrasada de un frame anterior: descartarla
+        except (EOFError, OSError) as e:
+            self._lost(e)
+        else:
+            if result is None:
+                self.timeouts += 1
+                log.warning("El servidor de tracking no respondió a tiempo",
+                            extra={'kind': 'cliente_timeout', 'fields': {'timeouts': self.timeouts}})
+        if result is None:
+            return self._no_hands()
+
+        self._waiting = False
+        _, _, right, left, landmarks = result
+        self.landmarks = landmarks
+        for label, estimator in self.depth_estimators.items():
+            self.hand_depth[label] = estimator.update(landmarks[label])
+        return right, left
+
+    def _no_hands(self):
+        self.landmarks = {'Right': None, 'Left': None}
+        self.hand_depth = {'Right': None, 'Left': None}
+        return None, None
+
+    def _lost(self, error):
+        self.connected = False
+        log.warning("Servidor de tracking perdido: %s", error, extra={'kind': 'cliente_perdido'})
+
+    def _send(self, message):
+        """Avisos al servidor: si ya no está, se marca desconectado en vez de propagar el error"""
+        if not self.connected:
+            return
+        try:
+            self.conn.send(message)
+        except OSError as e:
+            self._lost(e)
+
+    def report_presented(self, capture_time, display_time):
+        # perf_counter es monótono para todo el sistema: los instantes valen en el servidor
+        self._send(('presented', capture_time, display_time))
+
+    def set_inference_scale(self, scale):
+        self.inference_scale = scale
+        self._send(('scale', scale))
+
+    def set_model_complexity(self, model_complexity):
+        """El grafo es compartido: la complejidad la decide el servidor"""
+
+    def release(self):
+        if self.conn is not None:
+            self._send(('bye',))
+            self.conn.close()
+            self.connected = False
+        self.frame = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+# --- Benchmark con fuentes y modelo sintéticos (sin cámaras) ---
+class _SyntheticHands:
+    """
+    Sustituto del grafo de manos para medir el servidor: localiza el disco
+    brillante del frame sintético y tarda `cost_ms` como una inferencia real.
+    """
+    def __init__(self, cost_ms=8.0):
+        self.cost_ms = cost_ms
+
+    def process(self, rgb):
+        from types import SimpleNamespace
+        import cv2
+        start = time.perf_counter()
+        small = cv2.resize(rgb[:, :, 0], (rgb.shape[1] // 4, rgb.shape[0] // 4), interpolation=cv2.INTER_AREA)
+        _, _, _, (x, y) = cv2.minMaxLoc(small)
+        nx, ny = (x + 0.5) * 4 / rgb.shape[1], (y + 0.5) * 4 / rgb.shape[0]
+        points = [SimpleNamespace(x=nx, y=ny, z=0.0) for _ in range(21)]
+        for i, dx in zip((5, 9, 13, 17), (-0.03, -0.01, 0.01, 0.03)):
+            points[i] = SimpleNamespace(x=nx + dx, y=ny - 0.08, z=0.0)
+        points[5] = SimpleNamespace(x=nx, y=ny, z=0.0)     # centro de palma = posición del disco
+        points[17] = SimpleNamespace(x=nx, y=ny, z=0.0)
+        remaining = self.cost_ms / 1000 - (time.perf_counter() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        return SimpleNamespace(
+            multi_hand_landmarks=[SimpleNamespace(landmark=points)],
+            multi_handedness=[SimpleNamespace(classification=[SimpleNamespace(label='Right')])])
+
+    def close(self):
+        pass
+
+
+def _synthetic_server(address, cost_ms, ready):
+    server = TrackingServer(address, tracker_kwargs={'enable_prediction': False},
+                            hands_factory=lambda: _SyntheticHands(cost_ms))
+    server.serve_forever(ready)
+
+
+def _synthetic_station(address, station, frames, fps, width, height, results):
+    """Una estación con cámara sintética: un disco que recorre su propia trayectoria"""
+    import cv2
+    client = TrackingClient(f"estacion-{station}", width, height, address)
+    latencies, errors = [], []
+    period = 1.0 / fps
+    next_frame = time.perf_counter()
+    for i in range(frames):
+        t = i / fps
+        cx = int(width * (0.5 + 0.35 * np.sin(t * (1.0 + 0.3 * station))))
+        cy = int(height * (0.5 + 0.35 * np.cos(t * (0.7 + 0.2 * station))))
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.circle(frame, (cx, cy), 20, (255, 255, 255), -1)
+        start = time.perf_counter()
+        right, _ = client.process_frame(frame)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if right is not None and i > 10:
+            errors.append(np.hypot(right[0] - cx, right[1] - cy))
+        next_frame += period
+        time.sleep(max(0.0, next_frame - time.perf_counter()))
+    client.release()
+    latencies.sort()
+    results.put((station, len(latencies), latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)],
+                 float(np.mean(errors)) if errors else None))
+
+
+if __name__ == '__main__':
+    import argparse
+    import multiprocessing
+
+    parser = argparse.ArgumentParser(description="Servidor de tracking compartido entre estaciones")
+    parser.add_argument('--address', default=DEFAULT_ADDRESS)
+    parser.add_argument('--model-complexity', type=int, default=0)
+    parser.add_argument('--bench', type=int, metavar='N', help="Medir con N estaciones y modelo sintéticos")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--model-ms', type=float, default=8.0, help="Coste simulado de una inferencia")
+    args = parser.parse_args()
+
+    if args.bench is None:
+        from game_log import setup_logging, shutdown_logging
+        setup_logging()
+        server = TrackingServer(args.address, hands_factory=lambda: default_hands_factory(args.model_complexity))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            shutdown_logging()
+    else:
+        address = args.address + '.bench' if sys.platform != 'win32' else args.address + '_bench'
+        ready = multiprocessing.Event()
+        server_process = multiprocessing.Process(target=_synthetic_server, args=(address, args.model_ms, ready),
+                                                 daemon=True)
+        server_process.start()
+        ready.wait(10)
+        results = multiprocessing.Queue()
+        start = time.perf_counter()
+        stations = [multiprocessing.Process(target=_synthetic_station,
+                                            args=(address, i, args.frames, args.fps, 640, 480, results))
+                    for i in range(args.bench)]
+        for p in stations:
+            p.start()
+        rows = sorted(results.get() for _ in stations)
+        elapsed = time.perf_counter() - start
+        for p in stations:
+            p.join()
+        server_process.terminate()
+
+        total = sum(row[1] for row in rows)
+        for station, frames, p50, p95, error in rows:
+            error_text = f"{error:.1f}px" if error is not None else "-"
+            print(f"estación {station}: {frames} frames | latencia p50 {p50:.1f} ms p95 {p95:.1f} ms | "
+                  f"error de posición {error_text}")
+        print(f"{args.bench} estaciones a {args.fps:.0f} FPS con inferencia de {args.model_ms:.0f} ms: "
+              f"{total / elapsed:.0f} frames/s servidos en total")
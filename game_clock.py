@@ -0,0 +1,53 @@
+import time
+
+
+class MonotonicClock:
+    """
+    Reloj del juego: un único instante monotónico por frame.
+
+    `tick()` lee perf_counter una vez; el resto del frame (filtros, lógica,
+    animaciones) usa `now` (segundos) o `ticks_ms` (ms desde que se creó el
+    reloj, como pygame.time.get_ticks()). Así todo el frame ve el mismo
+    instante y los saltos del reloj de pared (NTP) no afectan a los dt.
+    """
+    realtime = True
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.now = self.origin
+
+    def tick(self):
+        self.now = time.perf_counter()
+        return self.now
+
+    @property
+    def ticks_ms(self):
+        return int((self.now - self.origin) * 1000)
+
+
+class VirtualClock:
+    """
+    Reloj controlado por el llamador, para procesar grabaciones sin esperar.
+
+    `tick()` avanza `step` segundos (p. ej. 1 / FPS del vídeo) y `set()` fija
+    el instante de un frame grabado. Con las mismas entradas, dos pasadas dan
+    exactamente el mismo resultado, a la velocidad que permita la CPU.
+    """
+    realtime = False
+
+    def __init__(self, start=0.0, step=1 / 60):
+        self.origin = start
+        self.now = start
+        self.step = step
+
+    def tick(self):
+        self.now += self.step
+        return self.now
+
+    def set(self, now):
+        self.now = now
+        return now
+
+    @property
+    def ticks_ms(self):
+        return int((self.now - self.origin) * 1000)
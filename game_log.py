@@ -0,0 +1,187 @@
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+# Número de frame actual; el renderer lo actualiza una vez por frame
+_frame = 0
+_listener = None
+_queue_handler = None
+# Valores de los flags globales de logging antes de setup_logging()
+_LOGGING_FLAGS = ('_srcfile', 'logThreads', 'logProcesses', 'logMultiprocessing')
+_saved_flags = {}
+
+
+def set_frame(frame):
+    global _frame
+    _frame = frame
+
+
+def get_logger(name):
+    """Logger del juego (`juego.<name>`); sin setup_logging() sólo se ven warnings por stderr"""
+    return logging.getLogger(f"juego.{name}")
+
+
+class FrameFilter(logging.Filter):
+    """Añade a cada registro el frame y el instante (ms de perf_counter) en que se emitió"""
+    def filter(self, record):
+        record.frame = _frame
+        record.t_ms = time.perf_counter() * 1000
+        if not hasattr(record, 'fields'):
+            record.fields = None
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita cada tipo de mensaje a `burst` registros por `interval` segundos.
+
+    El tipo es `extra={'kind': ...}` o, si no hay, la plantilla del mensaje
+    (sin los argumentos), así que '¡Atrapado! %d' cuenta como un único tipo.
+    Los descartados se cuentan y se anuncian en el siguiente que pasa.
+    Los errores nunca se descartan.
+    """
+    def __init__(self, interval=1.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._windows = {}  # tipo -> [inicio de la ventana, emitidos, descartados]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        key = getattr(record, 'kind', None) or record.msg
+        now = time.monotonic()
+        window = self._windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            dropped = window[2] if window is not None else 0
+            window = self._windows[key] = [now, 0, 0]
+            if dropped:
+                record.suppressed = dropped
+        if window[1] >= self.burst:
+            window[2] += 1
+            return False
+        window[1] += 1
+        return True
+
+
+class StructuredFormatter(logging.Formatter):
+    """`HH:MM:SS.mmm NIVEL logger [f=frame t=ms] mensaje clave=valor ...`"""
+    def format(self, record):
+        base = (f"{self.formatTime(record, '%H:%M:%S')}.{int(record.msecs):03d} {record.levelname:<7} "
+                f"{record.name} [f={getattr(record, 'frame', '-')} t={getattr(record, 't_ms', 0):.0f}] "
+                f"{record.getMessage()}")
+        fields = getattr(record, 'fields', None)
+        if fields:
+            base += ' ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            base += f" (+{suppressed} similares suprimidos)"
+        if record.exc_info:
+            base += '\n' + self.formatException(record.exc_info)
+        return base
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Encola el registro sin formatearlo: el formato se hace en el hilo escritor"""
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=logging.INFO, path=None, interval=1.0, burst=5):
+    """
+    Registro no bloqueante: los loggers del juego sólo encolan y un hilo
+    (QueueListener) escribe en la consola y, opcionalmente, en `path`.
+    """
+    global _listener, _queue_handler, _saved_flags
+    if _listener is not None:
+        return
+
+    # Datos que el formato no usa: no calcularlos en cada llamada (ver "Optimization" en la doc de logging).
+    # Son globales del módulo logging: se guardan para restaurarlos en shutdown_logging()
+    _saved_flags = {name: getattr(logging, name) for name in _LOGGING_FLAGS}
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(logging.FileHandler(path, encoding='utf-8'))
+    formatter = StructuredFormatter()
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue_handler = _DeferredQueueHandler(queue.SimpleQueue())
+    # Los filtros se ejecutan en el hilo que emite: descartar antes de encolar
+    _queue_handler.addFilter(FrameFilter())
+    _queue_handler.addFilter(RateLimitFilter(interval=interval, burst=burst))
+
+    root = logging.getLogger("juego")
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Vaciar la cola y detener el hilo escritor"""
+    global _listener, _queue_handler, _saved_flags
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    logging.getLogger("juego").removeHandler(_queue_handler)
+    for name, value in _saved_flags.items():
+        setattr(logging, name, value)
+    _listener = None
+    _queue_handler = None
+    _saved_flags = {}
+
+
+if __name__ == '__main__':
+    # Coste de un log en el hilo del juego con una consola lenta (1 ms por escritura, como
+    # una consola de Windows ocupada): print directo vs. cola, con y sin límite de frecuencia
+    class SlowConsole:
+        def write(self, text):
+            time.sleep(0.001)
+            return len(text)
+
+        def flush(self):
+            pass
+
+    count = 500
+    console = SlowConsole()
+
+    start = time.perf_counter()
+    for i in range(count):
+        print(f"¡Atrapado con mano derecha! Puntuación: {i}", file=console)
+    print_us = (time.perf_counter() - start) / count * 1e6
+
+    setup_logging(burst=count)
+    _listener.handlers[0].setStream(console)
+    log = get_logger("bench")
+    worst_us = 0.0
+    start = time.perf_counter()
+    for i in range(count):
+        set_frame(i)
+        t0 = time.perf_counter()
+        log.info("¡Atrapado! Puntuación: %d", i, extra={'fields': {'hand': 'Right', 'score': i}})
+        worst_us = max(worst_us, (time.perf_counter() - t0) * 1e6)
+    queued_us = (time.perf_counter() - start) / count * 1e6
+    shutdown_logging()
+
+    setup_logging(burst=5)
+    _listener.handlers[0].setStream(console)
+    start = time.perf_counter()
+    for i in range(count):
+        log.info("Movimiento brusco detectado")
+    limited_us = (time.perf_counter() - start) / count * 1e6
+    shutdown_logging()
+
+    print(f"print: {print_us:.0f} us | cola: {queued_us:.1f} us (peor {worst_us:.0f} us) | "
+          f"cola con límite (5/s): {limited_us:.1f} us")
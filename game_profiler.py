@@ -0,0 +1,163 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Etiquetas que acompañan a cada muestra; el juego las actualiza con set_tag()
+# (asignar en un dict: sin coste apreciable aunque no haya sesión activa)
+_tags = {'state': '', 'stage': ''}
+_active = None
+
+ENV_SECONDS = "JUEGO_PROFILE"       # segundos a perfilar desde el arranque
+ENV_DIR = "JUEGO_PROFILE_DIR"       # carpeta de salida (por defecto, profiles/ en la raíz)
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+
+
+def set_tag(key, value):
+    """Fijar una etiqueta ('state' = estado del juego, 'stage' = etapa del tracker)"""
+    _tags[key] = value
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo del hilo principal.
+
+    Un hilo toma cada `interval` segundos la pila del hilo perfilado
+    (sys._current_frames) junto con las etiquetas de estado y etapa, y al
+    cabo de `seconds` escribe el recuento en formato "folded"
+    (`state=...;stage=...;modulo:funcion;... N`), el que leen flamegraph.pl,
+    speedscope o inferno. El juego no se detiene: el hilo perfilado sólo
+    pierde el GIL un instante por muestra.
+    """
+    def __init__(self, seconds=10.0, interval=0.005, out_dir=None, thread_id=None, on_done=None):
+        self.seconds = seconds
+        self.interval = interval
+        self.out_dir = out_dir or os.environ.get(ENV_DIR) or DEFAULT_DIR
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.on_done = on_done
+        self.counts = Counter()
+        self.samples = 0
+        self.sample_cost_s = 0.0
+        self.path = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._codes = {}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Terminar antes de tiempo (se escribe igualmente lo muestreado)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _name(self, code):
+        name = self._codes.get(code)
+        if name is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            name = self._codes[code] = f"{module}:{code.co_name}"
+        return name
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(self._name(frame.f_code))
+            frame = frame.f_back
+        stack.append(f"stage={_tags['stage'] or '-'}")
+        stack.append(f"state={_tags['state'] or '-'}")
+        stack.reverse()
+        self.counts[';'.join(stack)] += 1
+        self.samples += 1
+
+    def _run(self):
+        end = time.perf_counter() + self.seconds
+        while not self._stop.is_set() and time.perf_counter() < end:
+            start = time.perf_counter()
+            self._sample()
+            self.sample_cost_s += time.perf_counter() - start
+            self._stop.wait(self.interval)
+        self.path = self._write()
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def _write(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"perfil-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.folded")
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp, path)
+        return path
+
+    def summary(self, key='state'):
+        """Porcentaje de muestras por etiqueta ('state' o 'stage')"""
+        index = 0 if key == 'state' else 1
+        totals = Counter()
+        for stack, count in self.counts.items():
+            totals[stack.split(';')[index].split('=', 1)[1]] += count
+        return {tag: count / max(1, self.samples) for tag, count in totals.most_common()}
+
+
+def start_profiling(seconds=10.0, interval=0.005, out_dir=None, on_done=None):
+    """Iniciar una sesión si no hay otra en curso; devuelve el perfilador o None"""
+    global _active
+    if _active is not None and _active.running:
+        return None
+    _active = SamplingProfiler(seconds, interval, out_dir, on_done=on_done).start()
+    return _active
+
+
+def start_from_env(on_done=None):
+    """Perfilar desde el arranque si JUEGO_PROFILE=<segundos> está definida"""
+    value = os.environ.get(ENV_SECONDS)
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return start_profiling(seconds, on_done=on_done)
+
+
+def stop_profiling():
+    """Detener la sesión en curso (al salir del juego) y escribir lo que haya"""
+    if _active is not None and _active.running:
+        _active.stop()
+
+
+if __name__ == '__main__':
+    # Resumen de un fichero .folded por estado y etapa, y las funciones con más muestras propias
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resume un perfil .folded del juego")
+    parser.add_argument('path')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    by_state, by_stage, leaves = Counter(), Counter(), Counter()
+    total = 0
+    with open(args.path, encoding='utf-8') as f:
+        for line in f:
+            stack, count = line.rsplit(' ', 1)
+            count = int(count)
+            parts = stack.split(';')
+            by_state[parts[0]] += count
+            by_stage[parts[1]] += count
+            leaves[parts[-1]] += count
+            total += count
+    for title, counter in (("Estados", by_state), ("Etapas", by_stage), ("Funciones (propias)", leaves)):
+        print(title)
+        for name, count in counter.most_common(args.top):
+            print(f"  {count / max(1, total):6.1%}  {name}")
@@ -0,0 +1 @@
+# (vacío)
\ No newline at end of file
@@ -0,0 +1,410 @@
+import math
+import random
+import pygame
+
+
+class GameLogic:
+    """
+    Reglas del juego sin dependencias de pantalla.
+
+    Mantiene la pelota (posición, escala, trayectoria), el marcador y el
+    auto-lanzamiento. El tiempo llega siempre como parámetro (`now`, en ms),
+    por lo que puede ejecutarse sin ventana y mucho más rápido que en tiempo
+    real. `update()` devuelve la lista de eventos ocurridos en el tick:
+    [(nombre, datos), ...] con nombre en 'launch', 'catch', 'level_up',
+    'miss' y 'game_over'.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, rng: random.Random | None = None,
+                 enable_auto_launch: bool = True, auto_launch_delay_ms: int = 700) -> None:
+        self.width = width
+        self.height = height
+        self.rng = rng or random.Random()
+
+        self.ball_w, self.ball_h = 132, 125
+        self.ball_x = (self.width - self.ball_w) // 2
+        self.ball_y = self.height - self.ball_h - 210  # Posición del portero
+
+        # hitboxes
+        self.hand_hitbox_size = 120
+        self.ball_hitbox_size = 65
+        # Profundidad de la mano (escala del tamaño de palma, 1.0 = referencia; None = sin dato).
+        # La pelota "está" a profundidad ball_scale (0.2 lejos -> 1.0 en la portería); la mano ocupa
+        # una franja alrededor de hand_plane(): con la mano neutra es [0.95, 1.05], la regla original.
+        self.hand_depth = None
+        self.hand_reach_gain = 0.6        # cuánto adelanta la franja acercar la mano a la cámara
+        self.hand_depth_tolerance = 0.05  # medio grosor de la franja
+        self.hand_scale_range = (0.7, 1.4)
+        # Una mano mueve los dos guantes, a ±glove_offset píxeles de ella
+        self.glove_offset = 60
+        self.glove_width = 120
+
+        # Hitboxes reutilizados en cada tick. Con una pelota y dos manos la comparación directa
+        # es más barata que un índice (modelo.spatial_grid, para cuando haya muchas entidades)
+        self._ball_hitbox = pygame.Rect(0, 0, 0, 0)
+        self._hand_hitbox = pygame.Rect(0, 0, 0, 0)
+
+        self.last_collision_time = 0
+        self.collision_hand = None
+        self.ball_rotating = False
+        self.ball_angle = 0.0
+        self.ball_rotation_speed = 6.0  # grados por tick
+
+        # Compatibilidad de estado de atrapado
+        self.ball_caught = False
+        self.caught_by = None
+
+        self.ball_moving = False
+        self.ball_launching = False
+        self.ball_target_x = 0
+        self.ball_target_y = 0
+
+        # Tiempo constante de viaje (2 segundos)
+        self.ball_travel_time = 2000  # ms
+        self.ball_launch_start_time = 0
+
+        # Parámetros de dificultad (ajustables con modelo.simulation)
+        self.target_weights = (0.6, 0.3, 0.1)      # esquinas, bordes, centro
+        self.curve_probability = 0.7
+        self.curve_strength_range = (0.2, 0.8)
+
+        # Control de trayectoria curva
+        self.target_region = None  # zona del último objetivo ('corner_tl', 'edge_top', 'center', ...)
+        self.curve_strength = 0.0
+        self.curve_direction = 0
+        self.control_point_x = 0
+        self.control_point_y = 0
+
+        # Tiempo de reacción: desde el lanzamiento hasta que la mano se mueve `reaction_threshold_px`
+        self.reaction_threshold_px = 40
+        self._reaction_origin = None
+        self.reaction_ms = None
+
+        # Sistema de puntuación
+        self.score = 0
+        self.misses = 0
+        self.max_misses = 3
+        self.game_over = False
+
+        # Escalado progresivo - INICIA PEQUEÑA (0.2)
+        self.ball_scale = 0.2
+        self._move_start_x = self.ball_x + self.ball_w/2
+        self._move_start_y = self.ball_y + self.ball_h/2
+
+        # Auto-launch: cuando está activo se lanza automáticamente después de cada reset
+        self.enable_auto_launch = enable_auto_launch
+        self.auto_launch_enabled = False
+        self.auto_launch_delay_ms = auto_launch_delay_ms
+        self._last_reset_time = 0
+
+        self._events = []
+
+    def _emit(self, event, **data):
+        self._events.append((event, data))
+
+    def drain_events(self):
+        """Eventos pendientes (también los generados fuera de update, p. ej. por launch_ball)"""
+        events = self._events
+        self._events = []
+        return events
+
+    def _generate_target_position(self):
+        """Genera posición objetivo con preferencia por esquinas y bordes"""
+        rng = self.rng
+        # Áreas preferentes: por defecto 60% esquinas, 30% bordes, 10% centro
+        corner_weight, edge_weight, center_weight = self.target_weights
+        total = corner_weight + edge_weight + center_weight
+        corner_weight /= total
+        edge_weight /= total
+
+        choice = rng.random()
+
+        if choice < corner_weight:
+            # Esquina
+            corner = rng.choice([0, 1, 2, 3])  # 0: sup-izq, 1: sup-der, 2: inf-izq, 3: inf-der
+            self.target_region = ('corner_tl', 'corner_tr', 'corner_bl', 'corner_br')[corner]
+            if corner == 0:  # Superior izquierda
+                return (rng.randint(50, self.width//4), rng.randint(50, self.height//4))
+            elif corner == 1:  # Superior derecha
+                return (rng.randint(self.width*3//4, self.width-50), rng.randint(50, self.height//4))
+            elif corner == 2:  # Inferior izquierda
+                return (rng.randint(50, self.width//4), rng.randint(self.height*3//4, self.height-50))
+            else:  # Inferior derecha
+                return (rng.randint(self.width*3//4, self.width-50), rng.randint(self.height*3//4, self.height-50))
+
+        elif choice < corner_weight + edge_weight:
+            # Borde
+            edge = rng.choice([0, 1, 2, 3])  # 0: superior, 1: inferior, 2: izquierdo, 3: derecho
+            self.target_region = ('edge_top', 'edge_bottom', 'edge_left', 'edge_right')[edge]
+            if edge == 0:  # Superior
+                return (rng.randint(self.width//4, self.width*3//4), rng.randint(30, self.height//6))
+            elif edge == 1:  # Inferior
+                return (rng.randint(self.width//4, self.width*3//4), rng.randint(self.height*5//6, self.height-30))
+            elif edge == 2:  # Izquierdo
+                return (rng.randint(30, self.width//6), rng.randint(self.height//4, self.height*3//4))
+            else:  # Derecho
+                return (rng.randint(self.width*5//6, self.width-30), rng.randint(self.height//4, self.height*3//4))
+
+        else:
+            # Centro (menos probable)
+            self.target_region = 'center'
+            return (rng.randint(self.width//3, self.width*2//3), rng.randint(self.height//3, self.height*2//3))
+
+    @staticmethod
+    def calculate_bezier_point(t, start_x, start_y, control_x, control_y, end_x, end_y):
+        """Calcula punto en curva Bézier cuadrática"""
+        u = 1 - t
+        tt = t * t
+        uu = u * u
+
+        x = uu * start_x + 2 * u * t * control_x + tt * end_x
+        y = uu * start_y + 2 * u * t * control_y + tt * end_y
+
+        return x, y
+
+    def _generate_curve_parameters(self, start_x, start_y, end_x, end_y):
+        """Genera parámetros para trayectoria curva"""
+        # Determinar si habrá curva (70% de probabilidad por defecto)
+        if self.rng.random() < self.curve_probability:
+            curve_strength = self.rng.uniform(*self.curve_strength_range)
+            curve_direction = self.rng.choice([-1, 1])
+
+            # Punto de control para la curva Bézier
+            mid_x = (start_x + end_x) / 2
+            mid_y = (start_y + end_y) / 2
+
+            # Desplazamiento perpendicular
+            dx = end_x - start_x
+            dy = end_y - start_y
+            length = max(1, math.sqrt(dx*dx + dy*dy))
+
+            # Vector perpendicular normalizado
+            perp_x = -dy / length
+            perp_y = dx / length
+
+            # Aplicar curva
+            curve_distance = length * curve_strength * 0.5
+            control_x = mid_x + perp_x * curve_distance * curve_direction
+            control_y = mid_y + perp_y * curve_distance * curve_direction
+
+            return curve_strength, curve_direction, control_x, control_y
+        else:
+            # Trayectoria recta
+            return 0.0, 0, 0, 0
+
+    def launch_ball(self, now):
+        """Lanza la pelota a una posición aleatoria con tiempo constante"""
+        if self.ball_launching or self.ball_caught or self.game_over:
+            return
+
+        # Posición inicial
+        self.ball_x = (self.width - self.ball_w) // 2
+        self.ball_y = self.height - self.ball_h - 210 # Posición del que patea
+        start_x = self.ball_x + self.ball_w/2
+        start_y = self.ball_y + self.ball_h/2
+
+        # Generar posición objetivo con preferencia por esquinas
+        self.ball_target_x, self.ball_target_y = self._generate_target_position()
+
+        # Generar parámetros de curva
+        (self.curve_strength, self.curve_direction,
+         self.control_point_x, self.control_point_y) = self._generate_curve_parameters(
+            start_x, start_y, self.ball_target_x, self.ball_target_y
+        )
+
+        # Configurar estado de lanzamiento
+        self.ball_launching = True
+        self.ball_moving = True
+        self.ball_rotating = True
+        self.ball_scale = 0.2  # Comienza pequeña (igual que al inicio)
+        self.ball_launch_start_time = now
+        self._reaction_origin = None
+        self.reaction_ms = None
+
+        self._emit('launch', target=(self.ball_target_x, self.ball_target_y), region=self.target_region,
+                   curve_strength=self.curve_strength)
+
+    def reset_ball(self, now):
+        """Resetea la pelota a la posición inicial DEL PORTERO"""
+        self.ball_launching = False
+        self.ball_moving = False
+        self.ball_x = (self.width - self.ball_w) // 2
+        self.ball_y = self.height - self.ball_h - 210
+        self.ball_scale = 0.2
+        self.ball_caught = False
+        self.caught_by = None
+        self.curve_strength = 0.0
+        # marcar tiempo del reset para posible auto-launch
+        self._last_reset_time = now
+
+    def wait_before_launch(self, now):
+        """Volver a contar el retardo del auto-lanzamiento desde now (p. ej. tras una repetición)"""
+        self._last_reset_time = now
+
+    def between_throws(self):
+        """True con la pelota en el portero después de al menos una atrapada o fallo"""
+        return (not self.ball_launching and not self.ball_moving and not self.game_over
+                and self.score + self.misses > 0)
+
+    def reset_game(self, now):
+        """Reiniciar marcador y pelota para una partida nueva"""
+        self.score = 0
+        self.misses = 0
+        self.game_over = False
+        self.reset_ball(now)
+
+    def set_hand_depth(self, depth):
+        self.hand_depth = depth
+
+    def hand_scale(self):
+        """Escala del guante (sprite e hitbox) según la profundidad de la mano"""
+        if self.hand_depth is None:
+            return 1.0
+        low, high = self.hand_scale_range
+        return min(high, max(low, self.hand_depth))
+
+    def glove_positions(self, hand_pos):
+        """Centros (derecho, izquierdo) de los guantes para la mano en `hand_pos`, sin salirse del campo"""
+        x, y = hand_pos
+        half = self.glove_width // 2
+        return (min(self.width - half, x + self.glove_offset), y), (max(half, x - self.glove_offset), y)
+
+    def hand_plane(self):
+        """Profundidad (en unidades de ball_scale) a la que la mano intercepta la pelota"""
+        return min(1.0, max(0.6, 1.0 - self.hand_reach_gain * (self.hand_scale() - 1.0)))
+
+    def ball_in_hand_plane(self):
+        return abs(self.ball_scale - self.hand_plane()) <= self.hand_depth_tolerance + 1e-9
+
+    def check_ball_catch(self, hand_rect, ball_rect):
+        """Verifica si se atrapó la pelota (solo cuando tiene escala 1.0)"""
+        if self.ball_in_hand_plane() and hand_rect.colliderect(ball_rect):
+            return True
+        return False
+
+    def _touching_hand(self, right_pos, left_pos):
+        """Primera mano ('Right' antes que 'Left') cuyo hitbox toca el de la pelota, o None"""
+        ball = self._ball_hitbox
+        size = int(self.ball_hitbox_size)
+        ball.update(int(self.ball_x + self.ball_w / 2) - size // 2, int(self.ball_y + self.ball_h / 2) - size // 2,
+                    size, size)
+        hand = self._hand_hitbox
+        size = int(self.hand_hitbox_size * self.hand_scale())
+        for label, pos in (('Right', right_pos), ('Left', left_pos)):
+            if pos is not None:
+                hand.update(int(pos[0]) - size // 2, int(pos[1]) - size // 2, size, size)
+                if hand.colliderect(ball):
+                    return label
+        return None
+
+    # helpers de hitbox
+    def hand_rect_from_center(self, center_pos):
+        if center_pos is None:
+            return None
+        cx, cy = int(center_pos[0]), int(center_pos[1])
+        size = int(self.hand_hitbox_size * self.hand_scale())
+        rect = pygame.Rect(0, 0, size, size)
+        rect.center = (cx, cy)
+        return rect
+
+    def ball_rect(self):
+        size = int(self.ball_hitbox_size)
+        cx = int(self.ball_x + self.ball_w / 2)
+        cy = int(self.ball_y + self.ball_h / 2)
+        rect = pygame.Rect(0, 0, size, size)
+        rect.center = (cx, cy)
+        return rect
+
+    def _update_flight(self, now):
+        """Avanza la pelota por su trayectoria; registra el fallo al llegar al objetivo"""
+        if not self.ball_rotating:
+            # Si la pelota deja de rotar, detener desplazamiento
+            self.ball_moving = False
+            self.ball_launching = False
+            return
+
+        elapsed_time = now - self.ball_launch_start_time
+        progress = min(1.0, elapsed_time / self.ball_travel_time)
+
+        start_x = self._move_start_x
+        start_y = self._move_start_y
+
+        if self.curve_strength > 0:
+            # Trayectoria curva (Bézier)
+            new_x, new_y = self.calculate_bezier_point(
+                progress, start_x, start_y,
+                self.control_point_x, self.control_point_y,
+                self.ball_target_x, self.ball_target_y
+            )
+        else:
+            # Trayectoria recta
+            new_x = start_x + (self.ball_target_x - start_x) * progress
+            new_y = start_y + (self.ball_target_y - start_y) * progress
+
+        # Actualizar posición de la pelota (centro)
+        self.ball_x = new_x - self.ball_w/2
+        self.ball_y = new_y - self.ball_h/2
+
+        # Escalar la pelota basado en el progreso
+        start_scale = 0.2
+        target_scale = 1.0
+        self.ball_scale = start_scale + (target_scale - start_scale) * progress
+
+        # Verificar si llegó al objetivo
+        if progress >= 1.0:
+            self.ball_launching = False
+            self.ball_moving = False
+            self.misses += 1
+            self._emit('miss', misses=self.misses, target=(self.ball_target_x, self.ball_target_y),
+                       region=self.target_region, curve_strength=self.curve_strength, reaction_ms=self.reaction_ms)
+            self.reset_ball(now)  # Esto la reseteará a escala 0.2
+
+            # Verificar si se perdió el juego -> activar game over
+            if self.misses >= self.max_misses:
+                self.game_over = True
+                self._emit('game_over', score=self.score)
+
+    def _update_reaction(self, now, hand_pos):
+        """Primer instante tras el lanzamiento en que la mano se aleja de donde estaba"""
+        if hand_pos is None or self.reaction_ms is not None:
+            return
+        if self._reaction_origin is None:
+            self._reaction_origin = hand_pos
+            return
+        dx = hand_pos[0] - self._reaction_origin[0]
+        dy = hand_pos[1] - self._reaction_origin[1]
+        if dx * dx + dy * dy >= self.reaction_threshold_px ** 2:
+            self.reaction_ms = now - self.ball_launch_start_time
+
+    def update(self, now, right_pos=None, left_pos=None):
+        """Un tick de juego: vuelo, atrapadas y auto-lanzamiento. Devuelve los eventos pendientes."""
+        if self.ball_launching:
+            self._update_reaction(now, right_pos or left_pos)
+
+        if self.ball_moving and self.ball_launching:
+            self._update_flight(now)
+
+        if self.ball_rotating:
+            self.ball_angle = (self.ball_angle + self.ball_rotation_speed) % 360
+
+        # Colisiones - SOLO cuando la pelota cruza la franja de profundidad de la mano
+        label = None
+        if not self.game_over and self.ball_in_hand_plane():
+            label = self._touching_hand(right_pos, left_pos)
+        if label is not None:
+            self.last_collision_time = now
+            self.collision_hand = label
+            self.score += 1
+            self._emit('catch', hand=label, score=self.score, target=(self.ball_target_x, self.ball_target_y),
+                       region=self.target_region, curve_strength=self.curve_strength,
+                       reaction_ms=self.reaction_ms)
+            if self.score > 0 and self.score % 5 == 0:
+                self._emit('level_up', score=self.score)
+            self.reset_ball(now)  # Esto la reseteará a escala 0.2
+
+        # Auto-launch después de que la pelota se haya reseteado (si está habilitado)
+        if self.auto_launch_enabled and not self.ball_launching and not self.ball_moving and not self.game_over:
+            if now - self._last_reset_time >= self.auto_launch_delay_ms:
+                self.launch_ball(now)
+
+        return self.drain_events()
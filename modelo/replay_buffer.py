@@ -0,0 +1,129 @@
+import numpy as np
+
+# Un registro por tick de juego. Empaquetado (sin relleno): 35 bytes.
+REPLAY_DTYPE = np.dtype([
+    ('t', np.int32),                # ms del reloj del juego
+    ('ball', np.float32, (2,)),     # esquina superior izquierda de la pelota (ball_x, ball_y)
+    ('scale', np.float32),          # ball_scale
+    ('angle', np.float32),          # ball_angle (grados)
+    ('anim', np.uint8),             # frame del spritesheet de la pelota
+    ('rotating', np.bool_),         # ball_rotating
+    ('right', np.int16, (2,)),      # centro del guante derecho; NO_HAND = sin mano
+    ('left', np.int16, (2,)),       # centro del guante izquierdo
+    ('hand_scale', np.float16),     # escala de los guantes (profundidad)
+    ('score', np.uint16),
+    ('misses', np.uint8),
+])
+NO_HAND = -32768                    # coordenada de "sin mano" (fuera de cualquier canvas)
+
+
+class ReplayFrame:
+    """
+    Un instante de una repetición con los atributos que usan los helpers de
+    dibujo (draw_ball, draw_hud): se pasa en lugar de GameLogic.
+    """
+    __slots__ = ('ball_x', 'ball_y', 'ball_w', 'ball_h', 'ball_scale', 'ball_angle', 'ball_rotating',
+                 'anim', 'right', 'left', 'hand_scale', 'score', 'misses', 'max_misses')
+
+    def __init__(self, logic) -> None:
+        self.ball_w, self.ball_h = logic.ball_w, logic.ball_h
+        self.max_misses = logic.max_misses
+        self.ball_x = self.ball_y = 0.0
+        self.ball_scale = 1.0
+        self.ball_angle = 0.0
+        self.ball_rotating = False
+        self.anim = 0
+        self.right = self.left = None
+        self.hand_scale = 1.0
+        self.score = self.misses = 0
+
+
+class ReplayBuffer:
+    """
+    Últimos segundos de juego como registros compactos (REPLAY_DTYPE) en un
+    array estructurado circular, para repetirlos (p. ej. a cámara lenta)
+    volviendo a dibujarlos en vez de guardar frames renderizados.
+
+    La memoria es fija: `capacity` = seconds * rate registros de 35 bytes
+    (8 s a 60 Hz = 480 registros = 16,4 KB; un solo frame de 640x480 en RGBA
+    ocupa 1,2 MB). Grabar escribe en el sitio, sin reservar memoria.
+    """
+    def __init__(self, seconds: float = 8.0, rate: int = 60) -> None:
+        self.capacity = max(1, int(seconds * rate))
+        self.records = np.zeros(self.capacity, dtype=REPLAY_DTYPE)
+        self._next = 0
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.records.nbytes
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self) -> None:
+        self._next = 0
+        self.count = 0
+
+    def record(self, now: int, logic, anim_frame: int, right_pos=None, left_pos=None) -> None:
+        """Guardar el tick `now` (ms): pelota, animación, guantes y marcador"""
+        row = self.records[self._next]
+        row['t'] = now
+        row['ball'] = (logic.ball_x, logic.ball_y)
+        row['scale'] = logic.ball_scale
+        row['angle'] = logic.ball_angle
+        row['anim'] = anim_frame
+        row['rotating'] = logic.ball_rotating
+        row['right'] = right_pos if right_pos is not None else (NO_HAND, NO_HAND)
+        row['left'] = left_pos if left_pos is not None else (NO_HAND, NO_HAND)
+        row['hand_scale'] = logic.hand_scale()
+        row['score'] = logic.score
+        row['misses'] = logic.misses
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def snapshot(self, seconds: float | None = None) -> np.ndarray:
+        """Copia en orden cronológico de los últimos `seconds` (o de todo lo grabado)"""
+        start = (self._next - self.count) % self.capacity
+        order = (start + np.arange(self.count)) % self.capacity
+        records = self.records[order]
+        if seconds is not None and len(records):
+            records = records[records['t'] >= records['t'][-1] - seconds * 1000]
+        return records
+
+
+def frame_at(records: np.ndarray, t: float, out: ReplayFrame) -> ReplayFrame:
+    """
+    Rellenar `out` con el estado en el instante `t` (ms) de una copia de
+    ReplayBuffer.snapshot(). Entre dos registros la posición, escala y
+    ángulo de la pelota y los guantes se interpolan (cámara lenta fluida);
+    lo discreto (animación, marcador) es el del registro anterior.
+    """
+    times = records['t']
+    i = int(np.searchsorted(times, t, side='right')) - 1
+    i = min(max(i, 0), len(records) - 1)
+    a = records[i]
+    b = records[min(i + 1, len(records) - 1)]
+    span = int(b['t']) - int(a['t'])
+    k = min(1.0, max(0.0, (t - int(a['t'])) / span)) if span > 0 else 0.0
+
+    out.ball_x = float(a['ball'][0] + (b['ball'][0] - a['ball'][0]) * k)
+    out.ball_y = float(a['ball'][1] + (b['ball'][1] - a['ball'][1]) * k)
+    out.ball_scale = float(a['scale'] + (b['scale'] - a['scale']) * k)
+    turn = (float(b['angle']) - float(a['angle']) + 180) % 360 - 180  # por el camino corto (0 <-> 359)
+    out.ball_angle = (float(a['angle']) + turn * k) % 360
+    out.ball_rotating = bool(a['rotating'])
+    out.anim = int(a['anim'])
+    out.hand_scale = float(a['hand_scale'])
+    out.score = int(a['score'])
+    out.misses = int(a['misses'])
+    for name in ('right', 'left'):
+        pa, pb = a[name], b[name]
+        if pa[0] == NO_HAND:
+            setattr(out, name, None)
+        elif pb[0] == NO_HAND:
+            setattr(out, name, (int(pa[0]), int(pa[1])))
+        else:
+            setattr(out, name, (int(pa[0] + (int(pb[0]) - int(pa[0])) * k),
+                                int(pa[1] + (int(pb[1]) - int(pa[1])) * k)))
+    return out
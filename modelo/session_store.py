@@ -0,0 +1,323 @@
+import queue
+import sqlite3
+import threading
+import time
+
+from game_log import get_logger
+
+log = get_logger("estadisticas")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    score INTEGER NOT NULL,
+    misses INTEGER NOT NULL,
+    shots INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_score ON games (score DESC, ended_at);
+CREATE TABLE IF NOT EXISTS shots (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    t REAL NOT NULL,
+    caught INTEGER NOT NULL,
+    hand TEXT,
+    target_x INTEGER,
+    target_y INTEGER,
+    region TEXT,
+    curve_strength REAL,
+    reaction_ms INTEGER
+);
+CREATE INDEX IF NOT EXISTS shots_by_game ON shots (game_id);
+"""
+
+
+def _migrate(db):
+    """Bases anteriores: `shots.game` era un contador sin relación con games.id; se conservan aparte"""
+    columns = [row[1] for row in db.execute("PRAGMA table_info(shots)")]
+    if 'game' in columns and 'game_id' not in columns:
+        db.execute("ALTER TABLE shots RENAME TO shots_v1")
+
+
+class SessionStore:
+    """
+    Estadísticas persistentes de las sesiones en SQLite.
+
+    `record()` se llama desde el bucle del juego con los eventos de GameLogic y
+    sólo encola tuplas; un hilo escritor las inserta por lotes (`batch_size`
+    filas o cada `flush_interval` segundos) en una única transacción. La tabla
+    `games` guarda un resumen por partida con índice por puntuación, así que
+    `high_scores()` no depende del número de lanzamientos guardados.
+
+    La fila de la partida se crea al empezarla (en el hilo escritor) y cada
+    lanzamiento guarda su `games.id` en `shots.game_id`: varias estaciones
+    pueden escribir en la misma base sin mezclar partidas. El hilo escritor
+    mantiene `best_score` (récord de la base) para no consultar SQLite desde
+    el hilo del juego.
+    """
+
+    def __init__(self, path, batch_size=256, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._reader = None
+        self.written = 0
+        self.error = None
+        self.best_score = 0     # récord de la base; lo actualiza el hilo escritor
+
+        # Estado de la partida en curso (sólo lo toca el hilo del juego)
+        self.session_started = time.time()
+        self.session_id = None
+        self._game = None       # número local de la partida en curso (el hilo escritor le asigna games.id)
+        self._games_started = 0
+        self._game_shots = 0
+
+        # La base se abre en el hilo escritor: crear el esquema no retrasa el arranque.
+        # Hasta que esté abierta, record() descarta eventos (sólo ocurre en los primeros ms).
+        self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5.0)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # --- Hilo escritor ---
+    def _run(self):
+        try:
+            db = self._connect()
+            # Migración y esquema bajo el bloqueo de escritura: otras estaciones pueden abrir la base a la vez
+            db.execute("BEGIN IMMEDIATE")
+            _migrate(db)
+            db.executescript(SCHEMA)
+            cur = db.execute("INSERT INTO sessions (started_at) VALUES (?)", (self.session_started,))
+            db.commit()
+            self.best_score = db.execute("SELECT COALESCE(MAX(score), 0) FROM games").fetchone()[0]
+            # session_id al final: habilita record() desde el hilo del juego
+            self.session_id = cur.lastrowid
+        except sqlite3.Error as e:
+            self.error = e
+            log.warning("No se pudo abrir la base de estadísticas %s: %s", self.path, e)
+            return
+
+        game_ids = {}   # número local de partida -> games.id
+        items, waiters = [], []
+        running = True
+        while running:
+            deadline = time.perf_counter() + self.flush_interval
+            # Juntar un lote: hasta batch_size filas o hasta que venza el intervalo
+            while len(items) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                kind = item[0]
+                if kind == 'flush':
+                    waiters.append(item[1])
+                    break
+                if kind == 'close':
+                    running = False
+                    break
+                items.append(item)
+
+            if items:
+                try:
+                    with db:
+                        started, ended, best = self._write_batch(db, items, game_ids)
+                    # Sólo tras el commit: si el lote se deshace, esos games.id no existen
+                    game_ids.update(started)
+                    for game in ended:
+                        game_ids.pop(game, None)
+                    if best is not None:
+                        self.best_score = best
+                    self.written += len(items)
+                except sqlite3.Error as e:
+                    log.warning("Error guardando estadísticas (%d filas): %s", len(items), e)
+                except Exception:
+                    # Que el hilo siga vivo: si no, record() y flush() se quedarían sin escritor
+                    log.exception("Error inesperado guardando estadísticas (%d filas)", len(items))
+                items = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+
+        try:
+            with db:
+                db.execute("UPDATE sessions SET ended_at = ? WHERE id = ?", (time.time(), self.session_id))
+        except sqlite3.Error:
+            pass
+        db.close()
+
+    def _write_batch(self, db, items, game_ids):
+        """
+        Escribir un lote en orden: la fila de cada partida antes que sus lanzamientos.
+
+        No toca `game_ids`: devuelve las partidas empezadas {número: games.id},
+        las terminadas y el récord (o None) para aplicarlos tras el commit.
+        """
+        shots = []
+        started, ended = {}, []
+        scored = False
+        for kind, row in items:
+            if kind == 'game_start':
+                game, started_at = row
+                cur = db.execute("INSERT INTO games (session_id, started_at, ended_at, score, misses, shots)"
+                                 " VALUES (?, ?, ?, 0, 0, 0)", (self.session_id, started_at, started_at))
+                started[game] = cur.lastrowid
+                continue
+            game = row[0]
+            game_id = started.get(game, game_ids.get(game))
+            if game_id is None:
+                # Su fila se perdió con un lote fallido: sin games.id no se puede enlazar
+                log.warning("Partida %d sin fila en games: se descarta un '%s'", game, kind,
+                            extra={'kind': 'partida_huerfana'})
+                continue
+            if kind == 'shot':
+                shots.append((self.session_id, game_id) + row[1])
+            elif kind == 'game_end':
+                _, ended_at, score, misses, count = row
+                ended.append(game)
+                if count:
+                    db.execute("UPDATE games SET ended_at = ?, score = ?, misses = ?, shots = ? WHERE id = ?",
+                               (ended_at, score, misses, count, game_id))
+                    scored = True
+                else:
+                    # Partida sin lanzamientos (p. ej. reinicio inmediato): no cuenta
+                    db.execute("DELETE FROM games WHERE id = ?", (game_id,))
+        db.executemany(
+            "INSERT INTO shots (session_id, game_id, t, caught, hand, target_x, target_y, region,"
+            " curve_strength, reaction_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", shots)
+        best = None
+        if scored:
+            # Con varias estaciones en la misma base el récord puede venir de otra
+            best = db.execute("SELECT COALESCE(MAX(score), 0) FROM games").fetchone()[0]
+        return started, ended, best
+
+    # --- API del hilo del juego ---
+    @property
+    def enabled(self):
+        return self.error is None and self.session_id is not None
+
+    def _start_game(self):
+        self._games_started += 1
+        self._game = self._games_started
+        self._game_shots = 0
+        self._queue.put(('game_start', (self._game, time.time())))
+
+    def _end_game(self, score, misses):
+        if self._game is not None:
+            self._queue.put(('game_end', (self._game, time.time(), score, misses, self._game_shots)))
+        self._game = None
+
+    def record(self, event, data, score=0, misses=0):
+        """Registrar un evento del juego ('start', 'restart', 'catch', 'miss', 'game_over'); no bloquea"""
+        if not self.enabled:
+            return
+        if event in ('start', 'restart'):
+            self._end_game(score, misses)
+            self._start_game()
+        elif event in ('catch', 'miss'):
+            if self._game is None:
+                self._start_game()
+            self._game_shots += 1
+            target = data.get('target') or (None, None)
+            self._queue.put(('shot', (self._game, (
+                time.time(), 1 if event == 'catch' else 0, data.get('hand'),
+                target[0], target[1], data.get('region'), data.get('curve_strength'), data.get('reaction_ms'),
+            ))))
+        elif event == 'game_over':
+            self._end_game(data.get('score', score), misses)
+
+    def flush(self, timeout=5.0):
+        """Esperar a que todo lo encolado esté escrito"""
+        if not self.enabled or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(('flush', done))
+        done.wait(timeout)
+
+    def high_scores(self, limit=10):
+        """Mejores partidas: [(puntuación, fallos, lanzamientos, fin), ...] (usa el índice por puntuación)"""
+        if not self.enabled:
+            return []
+        if self._reader is None:
+            self._reader = sqlite3.connect(self.path, timeout=5.0)
+        return self._reader.execute(
+            "SELECT score, misses, shots, ended_at FROM games ORDER BY score DESC, ended_at LIMIT ?",
+            (limit,)).fetchall()
+
+    def close(self, score=0, misses=0):
+        """Cerrar la partida en curso (se descarta si no tuvo lanzamientos), vaciar la cola y cerrar la base"""
+        if self.enabled:
+            self._end_game(score, misses)
+            self._queue.put(('close',))
+        self._thread.join(timeout=5.0)
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+
+if __name__ == '__main__':
+    # Escritura por lotes y consulta de récords con muchos lanzamientos guardados
+    import argparse
+    import os
+    import random
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark del almacén de estadísticas")
+    parser.add_argument('--shots', type=int, default=1_000_000)
+    parser.add_argument('--db', help="Base a usar (por defecto, una temporal)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    rng = random.Random(0)
+    store = SessionStore(path)
+    while not store.enabled and store.error is None:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    worst_record_us = 0.0
+    score = misses = 0
+    store.record('start', {})
+    for _ in range(args.shots):
+        t0 = time.perf_counter()
+        if rng.random() < 0.8:
+            score += 1
+            store.record('catch', {'hand': 'Right', 'target': (rng.randint(0, 640), rng.randint(0, 480)),
+                                   'region': 'center', 'curve_strength': 0.4, 'reaction_ms': rng.randint(150, 600)})
+        else:
+            misses += 1
+            store.record('miss', {'target': (rng.randint(0, 640), rng.randint(0, 480)), 'region': 'edge_top',
+                                  'curve_strength': 0.0, 'reaction_ms': None})
+            if misses == 3:
+                store.record('game_over', {'score': score}, score, misses)
+                store.record('restart', {})
+                score = misses = 0
+        worst_record_us = max(worst_record_us, (time.perf_counter() - t0) * 1e6)
+    enqueue_s = time.perf_counter() - start
+    store.flush(timeout=600)
+    total_s = time.perf_counter() - start
+
+    t0 = time.perf_counter()
+    best = store.high_scores(10)
+    query_ms = (time.perf_counter() - t0) * 1000
+    store.close()
+
+    print(f"{args.shots:,} lanzamientos: record() {enqueue_s / args.shots * 1e6:.2f} us de media "
+          f"(peor {worst_record_us:.0f} us), escritos en {total_s:.1f}s ({args.shots / total_s:,.0f} filas/s)")
+    print(f"high_scores(10) en {query_ms:.2f} ms; récord: {best[0][0] if best else '-'}")
+    print(f"Base: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
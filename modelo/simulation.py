@@ -0,0 +1,221 @@
+import csv
+import itertools
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from modelo.game_logic import GameLogic
+
+
+# Parámetros de GameLogic que se pueden barrer desde la línea de comandos
+TUNABLE = {
+    'ball_travel_time': int,
+    'ball_hitbox_size': int,
+    'hand_hitbox_size': int,
+    'auto_launch_delay_ms': int,
+    'curve_probability': float,
+    # tuplas: valores separados por '/', p. ej. target_weights=0.6/0.3/0.1
+    'target_weights': lambda v: tuple(float(x) for x in v.split('/')),
+    'curve_strength_range': lambda v: tuple(float(x) for x in v.split('/')),
+}
+
+
+class ScriptedHand:
+    """Portero sintético: reacciona tras `reaction_ms` y persigue la pelota con velocidad limitada"""
+    def __init__(self, rng, reaction_ms=250, max_speed=900, noise_px=15, anticipation=0.5, rest=(320, 240)):
+        self.rng = rng
+        self.reaction_ms = reaction_ms
+        self.max_speed = max_speed        # px/s
+        self.noise_px = noise_px          # temblor del tracking
+        self.anticipation = anticipation  # 0 = persigue la pelota, 1 = va directo al objetivo
+        self.rest = rest
+        self.x, self.y = rest
+
+    def position(self, now, logic, dt_ms):
+        if logic.ball_launching and now - logic.ball_launch_start_time >= self.reaction_ms:
+            bx = logic.ball_x + logic.ball_w / 2
+            by = logic.ball_y + logic.ball_h / 2
+            a = self.anticipation
+            goal = (bx + (logic.ball_target_x - bx) * a, by + (logic.ball_target_y - by) * a)
+        else:
+            goal = self.rest
+
+        dx = goal[0] - self.x
+        dy = goal[1] - self.y
+        distance = math.hypot(dx, dy)
+        step = self.max_speed * dt_ms / 1000
+        if distance > step:
+            dx *= step / distance
+            dy *= step / distance
+        self.x += dx
+        self.y += dy
+        return (self.x + self.rng.gauss(0, self.noise_px), self.y + self.rng.gauss(0, self.noise_px))
+
+
+class TraceHand:
+    """Reproduce en bucle una traza grabada (CSV de TraceRecorder), desde un desfase aleatorio"""
+    def __init__(self, rng, samples):
+        self.samples = [(t, pos) for t, pos in samples if pos is not None]
+        t0 = self.samples[0][0]
+        self.times = [t - t0 for t, _ in self.samples]
+        self.duration = max(0.001, self.times[-1])
+        self.offset = rng.uniform(0, self.duration)
+        self._i = 0
+
+    def position(self, now, logic, dt_ms):
+        t = (now / 1000 + self.offset) % self.duration
+        # Avance incremental: el tiempo sólo crece salvo al dar la vuelta
+        if t < self.times[self._i]:
+            self._i = 0
+        while self._i + 1 < len(self.times) and self.times[self._i + 1] <= t:
+            self._i += 1
+        return self.samples[self._i][1]
+
+
+def _make_hand(policy, rng):
+    kind = policy.get('kind', 'scripted')
+    if kind == 'trace':
+        return TraceHand(rng, policy['samples'])
+    options = {k: v for k, v in policy.items() if k != 'kind'}
+    return ScriptedHand(rng, **options)
+
+
+def simulate_games(params, seeds, policy, tick_ms=16, max_shots=100):
+    """
+    Jugar una partida por semilla con la lógica real, hasta game over o `max_shots` lanzamientos
+    (un buen portero casi nunca llega a game over). La mano sintética mueve los
+    dos guantes igual que en el juego (GameLogic.glove_positions).
+
+    Devuelve {'regions': {zona: [lanzamientos, atrapadas]}, 'games', 'sim_ms'}.
+    """
+    regions = {}
+    sim_ms = 0
+    for seed in seeds:
+        rng = random.Random(seed)
+        logic = GameLogic(rng=rng, enable_auto_launch=True)
+        for name, value in params.items():
+            setattr(logic, name, value)
+        logic.reset_game(0)
+        logic.auto_launch_enabled = True
+        hand = _make_hand(policy, random.Random(seed ^ 0x5EED))
+
+        now = 0
+        shots = 0
+        while not logic.game_over and shots < max_shots:
+            now += tick_ms
+            pos = hand.position(now, logic, tick_ms)
+            # Como en el juego: la mano mueve los dos guantes
+            right, left = logic.glove_positions(pos) if pos is not None else (None, None)
+            for event, data in logic.update(now, right, left):
+                if event == 'catch' or event == 'miss':
+                    shots += 1
+                    counts = regions.setdefault(data['region'], [0, 0])
+                    counts[0] += 1
+                    if event == 'catch':
+                        counts[1] += 1
+        sim_ms += now
+    return {'regions': regions, 'games': len(seeds), 'sim_ms': sim_ms}
+
+
+def _run_task(task):
+    index, params, seeds, policy, tick_ms, max_shots = task
+    return index, simulate_games(params, seeds, policy, tick_ms, max_shots)
+
+
+def parameter_grid(grid):
+    """Producto cartesiano de {'nombre': [valores]} -> lista de diccionarios"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))] or [{}]
+
+
+def run_simulation(param_sets, games, policy, workers=None, seed=0, tick_ms=16, max_shots=100, batch=50):
+    """Repartir `games` partidas por conjunto de parámetros en un pool de procesos"""
+    tasks = []
+    for index, params in enumerate(param_sets):
+        seeds = [seed * 1_000_003 + index * 100_000 + g for g in range(games)]
+        for i in range(0, games, batch):
+            tasks.append((index, params, seeds[i:i + batch], policy, tick_ms, max_shots))
+
+    results = [{'regions': {}, 'games': 0, 'sim_ms': 0} for _ in param_sets]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for index, partial in pool.map(_run_task, tasks, chunksize=1):
+            total = results[index]
+            total['games'] += partial['games']
+            total['sim_ms'] += partial['sim_ms']
+            for region, (shots, catches) in partial['regions'].items():
+                counts = total['regions'].setdefault(region, [0, 0])
+                counts[0] += shots
+                counts[1] += catches
+    return results
+
+
+def _format_params(params):
+    return ' '.join(f"{k}={'/'.join(map(str, v)) if isinstance(v, tuple) else v}" for k, v in params.items()) or '(por defecto)'
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulación sin ventana para ajustar la dificultad")
+    parser.add_argument('--games', type=int, default=1000, help="Partidas por conjunto de parámetros")
+    parser.add_argument('--workers', type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tick-ms', type=int, default=16, help="Duración de cada tick simulado")
+    parser.add_argument('--max-shots', type=int, default=100, help="Lanzamientos máximos por partida")
+    parser.add_argument('--grid', action='append', default=[], metavar='PARAM=V1,V2',
+                        help=f"Valores a barrer; parámetros: {', '.join(TUNABLE)}")
+    parser.add_argument('--trace', help="CSV de TraceRecorder para usar manos grabadas en vez de la mano sintética")
+    parser.add_argument('--reaction-ms', type=int, default=250)
+    parser.add_argument('--max-speed', type=float, default=900)
+    parser.add_argument('--noise-px', type=float, default=15)
+    parser.add_argument('--anticipation', type=float, default=0.5)
+    parser.add_argument('--out', help="CSV de salida con la tasa de atrapadas por zona")
+    args = parser.parse_args()
+
+    grid = {}
+    for item in args.grid:
+        name, _, values = item.partition('=')
+        if name not in TUNABLE:
+            parser.error(f"parámetro desconocido: {name}")
+        grid[name] = [TUNABLE[name](v) for v in values.split(',')]
+
+    if args.trace:
+        from Controler.latency_compensation import load_trace
+        samples = load_trace(args.trace)
+        label = 'Right' if any(p for _, p in samples.get('Right', [])) else 'Left'
+        policy = {'kind': 'trace', 'samples': samples[label]}
+    else:
+        policy = {'kind': 'scripted', 'reaction_ms': args.reaction_ms, 'max_speed': args.max_speed,
+                  'noise_px': args.noise_px, 'anticipation': args.anticipation}
+
+    param_sets = parameter_grid(grid)
+    start = time.perf_counter()
+    results = run_simulation(param_sets, args.games, policy, workers=args.workers, seed=args.seed,
+                             tick_ms=args.tick_ms, max_shots=args.max_shots)
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for params, result in zip(param_sets, results):
+        shots = sum(c[0] for c in result['regions'].values())
+        catches = sum(c[1] for c in result['regions'].values())
+        print(f"\n{_format_params(params)}: {result['games']} partidas, "
+              f"{catches}/{shots} atrapadas ({catches / max(1, shots):.1%})")
+        for region in sorted(result['regions']):
+            r_shots, r_catches = result['regions'][region]
+            rate = r_catches / max(1, r_shots)
+            print(f"  {region:<12} {r_catches:>7}/{r_shots:<7} {rate:6.1%}")
+            rows.append({**{k: _format_params({k: v}).split('=', 1)[1] for k, v in params.items()},
+                         'region': region, 'shots': r_shots, 'catches': r_catches, 'catch_rate': round(rate, 4)})
+
+    sim_seconds = sum(r['sim_ms'] for r in results) / 1000
+    print(f"\n{sum(r['games'] for r in results)} partidas en {elapsed:.1f}s "
+          f"({sim_seconds / max(1e-9, elapsed):,.0f}x tiempo real)")
+
+    if args.out and rows:
+        fields = list(grid) + ['region', 'shots', 'catches', 'catch_rate']
+        with open(args.out, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Resultados en {args.out}")
@@ -0,0 +1,253 @@
+import pygame
+
+
+class SpatialGrid:
+    """
+    Índice de colisiones por rejilla uniforme sobre el canvas lógico.
+
+    Cada entidad (mano, pelota, objetivo...) se registra con una clave y un
+    rect. El índice guarda un `pygame.Rect` propio por entidad y lo reutiliza
+    en cada `update()`; sólo se tocan las celdas si la entidad cambia de
+    celdas. Las consultas revisan únicamente las celdas que toca la región
+    pedida (fase amplia) y después prueban los rects candidatos en C con
+    `collidedictall` (fase fina).
+
+    Con pocas entidades la fase amplia cuesta más que probarlas todas: hasta
+    `direct_max` entidades no se mantienen celdas y cada consulta es un único
+    `collidedictall` sobre todos los rects. La rejilla se construye al pasar
+    de `direct_max` y se descarta al bajar de la mitad.
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, cell_size: int = 128, direct_max: int = 256) -> None:
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.direct_max = direct_max
+        self._cells: dict[tuple[int, int], dict] = {}  # celda -> {clave: rect}
+        self._rects: dict = {}     # clave -> pygame.Rect reutilizado
+        self._ranges: dict = {}    # clave -> (x0, y0, x1, y1) en celdas (sólo con la rejilla activa)
+        self._indexed = False
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, key) -> bool:
+        return key in self._rects
+
+    def rect(self, key) -> pygame.Rect | None:
+        return self._rects.get(key)
+
+    def _cell_range(self, x: int, y: int, w: int, h: int) -> tuple[int, int, int, int]:
+        size = self.cell_size
+        # Un rect vacío sigue ocupando la celda de su esquina
+        return (x // size, y // size, (x + max(w, 1) - 1) // size, (y + max(h, 1) - 1) // size)
+
+    def update(self, key, x: int, y: int, w: int, h: int) -> None:
+        """Insertar o mover una entidad (rect con esquina superior izquierda en x, y)"""
+        x, y, w, h = int(x), int(y), int(w), int(h)
+        rect = self._rects.get(key)
+        if rect is None:
+            rect = self._rects[key] = pygame.Rect(x, y, w, h)
+            if not self._indexed and len(self._rects) > self.direct_max:
+                self._build_index()
+                return
+        else:
+            rect.update(x, y, w, h)
+        if not self._indexed:
+            return
+
+        size = self.cell_size
+        w = w if w > 0 else 1
+        h = h if h > 0 else 1
+        new_range = (x // size, y // size, (x + w - 1) // size, (y + h - 1) // size)
+        old_range = self._ranges.get(key)
+        if new_range == old_range:
+            return
+        if old_range is not None:
+            self._unlink(key, old_range)
+        self._ranges[key] = new_range
+        x0, y0, x1, y1 = new_range
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cell = cells[(cx, cy)] = {}
+                cell[key] = rect
+
+    def update_center(self, key, center, size: int) -> None:
+        """Insertar o mover una entidad cuadrada de lado `size` centrada en `center`"""
+        size = int(size)
+        x = int(center[0]) - size // 2
+        y = int(center[1]) - size // 2
+        rect = self._rects.get(key)
+        if rect is not None and not self._indexed:
+            rect.update(x, y, size, size)  # sin rejilla: basta con mover el rect
+            return
+        self.update(key, x, y, size, size)
+
+    def remove(self, key) -> None:
+        if key not in self._rects:
+            return
+        del self._rects[key]
+        if self._indexed:
+            self._unlink(key, self._ranges.pop(key))
+            if len(self._rects) < self.direct_max // 2:
+                self._drop_index()
+
+    def clear(self) -> None:
+        self._rects.clear()
+        self._drop_index()
+
+    def _build_index(self) -> None:
+        self._indexed = True
+        for key, rect in self._rects.items():
+            self._ranges.pop(key, None)
+            self.update(key, rect.x, rect.y, rect.w, rect.h)
+
+    def _drop_index(self) -> None:
+        self._indexed = False
+        self._cells.clear()
+        self._ranges.clear()
+
+    def _unlink(self, key, cell_range) -> None:
+        x0, y0, x1, y1 = cell_range
+        cells = self._cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells[(cx, cy)]
+                del cell[key]
+                if not cell:
+                    del cells[(cx, cy)]
+
+    def _candidates(self, cell_range) -> dict:
+        x0, y0, x1, y1 = cell_range
+        cells = self._cells
+        if x0 == x1 and y0 == y1:
+            # Una sola celda: usarla directamente, sin copiar
+            return cells.get((x0, y0), {})
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return found
+
+    def query_rect(self, rect, exclude=None) -> list:
+        """Claves cuyos rects se solapan con `rect` (en orden de inserción en las celdas)"""
+        if not isinstance(rect, pygame.Rect):
+            rect = pygame.Rect(rect)
+        if not self._indexed:
+            return [key for key, _ in rect.collidedictall(self._rects, True) if key != exclude]
+        candidates = self._candidates(self._cell_range(rect.x, rect.y, rect.w, rect.h))
+        return [key for key, _ in rect.collidedictall(candidates, True) if key != exclude]
+
+    def query_key(self, key) -> list:
+        """Claves que se solapan con la entidad `key` (sin incluirla)"""
+        rect = self._rects.get(key)
+        if rect is None:
+            return []
+        candidates = self._candidates(self._ranges[key]) if self._indexed else self._rects
+        return [other for other, _ in rect.collidedictall(candidates, True) if other != key]
+
+    def query_circle(self, cx: float, cy: float, radius: float, exclude=None) -> list:
+        """Claves cuyos rects tocan el círculo de centro (cx, cy)"""
+        x0, y0 = int(cx - radius), int(cy - radius)
+        side = int(2 * radius) + 1
+        candidates = self._candidates(self._cell_range(x0, y0, side, side)) if self._indexed else self._rects
+        r2 = radius * radius
+        hits = []
+        box = pygame.Rect(x0, y0, side, side)
+        for key, rect in box.collidedictall(candidates, True):
+            if key == exclude:
+                continue
+            # Punto del rect más cercano al centro
+            nx = min(max(cx, rect.left), rect.right)
+            ny = min(max(cy, rect.top), rect.bottom)
+            dx = cx - nx
+            dy = cy - ny
+            if dx * dx + dy * dy <= r2:
+                hits.append(key)
+        return hits
+
+
+if __name__ == "__main__":
+    # Coste de colisiones por frame según el número de entidades: pares con colliderect vs índice.
+    # Escenario: 4 manos que se mueven, objetivos fijos y pelotas en movimiento; cada pelota se
+    # prueba contra manos y objetivos (como en el bucle por pares). El índice se mide con la
+    # prueba directa por debajo de `direct_max` (por defecto) y con la rejilla siempre activa.
+    import random
+    import time
+
+    rng = random.Random(0)
+    width, height = 640, 480
+    frames = 200
+
+    print(f"{'entidades':>9} {'pares':>10} {'índice':>10} {'rejilla':>10} {'círculo':>10}   (us/frame)")
+    for count in (8, 32, 128, 512, 2048):
+        hands = [[0.0, 0.0] for _ in range(4)]
+        hands_start = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in hands]
+        targets = [(rng.uniform(0, width), rng.uniform(0, height)) for _ in range((count - 4) // 2)]
+        initial = [(rng.uniform(0, width), rng.uniform(0, height), rng.uniform(-6, 6), rng.uniform(-6, 6))
+                   for _ in range(count - 4 - len(targets))]
+
+        def run(detect):
+            # El mejor de tres: la máquina no está quieta
+            return min(run_once(detect) for _ in range(3))
+
+        def run_once(detect):
+            balls = [list(b) for b in initial]
+            for h, start_pos in zip(hands, hands_start):
+                h[:] = start_pos
+            hits = 0
+            start = time.perf_counter()
+            for _ in range(frames):
+                for b in balls:
+                    b[0] = (b[0] + b[2]) % width
+                    b[1] = (b[1] + b[3]) % height
+                for h in hands:
+                    h[0] = (h[0] + 3) % width
+                hits += detect(balls)
+            return (time.perf_counter() - start) / frames * 1e6, hits
+
+        def pairwise(balls):
+            # rects nuevos en cada frame y colliderect de todos contra todos
+            others = [pygame.Rect(int(x) - 60, int(y) - 60, 120, 120) for x, y in hands]
+            others += [pygame.Rect(int(x) - 16, int(y) - 16, 32, 32) for x, y in targets]
+            hits = 0
+            for b in balls:
+                ball_rect = pygame.Rect(int(b[0]) - 32, int(b[1]) - 32, 65, 65)
+                for other in others:
+                    if ball_rect.colliderect(other):
+                        hits += 1
+            return hits
+
+        def indexed(grid):
+            for i, pos in enumerate(targets):
+                grid.update_center(("target", i), pos, 32)
+            probe = pygame.Rect(0, 0, 65, 65)
+
+            def with_grid(balls):
+                for i, pos in enumerate(hands):
+                    grid.update_center(("hand", i), pos, 120)
+                hits = 0
+                for b in balls:
+                    probe.update(int(b[0]) - 32, int(b[1]) - 32, 65, 65)
+                    hits += len(grid.query_rect(probe))
+                return hits
+
+            def with_circles(balls):
+                for i, pos in enumerate(hands):
+                    grid.update_center(("hand", i), pos, 120)
+                return sum(len(grid.query_circle(b[0], b[1], 32)) for b in balls)
+            return with_grid, with_circles
+
+        naive_us, naive_hits = run(pairwise)
+        auto, circles = indexed(SpatialGrid(width, height))
+        auto_us, auto_hits = run(auto)
+        circle_us, _ = run(circles)
+        cells, _ = indexed(SpatialGrid(width, height, direct_max=0))
+        cells_us, cells_hits = run(cells)
+        assert naive_hits == auto_hits == cells_hits, (naive_hits, auto_hits, cells_hits)
+        print(f"{count:>9} {naive_us:>10.1f} {auto_us:>10.1f} {cells_us:>10.1f} {circle_us:>10.1f}")
@@ -1,4 +1,23 @@
 # Entry point to run the hand detection game from the project root
 # Ensures package imports resolve correctly
+import time
 
-from Controler.hand_detection import *
+# Medir el arranque desde antes de cualquier import pesado
+_process_start = time.perf_counter()
+
+import argparse
+from Controler.hand_detection import main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hand Detection Game")
+    # Cada jugador guarda su propia calibración (y da nombre a su estación en el servidor)
+    parser.add_argument('player', nargs='?', default="default")
+    parser.add_argument('--server', nargs='?', const="default", metavar="DIRECCION",
+                        help="Usar el servidor de tracking compartido (python -m Controler.tracking_server)")
+    args = parser.parse_args()
+
+    server = args.server
+    if server == "default":
+        from Controler.tracking_server import DEFAULT_ADDRESS
+        server = DEFAULT_ADDRESS
+    main(process_start=_process_start, player=args.player, tracking_server=server)
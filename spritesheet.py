@@ -1,13 +1,80 @@
+import json
 import pygame
 
 class Spritesheet():
+    """
+    Recorta frames de un spritesheet sin duplicar memoria.
+
+    Los frames son `subsurface`: vistas que comparten los píxeles de la hoja,
+    así que cargar una animación no reserva memoria extra. Sólo se crea una
+    superficie nueva cuando se pide un escalado distinto de 1.
+    """
     def __init__(self, image):
         self.sheet = image
+        self._views = {}  # (x, y, w, h) -> subsurface ya creada
+
+    @classmethod
+    def load(cls, path):
+        return cls(pygame.image.load(path).convert_alpha())
+
+    def view(self, rect):
+        """Vista compartida de una región de la hoja"""
+        key = tuple(rect)
+        image = self._views.get(key)
+        if image is None:
+            image = self.sheet.subsurface(pygame.Rect(key))
+            self._views[key] = image
+        return image
+
+    def _prepare(self, image, scale, color):
+        if scale != 1:
+            w, h = image.get_size()
+            image = pygame.transform.scale(image, (int(w * scale), int(h * scale)))
+        # El colorkey sólo tiene sentido si la hoja no trae alfa por píxel
+        if color is not None and not image.get_flags() & pygame.SRCALPHA:
+            image.set_colorkey(color)
+        return image
 
 # Funcion para separar el spritesheet en frames individuales
-    def get_img(self, frame, width, height, scale, color):
-        image = pygame.Surface((width, height)).convert_alpha()
-        image.blit(self.sheet, (0, 0), ((frame*width), 0, width, height))
-        image = pygame.transform.scale(image, (width*scale, height*scale))
-        image.set_colorkey(color)
-        return image
\ No newline at end of file
+    def get_img(self, frame, width, height, scale=1, color=None):
+        """Frame `frame` de una tira horizontal"""
+        return self._prepare(self.view((frame*width, 0, width, height)), scale, color)
+
+    def grid(self, frame_width, frame_height, count=None, columns=None, margin=0, spacing=0, scale=1, color=None):
+        """Frames de una rejilla, leídos por filas (de izquierda a derecha, de arriba abajo)"""
+        sheet_w, sheet_h = self.sheet.get_size()
+        if columns is None:
+            columns = max(1, (sheet_w - 2 * margin + spacing) // (frame_width + spacing))
+        rows = max(1, (sheet_h - 2 * margin + spacing) // (frame_height + spacing))
+        if count is None:
+            count = columns * rows
+
+        frames = []
+        for i in range(count):
+            row, col = divmod(i, columns)
+            x = margin + col * (frame_width + spacing)
+            y = margin + row * (frame_height + spacing)
+            frames.append(self._prepare(self.view((x, y, frame_width, frame_height)), scale, color))
+        return frames
+
+    def atlas(self, data, scale=1, color=None):
+        """
+        Frames con nombre desde un atlas JSON (formato TexturePacker, hash o array).
+
+        - data: ruta al .json o el diccionario ya cargado
+        Devuelve {nombre: superficie}, en el orden del archivo.
+        """
+        if isinstance(data, str):
+            with open(data, encoding='utf-8') as f:
+                data = json.load(f)
+
+        entries = data.get('frames', data)
+        if isinstance(entries, dict):
+            entries = [dict(entry, filename=name) for name, entry in entries.items()]
+
+        frames = {}
+        for entry in entries:
+            r = entry.get('frame', entry)
+            rect = (r['x'], r['y'], r['w'], r['h'])
+            frames[entry['filename']] = self._prepare(self.view(rect), scale, color)
+        return frames
@@ -0,0 +1,136 @@
+import os
+import queue
+import threading
+import time
+
+import pygame
+
+from game_log import get_logger
+
+log = get_logger("audio")
+
+
+class AudioEngine:
+    """
+    Efectos y música reproducidos desde un hilo propio.
+
+    - Todos los efectos se decodifican a PCM una sola vez (en el pool del
+      ResourceManager) y cada uno tiene un canal reservado, así un sonido
+      largo nunca roba el canal de otro.
+    - El bucle del juego sólo llama a `post()`, que encola el evento y vuelve
+      de inmediato; el hilo de audio hace las llamadas al mixer.
+    - `buffer_size` controla el tamaño del buffer del mixer: más pequeño =
+      menos latencia entre la atrapada y el sonido (a costa de más CPU).
+    """
+
+    # evento -> (archivo, volumen)
+    EFFECTS = {
+        "catch": ("heart.ogg", 0.8),
+        "level_up": ("levelup.ogg", 1.0),
+        "game_over": ("gameover.ogg", 1.0),
+    }
+    MUSIC = {
+        "menu": ("title.ogg", 0.4),
+        "game": ("showtime.ogg", 0.5),
+    }
+
+    buffer_size = 512  # muestras; el valor efectivo se fija en pre_init()
+
+    @classmethod
+    def pre_init(cls, buffer_size: int = 512, frequency: int = 44100) -> None:
+        """Configurar el mixer; debe llamarse antes de pygame.init()"""
+        cls.buffer_size = buffer_size
+        pygame.mixer.pre_init(frequency=frequency, size=-16, channels=2, buffer=buffer_size)
+
+    def __init__(self, resources, audio_dir: str) -> None:
+        self.audio_dir = audio_dir
+        self.enabled = pygame.mixer.get_init() is not None
+        self._sounds: dict[str, pygame.mixer.Sound | None] = {}
+        self._channels: dict[str, pygame.mixer.Channel] = {}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._current_music = None
+
+        # Estadísticas de latencia (post -> llamada al mixer)
+        self.played = 0
+        self._dispatch_total = 0.0
+        self.dispatch_max_ms = 0.0
+        self.buffer_ms = 0.0
+
+        if not self.enabled:
+            log.warning("Mixer no disponible, el juego seguirá sin sonido")
+            return
+
+        frequency, _, _ = pygame.mixer.get_init()
+        self.buffer_ms = self.buffer_size / frequency * 1000
+
+        pygame.mixer.set_reserved(len(self.EFFECTS))
+        for i, name in enumerate(self.EFFECTS):
+            self._channels[name] = pygame.mixer.Channel(i)
+            resources.request_sound(name, self.EFFECTS[name][0])
+
+        self._resources = resources
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def post(self, event: str) -> None:
+        """Encolar un efecto ('catch', 'level_up', ...) o 'music:<nombre>' / 'music:stop'. No bloquea."""
+        if self.enabled:
+            self._queue.put((event, time.perf_counter()))
+
+    def _run(self) -> None:
+        # Decodificar todos los efectos antes de atender eventos
+        for name, (_, volume) in self.EFFECTS.items():
+            sound = self._resources.get_sound(name)
+            if sound is not None:
+                sound.set_volume(volume)
+            self._sounds[name] = sound
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            event, posted_at = item
+            try:
+                self._dispatch(event)
+            except pygame.error as e:
+                log.warning("Error de audio en '%s': %s", event, e)
+                continue
+            latency_ms = (time.perf_counter() - posted_at) * 1000
+            self.played += 1
+            self._dispatch_total += latency_ms
+            self.dispatch_max_ms = max(self.dispatch_max_ms, latency_ms)
+
+    def _dispatch(self, event: str) -> None:
+        if event.startswith("music:"):
+            name = event[len("music:"):]
+            if name == "stop":
+                pygame.mixer.music.stop()
+                self._current_music = None
+                return
+            filename, volume = self.MUSIC[name]
+            if self._current_music != name:
+                pygame.mixer.music.load(os.path.join(self.audio_dir, filename))
+                pygame.mixer.music.set_volume(volume)
+                self._current_music = name
+            pygame.mixer.music.play(-1)
+            return
+
+        sound = self._sounds.get(event)
+        if sound is not None:
+            self._channels[event].play(sound)
+
+    def stats(self) -> dict:
+        """Latencia del mixer: buffer teórico + despacho medido desde post()"""
+        return {
+            "buffer_ms": self.buffer_ms,
+            "dispatch_avg_ms": self._dispatch_total / self.played if self.played else 0.0,
+            "dispatch_max_ms": self.dispatch_max_ms,
+            "played": self.played,
+        }
+
+    def shutdown(self) -> None:
+        if not self.enabled:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=1.0)
+        pygame.mixer.music.stop()
@@ -7,41 +7,45 @@ class BallAnimation:
     """
     Maneja la animación de la pelota a partir de un spritesheet.
 
-    - spritesheet_path: ruta al archivo de spritesheet
+    - spritesheet: ruta al archivo de spritesheet o la superficie ya cargada
     - frame_width/height: tamaño de cada frame en el spritesheet
     - num_frames: cantidad de frames en el spritesheet (horizontal)
     - animation_speed: tiempo en ms entre frames
+    - colorkey: color transparente, sólo para hojas sin canal alfa
     """
 
     def __init__(
         self,
-        spritesheet_path: str,
+        spritesheet: str | pygame.Surface,
         frame_width: int = 132,
         frame_height: int = 125,
         num_frames: int = 15,
         animation_speed: int = 75,
         colorkey=(0, 0, 0),
     ) -> None:
-        # Cargar spritesheet
-        spritesheet_img = pygame.image.load(spritesheet_path).convert_alpha()
-        self.spritesheet = Spritesheet(spritesheet_img)
+        # Cargar spritesheet (o envolver la superficie que ya decodificó el ResourceManager)
+        if isinstance(spritesheet, pygame.Surface):
+            self.spritesheet = Spritesheet(spritesheet)
+        else:
+            self.spritesheet = Spritesheet.load(spritesheet)
 
-        # Armar lista de frames
-        self.frames: list[pygame.Surface] = []
-        for frame in range(num_frames):
-            self.frames.append(
-                self.spritesheet.get_img(frame, frame_width, frame_height, 1, colorkey)
-            )
+        # Armar lista de frames (vistas sobre la hoja, sin copiar píxeles)
+        self.frames: list[pygame.Surface] = self.spritesheet.grid(
+            frame_width, frame_height, count=num_frames, color=colorkey
+        )
 
         self.current_frame = 0
         self.last_update = pygame.time.get_ticks()
         self.animation_speed = animation_speed
 
-    def update(self) -> None:
-        current_time = pygame.time.get_ticks()
+    def update(self, now: int | None = None) -> bool:
+        """Avanzar la animación (now en ms del reloj del juego); devuelve True si cambió el frame"""
+        current_time = pygame.time.get_ticks() if now is None else now
         if current_time - self.last_update >= self.animation_speed:
             self.current_frame = (self.current_frame + 1) % len(self.frames)
             self.last_update = current_time
+            return True
+        return False
 
     def draw(self, surface: pygame.Surface, x: int, y: int) -> None:
         surface.blit(self.frames[self.current_frame], (x, y))
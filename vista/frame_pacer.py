@@ -0,0 +1,146 @@
+import time
+from collections import deque
+
+import numpy as np
+
+
+class _PaceStats:
+    """Intervalos entre frames y plazos perdidos de un estado"""
+    def __init__(self, window):
+        self.intervals = deque(maxlen=window)  # ms entre salidas de wait()
+        self.frames = 0
+        self.missed = 0
+
+
+class FramePacer:
+    """
+    Ritmo de frames con plazos de perf_counter.
+
+    Sustituye a pygame.time.Clock.tick(): en vez de dormir "lo que falte"
+    desde el último frame (y heredar el grano de 1-15 ms de las esperas del
+    sistema), cada frame tiene un plazo absoluto (`deadline += periodo`). Se
+    duerme hasta `spin_ms` antes del plazo y el resto se espera en un bucle
+    activo, que es preciso al microsegundo. Si un frame llega tarde se
+    cuenta como plazo perdido; si llega más de un periodo tarde, o cambia la
+    frecuencia, el plazo se reancla en vez de encadenar frames a destiempo.
+
+    Con vsync el propio flip espera al refresco: si la frecuencia pedida es
+    la de la pantalla no se espera nada, y si es menor (30 en un monitor de
+    60 Hz) se despierta medio refresco antes para caer en el vblank correcto.
+    """
+    def __init__(self, spin_ms=1.5, vsync=False, refresh_hz=None, window=600):
+        self.spin_ms = spin_ms
+        self.vsync = vsync
+        self.refresh_hz = refresh_hz
+        self.window = window
+        self._deadline = None
+        self._period = None
+        self._last = None
+        self.by_state = {}
+
+    def reset(self):
+        """Olvidar el plazo (p. ej. tras una pausa larga o un cambio de ventana)"""
+        self._deadline = None
+        self._last = None
+
+    def wait(self, rate, spin_ms=None, state=""):
+        """Esperar al plazo del frame actual a `rate` FPS; devuelve el intervalo en ms"""
+        spin = (self.spin_ms if spin_ms is None else spin_ms) / 1000
+        period = 1.0 / rate
+        now = time.perf_counter()
+        if self._deadline is None or period != self._period:
+            self._deadline = now + period
+            self._period = period
+        else:
+            self._deadline += period
+
+        target = self._deadline
+        if self.vsync and self.refresh_hz:
+            # El flip ya espera al vblank: basta con no adelantarse a él
+            target -= 0.5 / self.refresh_hz if rate < self.refresh_hz else period
+        remaining = target - now
+        stats = self.by_state.get(state)
+        if stats is None:
+            stats = self.by_state[state] = _PaceStats(self.window)
+
+        if remaining < 0:
+            if not (self.vsync and rate >= (self.refresh_hz or rate)):
+                stats.missed += 1
+            if remaining < -period:
+                self._deadline = now
+        else:
+            if remaining > spin:
+                time.sleep(remaining - spin)
+            while time.perf_counter() < target:
+                pass
+
+        end = time.perf_counter()
+        interval = (end - self._last) * 1000 if self._last is not None else None
+        self._last = end
+        stats.frames += 1
+        if interval is not None:
+            stats.intervals.append(interval)
+        return interval
+
+    def stats(self, state=None):
+        """{estado: {frames, fallos, p50/p95/p99 del intervalo y jitter en ms}}; o sólo el de `state`"""
+        result = {}
+        for name, s in self.by_state.items():
+            if state is not None and name != state:
+                continue
+            entry = {'frames': s.frames, 'missed': s.missed}
+            if s.intervals:
+                intervals = np.fromiter(s.intervals, dtype=np.float64)
+                p50, p95, p99 = np.percentile(intervals, (50, 95, 99))
+                entry.update(p50_ms=float(p50), p95_ms=float(p95), p99_ms=float(p99),
+                             jitter_ms=float(np.mean(np.abs(intervals - np.median(intervals)))))
+            result[name] = entry
+        return result if state is None else result.get(state)
+
+
+def refresh_rate(default=None):
+    """Frecuencia de la pantalla principal (Hz) si SDL la conoce"""
+    import pygame
+    try:
+        rates = pygame.display.get_desktop_refresh_rates()
+    except (AttributeError, pygame.error):
+        return default
+    return rates[0] if rates and rates[0] else default
+
+
+def bench(rate=60, seconds=3.0, spin_ms=1.5):
+    """Comparar FramePacer con pygame.time.Clock.tick() sin ventana (frames vacíos)"""
+    import pygame
+    results = {}
+    clock = pygame.time.Clock()
+    intervals = []
+    last = time.perf_counter()
+    for _ in range(int(rate * seconds)):
+        clock.tick(rate)
+        now = time.perf_counter()
+        intervals.append((now - last) * 1000)
+        last = now
+    intervals = np.array(intervals[1:])
+    results['Clock.tick'] = {'p50_ms': float(np.percentile(intervals, 50)),
+                             'p99_ms': float(np.percentile(intervals, 99)),
+                             'jitter_ms': float(np.mean(np.abs(intervals - np.median(intervals))))}
+
+    pacer = FramePacer(spin_ms=spin_ms)
+    for _ in range(int(rate * seconds)):
+        pacer.wait(rate, state="bench")
+    results['FramePacer'] = pacer.stats("bench")
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compara el ritmo de frames de FramePacer y Clock.tick()")
+    parser.add_argument('--rate', type=int, default=60)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--spin-ms', type=float, default=1.5)
+    args = parser.parse_args()
+
+    for name, r in bench(args.rate, args.seconds, args.spin_ms).items():
+        print(f"{name:>11}: p50 {r['p50_ms']:.2f} ms | p99 {r['p99_ms']:.2f} ms | jitter {r['jitter_ms']:.3f} ms"
+              + (f" | plazos perdidos {r['missed']}" if 'missed' in r else ""))
@@ -0,0 +1,395 @@
+import pygame
+
+from modelo.replay_buffer import ReplayBuffer, ReplayFrame, frame_at
+
+
+class GameState:
+    """
+    Estado del juego con fases separadas.
+
+    - handle_action(): reacciona a acciones abstractas ('confirm', 'back',
+      'quit', 'toggle_rotation'); devuelve False para salir del juego. Sólo
+      'quit' (ESC) sale; 'back' (también el puño) navega dentro del juego.
+    - update(): lógica pura; no toca superficies y puede ejecutarse sin ventana.
+    - draw(): única fase que dibuja, sobre el canvas lógico.
+    """
+    name = ""
+    tick_rate = 60            # FPS objetivo mientras el estado está activo
+    frame_spin_ms = 1.5       # espera activa antes del plazo del frame (0 = sólo dormir, menos CPU)
+    allows_debug_keys = False  # F / 1 (fullscreen, hitboxes) sólo durante el juego
+    accepts_gestures = False   # acciones por gestos de la mano (Controler.gestures)
+
+    def __init__(self, machine) -> None:
+        self.machine = machine
+        self.logic = machine.logic
+
+    def enter(self, now: int) -> None:
+        pass
+
+    def handle_action(self, action: str, now: int) -> bool:
+        return action != "quit"
+
+    def update(self, now: int, right_pos=None, left_pos=None) -> None:
+        pass
+
+    def draw(self, view, canvas: pygame.Surface, now: int, right_pos=None, left_pos=None) -> None:
+        pass
+
+
+class MenuState(GameState):
+    name = "menu"
+    frame_spin_ms = 0.0
+    accepts_gestures = True
+
+    def handle_action(self, action, now):
+        if action == "quit":
+            return False
+        if action == "confirm":
+            machine = self.machine
+            self.logic.reset_game(now)
+            machine.emit("start")
+            # comportamiento configurable: si está activada la pantalla de preparación,
+            # entrar en ella para que el jugador coloque las manos; si no, iniciar el juego
+            # inmediatamente (y opcionalmente auto-lanzar si está configurado).
+            if machine.enable_prep_screen:
+                # mientras esperamos, no auto-launch
+                self.logic.auto_launch_enabled = False
+                machine.change("prep", now)
+            else:
+                self.logic.auto_launch_enabled = bool(self.logic.enable_auto_launch)
+                machine.change("playing", now)
+                if self.logic.auto_launch_enabled and not self.logic.ball_launching and not self.logic.ball_moving:
+                    self.logic.launch_ball(now)
+        return True
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        # usar la versión desenfocada del fondo
+        canvas.blit(view.background_blur, (0, 0))
+        if view.menu_image is not None:
+            canvas.blit(view.menu_image, view.menu_image_rect.topleft)
+            instr_center = (view.width // 2, view.menu_image_rect.bottom + 24)
+        else:
+            # fallback textual
+            title = view.title_font.render("FUTBOL CAMARA", True, (255, 255, 255))
+            canvas.blit(title, title.get_rect(center=(view.width // 2, view.height // 2 - 40)).topleft)
+            instr_center = (view.width // 2, view.height // 2 + 40)
+        instr = view.menu_instr_font.render("ENTER o pinza: jugar  •  ESC: salir", True, (240, 240, 240))
+        canvas.blit(instr, instr.get_rect(center=instr_center).topleft)
+
+
+class PrepState(GameState):
+    """Pantalla de preparación: el jugador coloca las manos y pulsa ENTER"""
+    name = "prep"
+    accepts_gestures = True
+
+    def handle_action(self, action, now):
+        if action == "quit":
+            return False
+        if action == "confirm":
+            self.machine.change("countdown", now)
+        elif action == "back":
+            self.machine.change("menu", now)
+        return True
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        # La imagen se escala tipo "cover" al cargarla; sólo blitearla centrada
+        image, rect = view.prep_screen()
+        if image is not None:
+            canvas.blit(image, rect.topleft)
+        else:
+            canvas.blit(view.background_blur, (0, 0))
+            prompt = view.start_prompt_font.render("Pulsa ENTER (o haz la pinza) para iniciar", True, (240, 240, 240))
+            canvas.blit(prompt, prompt.get_rect(center=(view.width // 2, view.height // 2)).topleft)
+
+        # Calibración en curso: mostrar el área que ya alcanzó el jugador
+        if view.calibration_reach is not None:
+            x0, y0, x1, y1 = view.calibration_reach
+            pygame.draw.rect(canvas, (0, 220, 120), pygame.Rect(int(x0), int(y0), int(x1 - x0), int(y1 - y0)), 2)
+            hint = view.menu_instr_font.render("Lleva la mano a las esquinas que alcances", True, (0, 220, 120))
+            canvas.blit(hint, hint.get_rect(midbottom=(view.width // 2, view.height - 12)).topleft)
+
+
+class CountdownState(GameState):
+    """Cuenta regresiva (3..2..1..GO!) antes de la primera pelota"""
+    name = "countdown"
+
+    def __init__(self, machine) -> None:
+        super().__init__(machine)
+        self.start_time = 0
+
+    def enter(self, now):
+        self.start_time = now
+
+    def handle_action(self, action, now):
+        # Durante la cuenta regresiva sólo ESC hace algo
+        return action != "quit"
+
+    def update(self, now, right_pos=None, left_pos=None):
+        if now - self.start_time >= self.machine.countdown_seconds * 1000:
+            logic = self.logic
+            # activar auto-launch sólo si la opción está habilitada
+            logic.auto_launch_enabled = bool(logic.enable_auto_launch)
+            # lanzar la primera pelota automáticamente (si se habilitó auto-launch)
+            if logic.auto_launch_enabled and not logic.ball_launching and not logic.ball_moving:
+                logic.launch_ball(now)
+            # registrar tiempo del reset para controlar auto-launch posterior
+            logic._last_reset_time = now
+            self.machine.change("playing", now)
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        canvas.blit(view.background_blur, (0, 0))
+        remaining = self.machine.countdown_seconds - int((now - self.start_time) // 1000)
+        txt = str(remaining) if remaining > 0 else "GO!"
+        txt_surf = view.countdown_font.render(txt, True, (255, 220, 0))
+        txt_rect = txt_surf.get_rect(center=(view.width // 2, view.height // 2))
+        # fondo oscuro para el número
+        box_rect = pygame.Rect(0, 0, txt_rect.width + 40, txt_rect.height + 24)
+        box_rect.center = txt_rect.center
+        view.draw_shade(canvas, box_rect, 160)
+        canvas.blit(txt_surf, txt_rect.topleft)
+
+
+class SceneState(GameState):
+    """Base de los estados que dibujan el campo: pelota, guantes y marcador"""
+    allows_debug_keys = True
+
+    def update(self, now, right_pos=None, left_pos=None):
+        for event in self.logic.update(now, right_pos, left_pos):
+            self.machine.events.append(event)
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        logic = self.logic
+        canvas.blit(view.background, (0, 0))
+        view.draw_ball(canvas, logic)
+
+        # Guantes escalados según la profundidad de la mano (el hitbox usa la misma escala)
+        right_rect = logic.hand_rect_from_center(right_pos)
+        left_rect = logic.hand_rect_from_center(left_pos)
+        hand_scale = logic.hand_scale()
+        for label, rect in (("Right", right_rect), ("Left", left_rect)):
+            if rect is not None:
+                glove = view.glove_image(label, hand_scale)
+                canvas.blit(glove, glove.get_rect(center=rect.center).topleft)
+
+        if view.show_hitboxes:
+            recent_collision = (now - logic.last_collision_time) <= view.collision_flash_ms
+            box_color = (255, 0, 0) if recent_collision else (255, 255, 255)
+            for rect in (right_rect, left_rect, logic.ball_rect()):
+                if rect is not None:
+                    pygame.draw.rect(canvas, box_color, rect, 2)
+            if logic.ball_launching:
+                view.draw_trajectory(canvas, logic)
+
+        view.draw_hud(canvas, logic)
+
+
+class PlayingState(SceneState):
+    name = "playing"
+
+    def __init__(self, machine) -> None:
+        super().__init__(machine)
+        self._last_toggle_time = 0
+        self._toggle_cooldown_ms = 200
+
+    def handle_action(self, action, now):
+        if action == "quit":
+            return False
+        if action == "toggle_rotation":
+            # Toggle con debounce
+            if now - self._last_toggle_time >= self._toggle_cooldown_ms:
+                self.logic.ball_rotating = not self.logic.ball_rotating
+                self._last_toggle_time = now
+        elif action == "confirm":
+            # ENTER lanza la pelota a un objetivo aleatorio
+            if not self.logic.ball_launching and not self.logic.ball_moving:
+                self.logic.launch_ball(now)
+        elif action == "replay" and self.logic.between_throws() and len(self.machine.replay):
+            # Entre lanzamientos: repetir la última atrapada o fallo y volver a jugar
+            self.machine.change("replay", now)
+        return True
+
+    def update(self, now, right_pos=None, left_pos=None):
+        super().update(now, right_pos, left_pos)
+        if self.logic.game_over:
+            self.machine.change("game_over", now)
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        super().draw(view, canvas, now, right_pos, left_pos)
+        if self.logic.between_throws() and len(self.machine.replay):
+            hint = view.menu_instr_font.render("R: repetición", True, (240, 240, 240))
+            canvas.blit(hint, hint.get_rect(topright=(view.width - 12, 12)).topleft)
+
+
+class GameOverState(SceneState):
+    name = "game_over"
+    tick_rate = 30
+    frame_spin_ms = 0.0
+    accepts_gestures = True
+
+    def handle_action(self, action, now):
+        if action == "quit":
+            return False
+        if action == "confirm":
+            # reiniciar todo el estado del juego
+            self.logic.reset_game(now)
+            self.machine.replay.clear()
+            self.machine.emit("restart")
+            self.machine.change("playing", now)
+        elif action == "replay" and len(self.machine.replay):
+            self.machine.change("replay", now)
+        return True
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        super().draw(view, canvas, now, right_pos, left_pos)
+        # Semitransparencia sobre el canvas y la imagen de game over
+        view.draw_shade(canvas, canvas.get_rect(), 160)
+        image, rect = view.game_over_screen()
+        if image is not None:
+            canvas.blit(image, rect.topleft)
+            instr_center = (view.width // 2, rect.bottom + 24)
+        else:
+            # Texto grande centrado como fallback
+            go_text = view.game_over_font.render("GAME OVER", True, (255, 40, 40))
+            canvas.blit(go_text, go_text.get_rect(center=(view.width // 2, view.height // 2 - 20)).topleft)
+            instr_center = (view.width // 2, view.height // 2 + 40)
+        instr = view.game_over_instr_font.render("ENTER o pinza: reiniciar  •  R: repetición", True, (240, 240, 240))
+        canvas.blit(instr, instr.get_rect(center=instr_center).topleft)
+
+
+class ReplayState(GameState):
+    """
+    Repetición a cámara lenta de los últimos segundos (tecla R en game over o
+    entre lanzamientos); al terminar se vuelve al estado desde el que se pidió.
+
+    Se vuelve a dibujar el campo a partir de los registros del ReplayBuffer:
+    la velocidad es libre porque cada frame se interpola en su instante.
+    """
+    name = "replay"
+    accepts_gestures = True
+    seconds = 4.0   # segundos repetidos (los últimos antes de pedir la repetición)
+    speed = 0.35    # 1.0 = tiempo real
+
+    def __init__(self, machine) -> None:
+        super().__init__(machine)
+        self.records = None
+        self.start_time = 0
+        self.return_to = "game_over"
+        self.frame = ReplayFrame(machine.logic)
+
+    def enter(self, now):
+        self.records = self.machine.replay.snapshot(self.seconds)
+        self.start_time = now
+        self.return_to = self.machine.previous
+
+    def _finish(self, now):
+        if self.return_to == "playing":
+            # El reloj siguió corriendo: no auto-lanzar nada más volver
+            self.logic.wait_before_launch(now)
+        self.machine.change(self.return_to, now)
+
+    def _replay_time(self, now):
+        return int(self.records['t'][0]) + (now - self.start_time) * self.speed
+
+    def handle_action(self, action, now):
+        # Aquí ESC también vuelve (al juego o al game over) en vez de salir
+        if action in ("confirm", "back", "quit", "replay"):
+            self._finish(now)
+        return True
+
+    def update(self, now, right_pos=None, left_pos=None):
+        if self._replay_time(now) > int(self.records['t'][-1]):
+            self._finish(now)
+
+    def draw(self, view, canvas, now, right_pos=None, left_pos=None):
+        frame = frame_at(self.records, self._replay_time(now), self.frame)
+        canvas.blit(view.background, (0, 0))
+        view.set_ball_frame(frame.anim)
+        view.draw_ball(canvas, frame, animate=False)
+        for label, pos in (("Right", frame.right), ("Left", frame.left)):
+            if pos is not None:
+                glove = view.glove_image(label, frame.hand_scale)
+                canvas.blit(glove, glove.get_rect(center=pos).topleft)
+        view.draw_hud(canvas, frame)
+        label = view.menu_instr_font.render(f"REPETICIÓN x{self.speed:g}", True, (255, 220, 0))
+        canvas.blit(label, label.get_rect(topright=(view.width - 12, 12)).topleft)
+
+
+class GameStateMachine:
+    """
+    Máquina de estados del juego.
+
+    El renderer llama a handle_action() por cada tecla, update() una vez por
+    frame y draw() sólo cuando hay pantalla; una simulación puede llamar
+    únicamente a update(). Los eventos del tick (de la lógica y de las
+    transiciones: 'start', 'restart', 'state') se recogen con drain_events().
+    """
+    STATES = (MenuState, PrepState, CountdownState, PlayingState, GameOverState, ReplayState)
+
+    def __init__(self, logic, enable_prep_screen: bool = True, countdown_seconds: int = 3,
+                 replay: ReplayBuffer | None = None) -> None:
+        self.logic = logic
+        # Últimos segundos de "playing" (los graba el renderer) para ReplayState
+        self.replay = replay if replay is not None else ReplayBuffer()
+        self.enable_prep_screen = enable_prep_screen
+        self.countdown_seconds = countdown_seconds
+        self.events: list = []
+        self.states = {cls.name: cls(self) for cls in self.STATES}
+        self.state = self.states["menu"]
+        self.previous = "menu"  # estado anterior al último cambio
+
+    @property
+    def tick_rate(self) -> int:
+        return self.state.tick_rate
+
+    def emit(self, event: str, **data) -> None:
+        self.events.append((event, data))
+
+    def change(self, name: str, now: int) -> None:
+        self.previous = self.state.name
+        self.state = self.states[name]
+        self.state.enter(now)
+        self.emit("state", name=name)
+
+    def handle_action(self, action: str, now: int) -> bool:
+        keep_running = self.state.handle_action(action, now)
+        # Acciones como lanzar la pelota generan eventos fuera de update()
+        self.events.extend(self.logic.drain_events())
+        return keep_running
+
+    def update(self, now: int, right_pos=None, left_pos=None) -> None:
+        self.state.update(now, right_pos, left_pos)
+
+    def draw(self, view, canvas: pygame.Surface, now: int, right_pos=None, left_pos=None) -> None:
+        self.state.draw(view, canvas, now, right_pos, left_pos)
+
+    def drain_events(self) -> list:
+        events = self.events
+        self.events = []
+        return events
+
+
+if __name__ == "__main__":
+    # Fase de actualización sin ventana: menú -> juego -> game over -> reinicio, a máxima velocidad
+    import random
+    import time
+    from modelo.game_logic import GameLogic
+
+    rng = random.Random(0)
+    logic = GameLogic(rng=rng)
+    machine = GameStateMachine(logic, enable_prep_screen=True, countdown_seconds=3)
+
+    ticks = 200_000
+    now = 0
+    games = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        now += 16  # ~60 FPS de tiempo virtual
+        if machine.state.name != "playing":
+            # En menú/preparación/game over, "pulsar" ENTER
+            machine.handle_action("confirm", now)
+        # Mano que sigue la pelota con ruido: atrapa algunas y falla otras
+        hand = (logic.ball_x + logic.ball_w / 2 + rng.gauss(0, 150), logic.ball_y + logic.ball_h / 2 + rng.gauss(0, 150))
+        machine.update(now, hand, None)
+        games += sum(1 for event, _ in machine.drain_events() if event == "game_over")
+    elapsed = time.perf_counter() - start
+    print(f"{ticks} ticks en {elapsed:.2f}s ({ticks / elapsed:,.0f} ticks/s), {games} partidas completas")
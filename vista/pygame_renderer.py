@@ -1,9 +1,38 @@
 import os
-import math
-import random
+import time
 import pygame
 
 from vista.ball_animation import BallAnimation 
+from vista.resource_manager import ResourceManager
+from vista.audio_engine import AudioEngine
+from vista.game_states import GameStateMachine
+from vista.frame_pacer import FramePacer, refresh_rate
+from vista.video_recorder import VideoRecorder, clip_path
+from modelo.game_logic import GameLogic
+from modelo.session_store import SessionStore
+from game_log import get_logger, set_frame
+from game_clock import MonotonicClock
+from game_profiler import set_tag, start_from_env, start_profiling, stop_profiling
+
+log = get_logger("renderer")
+
+
+# Teclas -> acciones abstractas de la máquina de estados
+KEY_ACTIONS = {
+    pygame.K_ESCAPE: "quit",
+    pygame.K_RETURN: "confirm",
+    pygame.K_KP_ENTER: "confirm",
+    pygame.K_2: "toggle_rotation",
+    pygame.K_KP2: "toggle_rotation",
+    pygame.K_f: "fullscreen",
+    pygame.K_1: "toggle_hitboxes",
+    pygame.K_KP1: "toggle_hitboxes",
+    pygame.K_F9: "profile",
+    pygame.K_F10: "record",
+    pygame.K_r: "replay",
+}
+# Acciones que sólo afectan a la presentación (no pasan por la lógica)
+VIEW_ACTIONS = ("fullscreen", "toggle_hitboxes")
 
 
 class PygameRenderer:
@@ -11,150 +40,125 @@ class PygameRenderer:
                  enable_prep_screen: bool = True,
                  enable_auto_launch: bool = True,
                  auto_launch_delay_ms: int = 700,
-                 countdown_seconds: int = 3):
+                 countdown_seconds: int = 3,
+                 audio_buffer: int = 512,
+                 stats_path: str | None = None,
+                 clock=None,
+                 vsync: bool = False):
+        startup_start = time.perf_counter()
+        # Buffer del mixer: valores bajos (256-512) dan sonido inmediato al atrapar
+        AudioEngine.pre_init(buffer_size=audio_buffer)
         pygame.init()
-        pygame.mixer.init()
-        self.width = camera_width
-        self.height = camera_height
-
-        # Carga de la música de fondo
         try:
-            music_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "audio", "showtime.ogg"))
-            pygame.mixer.music.load(music_path)
-            pygame.mixer.music.set_volume(0.5)  # Se ajusta el volumen (0.0 a 1.0)
+            pygame.mixer.init()
         except pygame.error as e:
-            print(f"Warning: No se pudo cargar el archivo de música en {music_path}: {e}")
-
-        # Carga del sonido de game over
-        try:
-            game_over_sound_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "audio", "gameover.ogg"))
-            self.game_over_sound = pygame.mixer.Sound(game_over_sound_path)
-            self.game_over_sound.set_volume(1.0)
-        except pygame.error as e:
-            print(f"Warning: No se pudo cargar el sonido de game over en {game_over_sound_path}: {e}")
-            self.game_over_sound = None
+            log.warning("No se pudo inicializar el audio: %s", e)
+        self.width = camera_width
+        self.height = camera_height
+        self.hand_w, self.hand_h = 120, 120
 
-        # Carga del sonido de level up
-        try:
-            level_up_sound_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "audio", "levelup.ogg"))
-            self.level_up_sound = pygame.mixer.Sound(level_up_sound_path)
-            self.level_up_sound.set_volume(1.0)
-        except pygame.error as e:
-            print(f"Warning: No se pudo cargar el sonido de level up en {level_up_sound_path}: {e}")
-            self.level_up_sound = None
+        # Rutas de recursos (asumiendo que la estructura de directorios funciona)
+        images_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "Images"))
+        audio_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "audio"))
+
+        # Decodificar y escalar assets en paralelo mientras se abre la ventana.
+        # Sólo se piden los del menú/juego; game over y preparación se cargan bajo demanda.
+        self.resources = ResourceManager(images_dir, audio_dir)
+        self.resources.request("background", "background.jpg", (self.width, self.height), smooth=False, alpha=False)
+        self.resources.request("background_blur", "background.jpg", (self.width, self.height),
+                               smooth=False, blur=0.06, alpha=False)
+        self.resources.request("right_hand", "right_hand.png", (self.hand_w, self.hand_h))
+        self.resources.request("left_hand", "left_hand.png", (self.hand_w, self.hand_h))
+        self.resources.request("menu", "menu.png", (self.width, self.height), mode="fit", fit=0.95)
+        self.resources.request("ball_sheet", "spritesheet_pelota.png")
+
+        # Estadísticas persistentes por lanzamiento (escritas por lotes en otro hilo)
+        if stats_path is None:
+            stats_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "session_stats.db"))
+        self.stats = SessionStore(stats_path)
+
+        # Efectos pre-decodificados y música, reproducidos desde el hilo de audio
+        self.audio = AudioEngine(self.resources, audio_dir)
+        self.audio.post("music:menu")
 
         # Ventana inicial en modo ventana
         self.is_fullscreen = False
-        try:
-            self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.SCALED)
-        except Exception:
-            self.screen = pygame.display.set_mode((self.width, self.height))
+        self.vsync = vsync
+        self.pacer = FramePacer()
+        self._set_windowed_mode()
         pygame.display.set_caption(title)
         self._compute_fullscreen_scaler()
 
         self.canvas = pygame.Surface((self.width, self.height)).convert_alpha()
-        self.clock = pygame.time.Clock()
-
-        # Rutas de recursos (asumiendo que la estructura de directorios funciona)
-        images_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "Images"))
-
-        # --- Carga de recursos (omitiendo la carga real si faltan archivos) ---
-        # Se asume que estos archivos existen en la ruta relativa.
-        # Fondo
-        bg_path = os.path.join(images_dir, "background.jpg")
-        self.background = pygame.Surface((self.width, self.height))
-        self.background.fill((10, 50, 80)) # Color de fondo temporal si no existe la imagen
-        try:
-             self.background = pygame.image.load(bg_path).convert()
-             self.background = pygame.transform.scale(self.background, (self.width, self.height))
-        except pygame.error:
-            print(f"Warning: Background image not found at {bg_path}")
-        
-        # Crear y cachear una versión desenfocada del fondo
-        try:
-            blur_scale = 0.06
-            sw = max(1, int(self.width * blur_scale))
-            sh = max(1, int(self.height * blur_scale))
-            small = pygame.transform.smoothscale(self.background, (sw, sh))
-            self.background_blur = pygame.transform.smoothscale(small, (self.width, self.height))
-        except Exception:
-            # si algo falla, usar copia normal
+        # Reloj del juego (game_clock): tiempos de lanzamiento, countdown y animación.
+        # Si se comparte con el tracker, quien lo crea hace tick() una vez por frame.
+        self._owns_game_clock = clock is None
+        self.game_clock = clock if clock is not None else MonotonicClock()
+
+        # Fondo (color temporal si no existe la imagen)
+        self.background = self.resources.get("background")
+        if self.background is None:
+            log.warning("Background image not found in %s", images_dir)
+            self.background = pygame.Surface((self.width, self.height))
+            self.background.fill((10, 50, 80))
+
+        # Versión desenfocada del fondo (si algo falla, usar copia normal)
+        self.background_blur = self.resources.get("background_blur")
+        if self.background_blur is None:
             self.background_blur = self.background.copy()
 
         # Manos (usamos un rectángulo gris como fallback si faltan las imágenes)
-        self.hand_w, self.hand_h = 120, 120
         hand_fallback = pygame.Surface((self.hand_w, self.hand_h), pygame.SRCALPHA)
         hand_fallback.fill((128, 128, 128, 150))
-        self.right_hand_img = hand_fallback
-        self.left_hand_img = hand_fallback
-        try:
-            rh_path = os.path.join(images_dir, "right_hand.png")
-            lh_path = os.path.join(images_dir, "left_hand.png")
-            self.right_hand_img = pygame.image.load(rh_path).convert_alpha()
-            self.left_hand_img = pygame.image.load(lh_path).convert_alpha()
-            self.right_hand_img = pygame.transform.smoothscale(self.right_hand_img, (self.hand_w, self.hand_h))
-            self.left_hand_img = pygame.transform.smoothscale(self.left_hand_img, (self.hand_w, self.hand_h))
-        except pygame.error:
-            print("Warning: Hand images not found, using fallback.")
-
-        # Animación de pelota
-        sprite_path = os.path.join(images_dir, "spritesheet_pelota.png")
-        # Usamos un dummy si BallAnimation no está disponible
-        try:
-             self.ball_animation = BallAnimation(sprite_path)
-        except NameError:
-             print("Error: BallAnimation class not found. Using dummy surface.")
+        self.right_hand_img = self.resources.get("right_hand")
+        self.left_hand_img = self.resources.get("left_hand")
+        if self.right_hand_img is None or self.left_hand_img is None:
+            log.warning("Hand images not found, using fallback.")
+            self.right_hand_img = hand_fallback
+            self.left_hand_img = hand_fallback
+
+        # Animación de pelota: la hoja llega decodificada del pool; dummy si no se pudo cargar
+        ball_sheet = self.resources.get("ball_sheet")
+        if ball_sheet is not None:
+             self.ball_animation = BallAnimation(ball_sheet)
+        else:
+             log.error("Ball spritesheet not found in %s. Using dummy surface.", images_dir)
              class DummyBallAnimation:
-                def update(self): pass
+                animation_speed = 75
+                def update(self, now=None): return False
                 def draw(self, surf, x, y): 
                     surf.fill((255, 100, 0)) # Pelota naranja de fallback
              self.ball_animation = DummyBallAnimation()
+        self.ball_animation.last_update = self.game_clock.ticks_ms
         
-        self.ball_w, self.ball_h = 132, 125
-        self.ball_x = (self.width - self.ball_w) // 2
-        self.ball_y = self.height - self.ball_h - 210  # Posición del portero
-        self._ball_surface = pygame.Surface((self.ball_w, self.ball_h), pygame.SRCALPHA)
+        # Reglas del juego (sin pantalla) y máquina de estados menú -> preparación -> countdown -> juego
+        self.logic = GameLogic(self.width, self.height,
+                               enable_auto_launch=enable_auto_launch,
+                               auto_launch_delay_ms=auto_launch_delay_ms)
+        self.logic.hand_hitbox_size = max(1, int(max(self.hand_w, self.hand_h)))
+        self.logic.glove_width = self.hand_w
+        self.machine = GameStateMachine(self.logic, enable_prep_screen=enable_prep_screen,
+                                        countdown_seconds=countdown_seconds)
+        self.enable_prep_screen = enable_prep_screen
 
-        # hitboxes
-        self.hand_hitbox_size = max(1, int(max(self.hand_w, self.hand_h)))
-        self.ball_hitbox_size = 65
+        # Superficie temporal reutilizada para componer la pelota (sólo se recompone al cambiar de frame)
+        self._ball_surface = pygame.Surface((self.logic.ball_w, self.logic.ball_h), pygame.SRCALPHA)
+        self._ball_surface_dirty = True
 
         self.show_hitboxes = False
-        self.last_collision_time = 0
+        self.recorder = None  # VideoRecorder mientras se graba un clip (F10)
+        self._closing_clips = []  # clips parados que aún se están terminando de codificar
+        # Área alcanzada durante la calibración (x0, y0, x1, y1), dibujada en la preparación
+        self.calibration_reach = None
         self.collision_flash_ms = 400
-        self.collision_hand = None
-        self.ball_rotating = False
-        self.ball_angle = 0.0
-        self.ball_rotation_speed = 6.0
         self._rotation_cache = {}
         self._rotation_cache_step = 5
-
-        # Compatibilidad de estado de atrapado
-        self.ball_caught = False
-        self.caught_by = None
-        self._last_toggle_time = 0
-        self._toggle_cooldown_ms = 200
-
-        # --- NUEVAS VARIABLES PARA EL SISTEMA DE ARQUERÍA MEJORADO ---
-        self.ball_moving = False
-        self.ball_launching = False
-        self.ball_target_x = 0
-        self.ball_target_y = 0
-        
-        # Tiempo constante de viaje (2 segundos)
-        self.ball_travel_time = 2000  # ms
-        self.ball_launch_start_time = 0
-        
-        # Control de trayectoria curva
-        self.curve_strength = 0.0
-        self.curve_direction = 0
-        self.control_point_x = 0
-        self.control_point_y = 0
-        
-        # Sistema de puntuación
-        self.score = 0
-        self.misses = 0
-        self.max_misses = 3
+        self._rotation_cache_max = 128  # con paso 1 serían 360 superficies: se descarta la más antigua
+        self.fullscreen_smooth = True  # smoothscale (mejor) o scale (más barato) al presentar en fullscreen
+        self._shades = {}  # alpha -> superficie negra semitransparente reutilizable
+        # Guantes escalados por profundidad, cuantizados a pasos de 0.05: (mano, paso) -> superficie
+        self._glove_cache = {}
+        self._glove_scale_step = 0.05
 
         # --- Configuración visual del marcador ---
         # Posición del número de goles (coordenada midleft en el canvas lógico)
@@ -166,100 +170,60 @@ class PygameRenderer:
         self.miss_icon_spacing = 8
         # Color de las X
         self.miss_icon_color = (230, 40, 40)
-        
-        # Escalado progresivo - INICIA PEQUEÑA (0.2)
-        self.ball_scale = 0.2  # CAMBIADO: ahora inicia pequeña
-        self._move_start_x = self.ball_x + self.ball_w/2
-        self._move_start_y = self.ball_y + self.ball_h/2
-        
-        # Definición de límites (sin cambio)
-        self.ball_half_w = self.ball_w // 2
-        self.ball_half_h = self.ball_h // 2
-        
-        self._move_target_left = self.ball_half_w
-        self._move_target_right = self.width - self.ball_half_w
-        self._move_target_top = self.ball_half_h
-        self._move_target_bottom = self.height - self.ball_half_h
 
-        # --- Game over: cargar imagen y fuentes ---
-        self.game_over = False
-        self.game_over_image = None
+        # --- Fuentes (creadas una vez, no en cada frame) ---
+        self.hud_font = pygame.font.Font(None, 36)
+        self.title_font = pygame.font.Font(None, 96)
+        self.countdown_font = pygame.font.Font(None, 140)
+        self.menu_instr_font = pygame.font.Font(None, 28)
+        self.start_prompt_font = pygame.font.Font(None, 40)
         self.game_over_instr_font = pygame.font.Font(None, 20)
         self.game_over_font = pygame.font.Font(None, 72)
-        try:
-            go_path = os.path.join(images_dir, "game_over.png")  # coloca la imagen guardada como Images/game_over.png
-            img = pygame.image.load(go_path).convert_alpha()
-            # Escalar para que encaje en la ventana manteniendo aspecto (95% del área disponible)
-            iw, ih = img.get_size()
-            if iw == 0 or ih == 0:
-                raise Exception("invalid image size")
-            fit_scale = min(self.width / iw, self.height / ih) * 0.95
-            new_w = max(1, int(iw * fit_scale))
-            new_h = max(1, int(ih * fit_scale))
-            self.game_over_image = pygame.transform.smoothscale(img, (new_w, new_h))
-            # guardar rect centrado para usar en render()
-            self.game_over_image_rect = self.game_over_image.get_rect(center=(self.width // 2, self.height // 2))
-        except Exception:
-             # si no existe la imagen, se usará texto grande
-            self.game_over_image = None
-            self.game_over_image_rect = None
-
-        # --- Menu inicial ---
-        self.show_menu = True
-        self.menu_image = None
-        self.menu_image_rect = None
-        self.menu_instr_font = pygame.font.Font(None, 28)
-        try:
-            menu_path = os.path.join(images_dir, "menu.png")
-            mimg = pygame.image.load(menu_path).convert_alpha()
-            mw, mh = mimg.get_size()
-            if mw == 0 or mh == 0:
-                raise Exception("invalid menu image")
-            menu_scale = min(self.width / mw, self.height / mh) * 0.95
-            mw2 = max(1, int(mw * menu_scale))
-            mh2 = max(1, int(mh * menu_scale))
-            self.menu_image = pygame.transform.smoothscale(mimg, (mw2, mh2))
-            self.menu_image_rect = self.menu_image.get_rect(center=(self.width // 2, self.height // 2))
-        except Exception:
-            self.menu_image = None
-            self.menu_image_rect = None
 
-        # --- Imagen para pantalla de preparación ---
+        # --- Imágenes por estado: el menú ya está pedido; preparación y game over bajo demanda ---
+        self.menu_image, self.menu_image_rect = self._state_image("menu")
         self.prep_image = None
         self.prep_image_rect = None
-        try:
-            prep_path = os.path.join(images_dir, "prep_screen.png")  # Images/prep_screen.png
-            pimg = pygame.image.load(prep_path).convert_alpha()
-            iw, ih = pimg.get_size()
-            if iw == 0 or ih == 0:
-                raise Exception("invalid prep image")
+        self.game_over_image = None
+        self.game_over_image_rect = None
+
+        # Instante (perf_counter) del último flip: permite medir la latencia captura -> pantalla
+        self.last_present_time = time.perf_counter()
+        self.frame = 0  # frames presentados (se añade a cada línea del registro)
+
+        self.startup_ms = (time.perf_counter() - startup_start) * 1000
+        log.info("Renderer listo en %.0f ms", self.startup_ms,
+                 extra={'fields': {'cache_hits': self.resources.cache_hits,
+                                   'cache_misses': self.resources.cache_misses}})
+        # JUEGO_PROFILE=<segundos>: perfilar desde el arranque (kioscos sin teclado)
+        profiler = start_from_env(on_done=self._profile_done)
+        if profiler is not None:
+            log.info("Perfilando %.0f s desde el arranque", profiler.seconds)
+
+    def _state_image(self, name):
+        """Imagen centrada de un estado; si aún se está cargando, espera a que termine"""
+        image = self.resources.get(name)
+        if image is None:
+            return None, None
+        return image, image.get_rect(center=(self.width // 2, self.height // 2))
+
+    def _prefetch_state_images(self):
+        """Pedir en segundo plano las imágenes de preparación y game over"""
+        if self.enable_prep_screen:
             # Escalado "cover": cubrir toda la ventana, mantener aspect ratio (puede recortar)
-            scale = max(self.width / iw, self.height / ih)
-            new_w = max(1, int(iw * scale))
-            new_h = max(1, int(ih * scale))
-            self.prep_image = pygame.transform.smoothscale(pimg, (new_w, new_h))
-            # rect centrado; al cubrir la pantalla puede quedar mayor en una dimensión
-            self.prep_image_rect = self.prep_image.get_rect(center=(self.width // 2, self.height // 2))
-        except Exception:
-            # si la imagen falta, dejamos None (fallback mostrará fondo desenfocado con texto)
-            self.prep_image = None
-            self.prep_image_rect = None
-
-        # --- Pantalla de preparación / countdown ---
-        self.waiting_start = False
-        self.countdown_active = False
-        self.countdown_start_time = 0
-        # configurable
-        self.countdown_seconds = countdown_seconds
-        self.start_prompt_font = pygame.font.Font(None, 40)
+            self.resources.request("prep", "prep_screen.png", (self.width, self.height), mode="cover")
+        # Escalar para que encaje en la ventana manteniendo aspecto (95% del área disponible)
+        self.resources.request("game_over", "game_over.png", (self.width, self.height), mode="fit", fit=0.95)
 
-        # Auto-launch tras el primer inicio: cuando True se lanza automáticamente después de cada reset
-        # flags configurables (no rompen compatibilidad: valores por defecto mantienen comportamiento nuevo)
-        self.enable_prep_screen = enable_prep_screen
-        self.enable_auto_launch = enable_auto_launch
-        self.auto_launch_enabled = False
-        self.auto_launch_delay_ms = auto_launch_delay_ms
-        self._last_reset_time = pygame.time.get_ticks()
+    def prep_screen(self):
+        if self.prep_image is None:
+            self.prep_image, self.prep_image_rect = self._state_image("prep")
+        return self.prep_image, self.prep_image_rect
+
+    def game_over_screen(self):
+        if self.game_over_image is None:
+            self.game_over_image, self.game_over_image_rect = self._state_image("game_over")
+        return self.game_over_image, self.game_over_image_rect
 
     def _compute_fullscreen_scaler(self):
         # sin cambio
@@ -282,575 +246,312 @@ class PygameRenderer:
         self.is_fullscreen = not self.is_fullscreen
         if self.is_fullscreen:
             self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN | pygame.DOUBLEBUF)
+            self.pacer.vsync = False
         else:
+            self._set_windowed_mode()
+        self.pacer.reset()
+        self._compute_fullscreen_scaler()
+
+    def _set_windowed_mode(self):
+        # vsync sólo lo admite SDL con SCALED; si no se concede, el pacer marca el ritmo solo
+        try:
+            self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.SCALED,
+                                                  vsync=int(self.vsync))
+            self.pacer.vsync = self.vsync
+        except Exception:
             try:
                 self.screen = pygame.display.set_mode((self.width, self.height), pygame.DOUBLEBUF | pygame.SCALED)
             except Exception:
                 self.screen = pygame.display.set_mode((self.width, self.height))
-        self._compute_fullscreen_scaler()
-
-    def _generate_target_position(self):
-        """Genera posición objetivo con preferencia por esquinas y bordes"""
-        # Áreas preferentes (esquinas y bordes)
-        corner_weight = 0.6  # 60% de probabilidad para esquinas
-        edge_weight = 0.3    # 30% para bordes
-        center_weight = 0.1  # 10% para centro
-        
-        choice = random.random()
-        
-        if choice < corner_weight:
-            # Esquina
-            corner = random.choice([0, 1, 2, 3])  # 0: sup-izq, 1: sup-der, 2: inf-izq, 3: inf-der
-            if corner == 0:  # Superior izquierda
-                return (random.randint(50, self.width//4), random.randint(50, self.height//4))
-            elif corner == 1:  # Superior derecha
-                return (random.randint(self.width*3//4, self.width-50), random.randint(50, self.height//4))
-            elif corner == 2:  # Inferior izquierda
-                return (random.randint(50, self.width//4), random.randint(self.height*3//4, self.height-50))
-            else:  # Inferior derecha
-                return (random.randint(self.width*3//4, self.width-50), random.randint(self.height*3//4, self.height-50))
-        
-        elif choice < corner_weight + edge_weight:
-            # Borde
-            edge = random.choice([0, 1, 2, 3])  # 0: superior, 1: inferior, 2: izquierdo, 3: derecho
-            if edge == 0:  # Superior
-                return (random.randint(self.width//4, self.width*3//4), random.randint(30, self.height//6))
-            elif edge == 1:  # Inferior
-                return (random.randint(self.width//4, self.width*3//4), random.randint(self.height*5//6, self.height-30))
-            elif edge == 2:  # Izquierdo
-                return (random.randint(30, self.width//6), random.randint(self.height//4, self.height*3//4))
-            else:  # Derecho
-                return (random.randint(self.width*5//6, self.width-30), random.randint(self.height//4, self.height*3//4))
-        
-        else:
-            # Centro (menos probable)
-            return (random.randint(self.width//3, self.width*2//3), random.randint(self.height//3, self.height*2//3))
-
-    def _calculate_bezier_point(self, t, start_x, start_y, control_x, control_y, end_x, end_y):
-        """Calcula punto en curva Bézier cuadrática"""
-        u = 1 - t
-        tt = t * t
-        uu = u * u
-        
-        x = uu * start_x + 2 * u * t * control_x + tt * end_x
-        y = uu * start_y + 2 * u * t * control_y + tt * end_y
-        
-        return x, y
-
-    def _generate_curve_parameters(self, start_x, start_y, end_x, end_y):
-        """Genera parámetros para trayectoria curva"""
-        # Determinar si habrá curva (70% de probabilidad)
-        if random.random() < 0.7:
-            curve_strength = random.uniform(0.2, 0.8)
-            curve_direction = random.choice([-1, 1])
-            
-            # Punto de control para la curva Bézier
-            mid_x = (start_x + end_x) / 2
-            mid_y = (start_y + end_y) / 2
-            
-            # Desplazamiento perpendicular
-            dx = end_x - start_x
-            dy = end_y - start_y
-            length = max(1, math.sqrt(dx*dx + dy*dy))
-            
-            # Vector perpendicular normalizado
-            perp_x = -dy / length
-            perp_y = dx / length
-            
-            # Aplicar curva
-            curve_distance = length * curve_strength * 0.5
-            control_x = mid_x + perp_x * curve_distance * curve_direction
-            control_y = mid_y + perp_y * curve_distance * curve_direction
-            
-            return curve_strength, curve_direction, control_x, control_y
-        else:
-            # Trayectoria recta
-            return 0.0, 0, 0, 0
-
-    def _launch_ball_to_random_target(self):
-        """Lanza la pelota a una posición aleatoria con tiempo constante"""
-        if self.ball_launching or self.ball_caught or self.game_over:
-            return
-        
-        # Posición inicial
-        self.ball_x = (self.width - self.ball_w) // 2
-        self.ball_y = self.height - self.ball_h - 210 # Posición del que patea
-        start_x = self.ball_x + self.ball_w/2
-        start_y = self.ball_y + self.ball_h/2
-        
-        # Generar posición objetivo con preferencia por esquinas
-        self.ball_target_x, self.ball_target_y = self._generate_target_position()
-        
-        # Generar parámetros de curva
-        (self.curve_strength, self.curve_direction, 
-         self.control_point_x, self.control_point_y) = self._generate_curve_parameters(
-            start_x, start_y, self.ball_target_x, self.ball_target_y
-        )
-        
-        # Configurar estado de lanzamiento
-        self.ball_launching = True
-        self.ball_moving = True
-        self.ball_rotating = True
-        self.ball_scale = 0.2  # Comienza pequeña (igual que al inicio)
-        self.ball_launch_start_time = pygame.time.get_ticks()
-        
-        print(f"¡Pelota lanzada hacia ({self.ball_target_x}, {self.ball_target_y})!")
-        if self.curve_strength > 0:
-            print(f"Trayectoria curva: fuerza {self.curve_strength:.2f}")
-
-    def _reset_ball_position(self):
-        """Resetea la pelota a la posición inicial DEL PORTERO"""
-        self.ball_launching = False
-        self.ball_moving = False
-        self.ball_x = (self.width - self.ball_w) // 2
-        self.ball_y = self.height - self.ball_h - 210
-        self.ball_scale = 0.2
-        self.ball_caught = False
-        self.caught_by = None
-        self.curve_strength = 0.0
-        # marcar tiempo del reset para posible auto-launch
-        self._last_reset_time = pygame.time.get_ticks()
-
-    def _check_ball_catch(self, hand_rect, ball_rect):
-        """Verifica si se atrapó la pelota (solo cuando tiene escala 1.0)"""
-        if self.ball_scale >= 0.95 and hand_rect.colliderect(ball_rect):
-            return True
-        return False
-
-    # helpers de hitbox (sin cambio)
-    def _hand_rect_from_center(self, center_pos):
-        if center_pos is None:
-            return None
-        cx, cy = int(center_pos[0]), int(center_pos[1])
-        size = int(self.hand_hitbox_size)
-        rect = pygame.Rect(0, 0, size, size)
-        rect.center = (cx, cy)
-        return rect
-
-    def _ball_rect(self):
-        size = int(self.ball_hitbox_size)
-        cx = int(self.ball_x + self.ball_w / 2)
-        cy = int(self.ball_y + self.ball_h / 2)
-        rect = pygame.Rect(0, 0, size, size)
-        rect.center = (cx, cy)
-        return rect
-
-    def _handle_collision(self, hand_name, hand_rect, ball_rect):
-        # sin cambio
-        now = pygame.time.get_ticks()
-        self.last_collision_time = now
-        self.collision_hand = hand_name
-
-    def render(self, right_pos=None, left_pos=None) -> bool:
-        # Eventos (MODIFICADO para nuevo sistema)
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            if event.type == pygame.KEYDOWN:
-                # cuando estamos en menú, ENTER pasa a pantalla de preparación (configurable); ESC sale
-                if self.show_menu:
-                    if event.key == pygame.K_ESCAPE:
-                        return False
-                    if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
-                        # Iniciar música al salir del menú
-                        pygame.mixer.music.play(-1)
-                        # comportamiento configurable: si está activada la pantalla de preparación,
-                        # entrar en waiting_start para que el jugador coloque las manos; si no,
-                        # iniciar el juego inmediatamente (y opcionalmente auto-lanzar si está configurado).
-                        self.show_menu = False
-                        # reiniciar estado base
-                        self.score = 0
-                        self.misses = 0
-                        self.game_over = False
-                        self._reset_ball_position()
-                        if self.enable_prep_screen:
-                            self.waiting_start = True
-                            # mientras esperamos, no auto-launch
-                            self.auto_launch_enabled = False
-                            print("Ir a pantalla 'Pulsa ENTER para iniciar'.")
-                        else:
-                            # iniciar juego inmediatamente
-                            self.waiting_start = False
-                            # activar auto-launch sólo si la opción está habilitada
-                            self.auto_launch_enabled = bool(self.enable_auto_launch)
-                            print("Juego iniciado (inicio inmediato, sin pantalla de preparación).")
-                            # si se desea auto-lanzar al empezar y está habilitado, lanzar ahora
-                            if self.auto_launch_enabled and not self.ball_launching and not self.ball_moving:
-                                self._launch_ball_to_random_target()
-                    # ignorar el resto de teclas mientras esté el menú
-                    continue
-                
-                # Si estamos en la pantalla de preparación ("Pulsa ENTER para iniciar")
-                if self.waiting_start and not self.countdown_active:
-                    if event.key == pygame.K_ESCAPE:
-                        return False
-                    if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
-                        # iniciar la cuenta regresiva
-                        self.countdown_active = True
-                        self.countdown_start_time = pygame.time.get_ticks()
-                        print("Cuenta regresiva iniciada.")
-                    # ignorar otras teclas en este estado
-                    continue
-
-                # Si la cuenta regresiva está activa, sólo ESC puede salir
-                if self.countdown_active:
-                    if event.key == pygame.K_ESCAPE:
-                        return False
-                    # ignorar otras teclas durante countdown
-                    continue
-                
-                if event.key == pygame.K_ESCAPE:
-                    return False
-                if event.key == pygame.K_f:
-                    self._toggle_fullscreen()
-                if event.key == pygame.K_1 or event.key == pygame.K_KP1:
-                    self.show_hitboxes = not self.show_hitboxes
-                # Toggle con debounce para tecla '2' (sin cambio)
-                if event.key == pygame.K_2 or event.key == pygame.K_KP2:
-                    now = pygame.time.get_ticks()
-                    if now - self._last_toggle_time >= self._toggle_cooldown_ms:
-                        self.ball_rotating = not self.ball_rotating
-                        self._last_toggle_time = now
-                        print(f"[DEBUG] ball_rotating -> {self.ball_rotating}")
-                
-                # Tecla 'Enter' LANZA la pelota a objetivo aleatorio (MODIFICADO)
-                if event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER:
-                    # si estamos en game over -> reiniciar; si no, lanzar
-                    if self.game_over:
-                        # reiniciar todo el estado del juego
-                        self.score = 0
-                        self.misses = 0
-                        self.game_over = False
-                        self._reset_ball_position()
-                        # Reiniciar música
-                        pygame.mixer.music.play(-1)
-                        print("Juego reiniciado (Enter).")
-                    else:
-                        if not self.ball_launching and not self.ball_moving:
-                            self._launch_ball_to_random_target()
-
-        # Si estamos en el menú, dibujar y devolver sin ejecutar la lógica del juego
-        if self.show_menu:
-            # dibujar fondo y menú centrado
-            # usar la versión desenfocada si está disponible
-            if getattr(self, "background_blur", None) is not None:
-                self.canvas.blit(self.background_blur, (0, 0))
-            else:
-                self.canvas.blit(self.background, (0, 0))
-            if self.menu_image is not None:
-                self.canvas.blit(self.menu_image, self.menu_image_rect.topleft)
-                instr = self.menu_instr_font.render("Pulsa ENTER para jugar  •  ESC para salir", True, (240, 240, 240))
-                instr_rect = instr.get_rect(center=(self.width // 2, self.menu_image_rect.bottom + 24))
-                self.canvas.blit(instr, instr_rect.topleft)
-            else:
-                # fallback textual
-                title_font = pygame.font.Font(None, 96)
-                title = title_font.render("FUTBOL CAMARA", True, (255, 255, 255))
-                t_rect = title.get_rect(center=(self.width // 2, self.height // 2 - 40))
-                self.canvas.blit(title, t_rect.topleft)
-                instr = self.menu_instr_font.render("Pulsa ENTER para jugar  •  ESC para salir", True, (240, 240, 240))
-                instr_rect = instr.get_rect(center=(self.width // 2, self.height // 2 + 40))
-                self.canvas.blit(instr, instr_rect.topleft)
-
-            # Presentación y retorno temprano
-            if self.is_fullscreen:
-                scaled = pygame.transform.smoothscale(self.canvas, self.scaled_size)
-                self.screen.fill((0, 0, 0))
-                self.screen.blit(scaled, (self.offset_x, self.offset_y))
-            else:
-                self.screen.blit(self.canvas, (0, 0))
-            pygame.display.flip()
-            self.clock.tick(60)
-            return True
-
-        # Pantalla de preparación (esperando que el jugador coloque las manos)
-        if self.waiting_start and not self.countdown_active:
-            # Mostrar la imagen de preparación escalada para llenar la ventana.
-            if self.prep_image is not None:
-                # La imagen ya fue escalada en __init__ tipo "cover"; sólo blitearla centrada
-                self.canvas.blit(self.prep_image, self.prep_image_rect.topleft)
-
-
-            # Presentación y retorno temprano
-            if self.is_fullscreen:
-                scaled = pygame.transform.smoothscale(self.canvas, self.scaled_size)
-                self.screen.fill((0, 0, 0))
-                self.screen.blit(scaled, (self.offset_x, self.offset_y))
-            else:
-                self.screen.blit(self.canvas, (0, 0))
-            pygame.display.flip()
-            self.clock.tick(60)
-            return True
-
-        # Pantalla de countdown (3..2..1)
-        now = pygame.time.get_ticks()
-        if self.countdown_active:
-            # Dibujar fondo desenfocado
-            if getattr(self, "background_blur", None) is not None:
-                self.canvas.blit(self.background_blur, (0, 0))
-            else:
-                self.canvas.blit(self.background, (0, 0))
-            elapsed = now - self.countdown_start_time
-            idx = int(elapsed // 1000)
-            remaining = self.countdown_seconds - idx
-            if remaining > 0:
-                txt = str(remaining)
-            else:
-                txt = "GO!"
-            big_font = pygame.font.Font(None, 140)
-            txt_surf = big_font.render(txt, True, (255, 220, 0))
-            txt_rect = txt_surf.get_rect(center=(self.width // 2, self.height // 2))
-            # fondo oscuro para el número
-            box = pygame.Surface((txt_rect.width + 40, txt_rect.height + 24), pygame.SRCALPHA)
-            box.fill((0, 0, 0, 160))
-            box_rect = box.get_rect(center=txt_rect.center)
-            self.canvas.blit(box, box_rect.topleft)
-            self.canvas.blit(txt_surf, txt_rect.topleft)
-            pygame.display.flip()
-
-            # terminar countdown
-            if elapsed >= (self.countdown_seconds * 1000):
-                self.countdown_active = False
-                self.waiting_start = False
-                # activar auto-launch sólo si la opción está habilitada
-                self.auto_launch_enabled = bool(self.enable_auto_launch)
-                # lanzar la primera pelota automáticamente (si se habilitó auto-launch)
-                if self.auto_launch_enabled and not self.ball_launching and not self.ball_moving:
-                    self._launch_ball_to_random_target()
-                # registrar tiempo del reset para controlar auto-launch posterior
-                self._last_reset_time = pygame.time.get_ticks()
-            self.clock.tick(60)
-            return True
-
-        # Actualizar movimiento con tiempo constante y trayectoria curva (COMPLETAMENTE MODIFICADO)
-        if self.ball_moving and self.ball_launching:
-            if not self.ball_rotating:
-                # Si la pelota deja de rotar, detener desplazamiento
-                self.ball_moving = False
-                self.ball_launching = False
-            else:
-                current_time = pygame.time.get_ticks()
-                elapsed_time = current_time - self.ball_launch_start_time
-                progress = min(1.0, elapsed_time / self.ball_travel_time)
-                
-                start_x = self._move_start_x
-                start_y = self._move_start_y
-                
-                if self.curve_strength > 0:
-                    # Trayectoria curva (Bézier)
-                    new_x, new_y = self._calculate_bezier_point(
-                        progress, start_x, start_y, 
-                        self.control_point_x, self.control_point_y,
-                        self.ball_target_x, self.ball_target_y
-                    )
-                else:
-                    # Trayectoria recta
-                    new_x = start_x + (self.ball_target_x - start_x) * progress
-                    new_y = start_y + (self.ball_target_y - start_y) * progress
-                
-                # Actualizar posición de la pelota (centro)
-                self.ball_x = new_x - self.ball_w/2
-                self.ball_y = new_y - self.ball_h/2
-                
-                # Escalar la pelota basado en el progreso
-                start_scale = 0.2
-                target_scale = 1.0
-                self.ball_scale = start_scale + (target_scale - start_scale) * progress
-                
-                # Verificar si llegó al objetivo
-                if progress >= 1.0:
-                    self.ball_launching = False
-                    self.ball_moving = False
-                    self.misses += 1
-                    print(f"¡Fallaste! Llevas {self.misses}/{self.max_misses} fallos")
-                    self._reset_ball_position()  # Esto la reseteará a escala 0.2
-                    
-                    # Verificar si se perdió el juego -> activar game over
-                    if self.misses >= self.max_misses:
-                        self.game_over = True
-                        pygame.mixer.music.stop()
-                        if self.game_over_sound:
-                            self.game_over_sound.play()
-                        print("¡Juego terminado! Has perdido.")
-
-        # Dibujar sobre el canvas lógico (sin cambio)
-        self.canvas.blit(self.background, (0, 0))
-
-        # Pelota animada (sin cambio)
-        if self.ball_rotating:
-            self.ball_animation.update()
-
-        # Reutilizar superficie temporal para la pelota (sin cambio)
-        self._ball_surface.fill((0, 0, 0, 0))
-        self.ball_animation.draw(self._ball_surface, 0, 0)
-
-        # Centro según tamaño base (sin cambio)
-        cx = int(self.ball_x + self.ball_w / 2)
-        cy = int(self.ball_y + self.ball_h / 2)
-
-        # Dibujar pelota con rotación y escalado (sin cambio en la lógica de dibujo)
-        if self.ball_rotating:
-            self.ball_angle = (self.ball_angle + self.ball_rotation_speed) % 360
-            if abs(self.ball_scale - 1.0) < 1e-6:
+            self.pacer.vsync = False
+        if self.pacer.vsync and self.pacer.refresh_hz is None:
+            self.pacer.refresh_hz = refresh_rate()
+
+    # --- Ajustes de calidad (los mueve el gobernador de calidad) ---
+    def set_fullscreen_smooth(self, smooth: bool) -> None:
+        self.fullscreen_smooth = smooth
+
+    def set_ball_animation_speed(self, ms: int) -> None:
+        """Milisegundos entre frames del spritesheet de la pelota"""
+        self.ball_animation.animation_speed = ms
+
+    # --- Helpers de dibujo usados por los estados ---
+    def glove_image(self, label: str, scale: float) -> pygame.Surface:
+        """Sprite del guante a la escala de profundidad (cacheado por escala cuantizada)"""
+        base = self.right_hand_img if label == "Right" else self.left_hand_img
+        step = int(round(scale / self._glove_scale_step))
+        if step * self._glove_scale_step == 1.0:
+            return base
+        key = (label, step)
+        image = self._glove_cache.get(key)
+        if image is None:
+            size = (max(1, int(self.hand_w * step * self._glove_scale_step)),
+                    max(1, int(self.hand_h * step * self._glove_scale_step)))
+            image = pygame.transform.smoothscale(base, size)
+            self._glove_cache[key] = image
+        return image
+
+    def draw_shade(self, canvas, rect, alpha):
+        """Oscurecer una región del canvas con negro semitransparente"""
+        shade = self._shades.get(alpha)
+        if shade is None:
+            shade = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            shade.fill((0, 0, 0, alpha))
+            self._shades[alpha] = shade
+        canvas.blit(shade, rect.topleft, pygame.Rect(0, 0, rect.width, rect.height))
+
+    def set_ball_frame(self, index: int) -> None:
+        """Fijar el frame del spritesheet de la pelota (repeticiones)"""
+        if index != self.ball_animation.current_frame:
+            self.ball_animation.current_frame = index
+            self._ball_surface_dirty = True
+
+    def draw_ball(self, canvas, logic, animate: bool = True):
+        """Pelota animada con rotación y escalado (animate=False: no avanzar la animación)"""
+        if animate and logic.ball_rotating and self.ball_animation.update(self.game_clock.ticks_ms):
+            self._ball_surface_dirty = True
+
+        # Reutilizar superficie temporal para la pelota
+        if self._ball_surface_dirty:
+            self._ball_surface.fill((0, 0, 0, 0))
+            self.ball_animation.draw(self._ball_surface, 0, 0)
+            self._ball_surface_dirty = False
+
+        # Centro según tamaño base
+        cx = int(logic.ball_x + logic.ball_w / 2)
+        cy = int(logic.ball_y + logic.ball_h / 2)
+
+        if logic.ball_rotating:
+            if abs(logic.ball_scale - 1.0) < 1e-6:
                 step = self._rotation_cache_step
-                angle_q = int(round(self.ball_angle / step)) * step
+                angle_q = int(round(logic.ball_angle / step)) * step
                 rotated = self._rotation_cache.get(angle_q)
                 if rotated is None:
                     rotated = pygame.transform.rotate(self._ball_surface, angle_q)
+                    if len(self._rotation_cache) >= self._rotation_cache_max:
+                        del self._rotation_cache[next(iter(self._rotation_cache))]
                     self._rotation_cache[angle_q] = rotated
             else:
-                rotated = pygame.transform.rotozoom(self._ball_surface, self.ball_angle, self.ball_scale)
-            rect = rotated.get_rect(center=(cx, cy))
-            self.canvas.blit(rotated, rect.topleft)
+                rotated = pygame.transform.rotozoom(self._ball_surface, logic.ball_angle, logic.ball_scale)
+            canvas.blit(rotated, rotated.get_rect(center=(cx, cy)).topleft)
+        elif logic.ball_scale != 1.0:
+            size = (int(logic.ball_w * logic.ball_scale), int(logic.ball_h * logic.ball_scale))
+            scaled = pygame.transform.scale(self._ball_surface, size)
+            canvas.blit(scaled, scaled.get_rect(center=(cx, cy)).topleft)
         else:
-            if self.ball_scale != 1.0:
-                scaled = pygame.transform.scale(self._ball_surface, (int(self.ball_w * self.ball_scale), int(self.ball_h * self.ball_scale)))
-                rect = scaled.get_rect(center=(cx, cy))
-                self.canvas.blit(scaled, rect.topleft)
-            else:
-                self.canvas.blit(self._ball_surface, (self.ball_x, self.ball_y))
-
-        # Preparar hitboxes (sin cambio)
-        right_rect = self._hand_rect_from_center(right_pos)
-        left_rect = self._hand_rect_from_center(left_pos)
-        ball_rect = self._ball_rect()
-
-        # Manos (sin cambio)
-        if right_rect is not None:
-            self.canvas.blit(self.right_hand_img, right_rect.topleft)
-        if left_rect is not None:
-            self.canvas.blit(self.left_hand_img, left_rect.topleft)
-
-        # Colisiones - SOLO cuando la pelota está en escala completa (MODIFICADO)
-        collided = False
-        if not self.game_over:
-            if right_rect is not None and self._check_ball_catch(right_rect, ball_rect):
-                self._handle_collision("Right", right_rect, ball_rect)
-                collided = True
-                self.score += 1
-                if self.score > 0 and self.score % 5 == 0 and self.level_up_sound:
-                    self.level_up_sound.play()
-                print(f"¡Atrapado con mano derecha! Puntuación: {self.score}")
-                self._reset_ball_position()  # Esto la reseteará a escala 0.2
-                
-            elif left_rect is not None and self._check_ball_catch(left_rect, ball_rect):
-                self._handle_collision("Left", left_rect, ball_rect)
-                collided = True
-                self.score += 1
-                if self.score > 0 and self.score % 5 == 0 and self.level_up_sound:
-                    self.level_up_sound.play()
-                print(f"¡Atrapado con mano izquierda! Puntuación: {self.score}")
-                self._reset_ball_position()  # Esto la reseteará a escala 0.2
-
-        # Mostrar hitboxes si corresponde (sin cambio)
-        if self.show_hitboxes:
-            now = pygame.time.get_ticks()
-            recent_collision = (now - self.last_collision_time) <= self.collision_flash_ms
-            box_color = (255, 0, 0) if recent_collision else (255, 255, 255)
-            if right_rect is not None:
-                pygame.draw.rect(self.canvas, box_color, right_rect, 2)
-            if left_rect is not None:
-                pygame.draw.rect(self.canvas, box_color, left_rect, 2)
-            pygame.draw.rect(self.canvas, box_color, ball_rect, 2)
-
-        # Mostrar información de puntuación
-        font = pygame.font.Font(None, 36)
-        # dibujar goles (número)
-        score_text = font.render(str(self.score), True, (255, 255, 255))
-        score_rect = score_text.get_rect(midleft=self.score_pos)
-        self.canvas.blit(score_text, score_rect.topleft)
-
-        # dibujar derrotas como X rojas verticales a la derecha del marcador
+            canvas.blit(self._ball_surface, (logic.ball_x, logic.ball_y))
+
+    def draw_hud(self, canvas, logic):
+        """Marcador: goles como número y derrotas como X rojas verticales"""
+        score_text = self.hud_font.render(str(logic.score), True, (255, 255, 255))
+        canvas.blit(score_text, score_text.get_rect(midleft=self.score_pos).topleft)
+
         icon_x, icon_y = self.misses_icons_origin
         size = self.miss_icon_size
         gap = self.miss_icon_spacing
-        for i in range(self.max_misses):
-            y = icon_y + i * (size + gap)
-            rect = pygame.Rect(icon_x, y, size, size)
-            # sólo dibujar X si ese índice corresponde a un fallo ya ocurrido
-            if i < self.misses:
-                c = self.miss_icon_color
-                # dibujar X con 3px de grosor
-                pygame.draw.line(self.canvas, c, rect.topleft, rect.bottomright, 3)
-                pygame.draw.line(self.canvas, c, (rect.left, rect.bottom), (rect.right, rect.top), 3)
-            # si no hay fallo todavía, no dibujamos nada (espacio oculto)
-
-        # Mostrar indicador de trayectoria (DEBUG - opcional)
-        if self.ball_launching and self.show_hitboxes:
-            # Dibujar línea de trayectoria
-            start_pos = (int(self._move_start_x), int(self._move_start_y))
-            end_pos = (int(self.ball_target_x), int(self.ball_target_y))
-            if self.curve_strength > 0:
-                # Dibujar curva Bézier
-                points = []
-                for t in range(0, 101, 5):
-                    progress = t / 100.0
-                    x, y = self._calculate_bezier_point(
-                        progress, self._move_start_x, self._move_start_y,
-                        self.control_point_x, self.control_point_y,
-                        self.ball_target_x, self.ball_target_y
-                    )
-                    points.append((int(x), int(y)))
-                if len(points) > 1:
-                    pygame.draw.lines(self.canvas, (0, 255, 0), False, points, 1)
-            else:
-                pygame.draw.line(self.canvas, (0, 255, 0), start_pos, end_pos, 1)
+        # sólo se dibujan las X de fallos ya ocurridos (el resto queda como espacio oculto)
+        for i in range(min(logic.misses, logic.max_misses)):
+            rect = pygame.Rect(icon_x, icon_y + i * (size + gap), size, size)
+            c = self.miss_icon_color
+            # dibujar X con 3px de grosor
+            pygame.draw.line(canvas, c, rect.topleft, rect.bottomright, 3)
+            pygame.draw.line(canvas, c, (rect.left, rect.bottom), (rect.right, rect.top), 3)
+
+    def draw_trajectory(self, canvas, logic):
+        """Indicador de trayectoria (DEBUG, visible con las hitboxes)"""
+        start_pos = (int(logic._move_start_x), int(logic._move_start_y))
+        end_pos = (int(logic.ball_target_x), int(logic.ball_target_y))
+        if logic.curve_strength > 0:
+            points = []
+            for t in range(0, 101, 5):
+                x, y = logic.calculate_bezier_point(
+                    t / 100.0, logic._move_start_x, logic._move_start_y,
+                    logic.control_point_x, logic.control_point_y,
+                    logic.ball_target_x, logic.ball_target_y
+                )
+                points.append((int(x), int(y)))
+            pygame.draw.lines(canvas, (0, 255, 0), False, points, 1)
+        else:
+            pygame.draw.line(canvas, (0, 255, 0), start_pos, end_pos, 1)
 
-        # Presentación (sin cambio)
+    def _present(self):
+        """Copiar el canvas lógico a la ventana (escalado en fullscreen) y hacer flip"""
         if self.is_fullscreen:
-            scaled = pygame.transform.smoothscale(self.canvas, self.scaled_size)
+            scale = pygame.transform.smoothscale if self.fullscreen_smooth else pygame.transform.scale
+            scaled = scale(self.canvas, self.scaled_size)
             self.screen.fill((0, 0, 0))
             self.screen.blit(scaled, (self.offset_x, self.offset_y))
         else:
             self.screen.blit(self.canvas, (0, 0))
+        pygame.display.flip()
+        self.last_present_time = time.perf_counter()
+
+    def _handle_game_events(self, events):
+        """Efectos de presentación (sonido, assets, consola) de los eventos del tick"""
+        for name, data in events:
+            self.stats.record(name, data, self.logic.score, self.logic.misses)
+            if name == "start":
+                self._prefetch_state_images()
+                # Iniciar música al salir del menú
+                self.audio.post("music:game")
+            elif name == "restart":
+                self.audio.post("music:game")
+                log.info("Juego reiniciado (Enter).")
+            elif name == "state":
+                if data["name"] == "prep":
+                    log.info("Ir a pantalla 'Pulsa ENTER para iniciar'.")
+                elif data["name"] == "countdown":
+                    log.info("Cuenta regresiva iniciada.")
+                elif data["name"] == "playing":
+                    # la imagen de preparación ya no se usa: liberar su memoria
+                    self.resources.release("prep")
+                    self.prep_image = None
+                    self.prep_image_rect = None
+            elif name == "launch":
+                log.info("¡Pelota lanzada!", extra={'fields': {
+                    'target': data["target"], 'region': data["region"],
+                    'curva': round(data["curve_strength"], 2)}})
+            elif name == "catch":
+                self.audio.post("catch")
+                hand = "derecha" if data["hand"] == "Right" else "izquierda"
+                log.info("¡Atrapado con mano %s! Puntuación: %d", hand, data["score"],
+                         extra={'fields': {'reaccion_ms': data["reaction_ms"]}})
+            elif name == "level_up":
+                self.audio.post("level_up")
+            elif name == "miss":
+                log.info("¡Fallaste! Llevas %d/%d fallos", data["misses"], self.logic.max_misses,
+                         extra={'fields': {'target': data["target"], 'region': data["region"]}})
+            elif name == "game_over":
+                self.audio.post("music:stop")
+                self.audio.post("game_over")
+                log.info("¡Juego terminado! Has perdido.")
+                # Récord que mantiene el hilo escritor (sin consultar SQLite aquí); la
+                # partida actual aún puede estar en su cola
+                log.info("Récord histórico: %d", max(self.stats.best_score, data["score"]))
+
+    def render(self, right_pos=None, left_pos=None, actions=(), hand_depth=None) -> bool:
+        """
+        Un frame completo.
+
+        - actions: acciones de gestos ('confirm', 'back', ...)
+        - hand_depth: escala de profundidad de la mano activa (1.0 = referencia; None = sin dato)
+        """
+        if self._owns_game_clock:
+            self.game_clock.tick()
+        now = self.game_clock.ticks_ms
+        self.frame += 1
+        set_frame(self.frame)
+        set_tag('state', self.machine.state.name)
+        set_tag('stage', 'render')
+
+        # Eventos -> acciones de la máquina de estados
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type != pygame.KEYDOWN:
+                continue
+            action = KEY_ACTIONS.get(event.key)
+            if action is None:
+                continue
+            if action == "profile":
+                self._start_profiling()
+                continue
+            if action == "record":
+                if self.recorder is None:
+                    self.start_recording()
+                else:
+                    self.stop_recording()
+                continue
+            if action in VIEW_ACTIONS:
+                if self.machine.state.allows_debug_keys:
+                    if action == "fullscreen":
+                        self._toggle_fullscreen()
+                    else:
+                        self.show_hitboxes = not self.show_hitboxes
+                continue
+            if not self.machine.handle_action(action, now):
+                return False
 
-        # Si estamos en estado de game over, dibujar overlay con la imagen y pedir ENTER para reiniciar
-        if self.game_over:
-            # Semitransparencia sobre el canvas
-            overlay = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 160))
-            self.canvas.blit(overlay, (0, 0))
-
-            if self.game_over_image is not None:
-                iw, ih = self.game_over_image.get_size()
-                go_x = (self.width - iw) // 2
-                go_y = (self.height - ih) // 2
-                self.canvas.blit(self.game_over_image, (go_x, go_y))
-                instr = self.game_over_instr_font.render("Pulsa ENTER para reiniciar", True, (240, 240, 240))
-                instr_rect = instr.get_rect(center=(self.width//2, go_y + ih + 24))
-                self.canvas.blit(instr, instr_rect.topleft)
-            else:
-                # Texto grande centrado como fallback
-                go_text = self.game_over_font.render("GAME OVER", True, (255, 40, 40))
-                g_rect = go_text.get_rect(center=(self.width // 2, self.height // 2 - 20))
-                self.canvas.blit(go_text, g_rect.topleft)
-                instr = self.game_over_instr_font.render("Pulsa ENTER para reiniciar", True, (240, 240, 240))
-                instr_rect = instr.get_rect(center=(self.width // 2, self.height // 2 + 40))
-                self.canvas.blit(instr, instr_rect.topleft)
-
-            # Re-blit final (para fullscreen se escala la canvas ya actualizada)
-            if self.is_fullscreen:
-                scaled = pygame.transform.smoothscale(self.canvas, self.scaled_size)
-                self.screen.fill((0, 0, 0))
-                self.screen.blit(scaled, (self.offset_x, self.offset_y))
-            else:
-                self.screen.blit(self.canvas, (0, 0))
+        # Gestos: sólo en las pantallas que no se juegan con las manos
+        for action in actions:
+            if self.machine.state.accepts_gestures and not self.machine.handle_action(action, now):
+                return False
 
-            pygame.display.flip()
-            self.clock.tick(30)
-            return True
+        # Fase de actualización (lógica pura) y de dibujo
+        self.logic.set_hand_depth(hand_depth)
+        self.machine.update(now, right_pos, left_pos)
+        self._handle_game_events(self.machine.drain_events())
+        self.machine.draw(self, self.canvas, now, right_pos, left_pos)
+        if self.machine.state.name == "playing":
+            self.machine.replay.record(now, self.logic, self.ball_animation.current_frame, right_pos, left_pos)
+
+        self._present()
+        if self.recorder is not None:
+            self.recorder.capture(self.game_clock.now)
+        # Con un reloj virtual (grabaciones, pruebas) no se espera: se va tan rápido como se pueda
+        if self.game_clock.realtime:
+            state = self.machine.state
+            set_tag('stage', 'espera')
+            self.pacer.wait(state.tick_rate, state.frame_spin_ms, state.name)
+        return True
 
-        # Auto-launch después de que la pelota se haya reseteado (si está habilitado)
-        now = pygame.time.get_ticks()
-        if self.auto_launch_enabled and not self.ball_launching and not self.ball_moving and not self.game_over:
-            if now - self._last_reset_time >= self.auto_launch_delay_ms:
-                self._launch_ball_to_random_target()
+    def _start_profiling(self, seconds: float = 10.0) -> None:
+        """F9: perfilar `seconds` segundos sin parar el juego (ver game_profiler.py)"""
+        if start_profiling(seconds, on_done=self._profile_done) is not None:
+            log.info("Perfilando %.0f s...", seconds)
 
-        pygame.display.flip()
-        # Limitar FPS (sin cambio)
-        self.clock.tick(60)  # Aumentado a 60 FPS para movimiento más suave
-        return True
+    def _profile_done(self, profiler) -> None:
+        # Se llama desde el hilo del perfilador: sólo registrar
+        log.info("Perfil guardado en %s", profiler.path, extra={'fields': {
+            'muestras': profiler.samples, 'coste_ms': round(profiler.sample_cost_s * 1000, 1),
+            'estados': {k: f"{v:.0%}" for k, v in profiler.summary('state').items()}}})
+
+    def start_recording(self, path: str | None = None, fps: int = 30) -> None:
+        """Grabar el canvas en un clip (se codifica en otro hilo; ver vista/video_recorder.py)"""
+        if self.recorder is not None:
+            return
+        path = path or clip_path()
+        try:
+            self.recorder = VideoRecorder(path, self.canvas, fps=fps, on_closed=self._clip_done)
+        except IOError as e:
+            log.warning("No se pudo empezar a grabar: %s", e)
+            return
+        log.info("Grabando en %s", path)
+
+    def stop_recording(self) -> None:
+        """Parar sin esperar al codificador (cierra el fichero en su hilo; ver _clip_done)"""
+        if self.recorder is None:
+            return
+        recorder, self.recorder = self.recorder, None
+        recorder.close()
+        self._closing_clips = [clip for clip in self._closing_clips if not clip.closed] + [recorder]
+
+    def _clip_done(self, recorder) -> None:
+        # Se llama desde el hilo del codificador: sólo registrar
+        stats = recorder.stats()
+        log.info("Clip guardado en %s", recorder.path, extra={'fields': {
+            'frames': stats["written"], 'descartados': stats["dropped"],
+            'captura_ms': round(stats["capture_ms_avg"], 2), 'captura_max_ms': round(stats["capture_ms_max"], 2),
+            'codificacion_ms': round(stats["encode_ms_avg"], 2), 'cola_max': stats["queue_max"]}})
 
     def cleanup(self) -> None:
-        # sin cambio
-        pygame.quit()
\ No newline at end of file
+        stop_profiling()
+        self.stop_recording()
+        for clip in self._closing_clips:
+            clip.wait()  # al salir sí se espera: que ningún clip quede a medias
+        self._closing_clips = []
+        stats = self.audio.stats()
+        if stats["played"]:
+            log.info("Latencia de audio", extra={'fields': {
+                'buffer_ms': round(stats["buffer_ms"], 1), 'despacho_ms': round(stats["dispatch_avg_ms"], 2),
+                'max_ms': round(stats["dispatch_max_ms"], 2), 'eventos': stats["played"]}})
+        for state, pace in self.pacer.stats().items():
+            if "p50_ms" in pace:
+                log.info("Ritmo de frames (%s)", state, extra={'fields': {
+                    'frames': pace["frames"], 'plazos_perdidos': pace["missed"],
+                    'p50_ms': round(pace["p50_ms"], 2), 'p95_ms': round(pace["p95_ms"], 2),
+                    'p99_ms': round(pace["p99_ms"], 2), 'jitter_ms': round(pace["jitter_ms"], 3)}})
+        self.audio.shutdown()
+        self.stats.close(self.logic.score, self.logic.misses)
+        self.resources.shutdown()
+        pygame.quit()
@@ -0,0 +1,290 @@
+import hashlib
+import io
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from game_log import get_logger
+
+log = get_logger("recursos")
+
+
+_CACHE_MAGIC = b"HDGC"
+_CACHE_VERSION = 1
+_HEADER = struct.Struct("<4sBHH4s")  # magic, versión, ancho, alto, formato ('RGB ' / 'RGBA')
+
+
+def _fit_size(src_size, target_size, mode, fit):
+    """Tamaño final según el modo de escalado ('scale', 'fit' o 'cover')"""
+    iw, ih = src_size
+    tw, th = target_size
+    if iw == 0 or ih == 0:
+        raise ValueError("invalid image size")
+    if mode == "scale":
+        return (tw, th)
+    if mode == "fit":
+        k = min(tw / iw, th / ih) * fit
+    elif mode == "cover":
+        k = max(tw / iw, th / ih) * fit
+    else:
+        raise ValueError(f"unknown scale mode: {mode}")
+    return (max(1, int(iw * k)), max(1, int(ih * k)))
+
+
+class ResourceManager:
+    """
+    Carga de imágenes y sonidos en un pool de hilos con caché en disco.
+
+    - Las imágenes se decodifican, escalan y desenfocan en segundo plano; el
+      resultado se guarda como píxeles crudos en `cache_dir`, indexado por el
+      hash del archivo fuente, el modo de escalado y la resolución destino.
+    - `request()` nunca bloquea; `get()` espera sólo si el asset aún no está
+      listo y hace la conversión de formato de pantalla en el hilo principal.
+    - Los assets de un estado concreto (game over, preparación) se piden
+      cuando hacen falta y se liberan con `release()`.
+    """
+
+    def __init__(self, images_dir: str, audio_dir: str | None = None, cache_dir: str | None = None,
+                 max_workers: int = 4) -> None:
+        self.images_dir = images_dir
+        self.audio_dir = audio_dir
+        root = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+        self.cache_dir = cache_dir or os.path.join(root, ".asset_cache")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError:
+            self.cache_dir = None  # sin caché en disco (p. ej. carpeta de sólo lectura)
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assets")
+        self._futures: dict = {}
+        self._alpha: dict[str, bool] = {}
+        self._surfaces: dict[str, pygame.Surface | None] = {}
+        self.timings: dict[str, float] = {}  # ms de carga por asset (en el hilo de trabajo)
+        self._counter_lock = threading.Lock()  # los contadores se incrementan desde el pool
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # --- Imágenes ---
+    def request(self, name: str, filename: str, size: tuple[int, int] | None = None, mode: str = "scale",
+                fit: float = 1.0, smooth: bool = True, blur: float | None = None, alpha: bool = True) -> None:
+        """Encolar la carga de una imagen (no bloquea). blur: factor de reducción para desenfocar."""
+        if name in self._futures or name in self._surfaces:
+            return
+        path = os.path.join(self.images_dir, filename)
+        self._alpha[name] = alpha
+        self._futures[name] = self._pool.submit(self._load_pixels, name, path, size, mode, fit, smooth, blur, alpha)
+
+    def get(self, name: str) -> pygame.Surface | None:
+        """Superficie lista para blitear, o None si el asset no pudo cargarse"""
+        if name in self._surfaces:
+            return self._surfaces[name]
+        future = self._futures.pop(name, None)
+        if future is None:
+            return None
+        surface = None
+        try:
+            fmt, size, pixels = future.result()
+            image = pygame.image.frombuffer(pixels, size, fmt)
+            # convert() copia los píxeles al formato de la pantalla: el blit posterior es el más rápido
+            surface = image.convert_alpha() if self._alpha.get(name, True) else image.convert()
+        except Exception as e:
+            log.warning("No se pudo cargar el asset '%s': %s", name, e)
+        self._surfaces[name] = surface
+        return surface
+
+    def ready(self, name: str) -> bool:
+        if name in self._surfaces:
+            return True
+        future = self._futures.get(name)
+        return future is not None and future.done()
+
+    def release(self, name: str) -> None:
+        """Liberar un asset específico de estado; se puede volver a pedir más tarde"""
+        self._surfaces.pop(name, None)
+        future = self._futures.pop(name, None)
+        if future is not None:
+            future.cancel()
+
+    def _cache_path(self, digest: str, size, mode: str, fit: float, smooth: bool, blur, alpha: bool) -> str | None:
+        if self.cache_dir is None:
+            return None
+        w, h = size if size is not None else (0, 0)
+        key = f"{digest}_{mode}_{w}x{h}_f{fit:g}_s{int(smooth)}_b{blur or 0:g}_a{int(alpha)}"
+        return os.path.join(self.cache_dir, key + ".px")
+
+    def _load_pixels(self, name, path, size, mode, fit, smooth, blur, alpha):
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()[:20]
+        cache_path = self._cache_path(digest, size, mode, fit, smooth, blur, alpha)
+
+        cached = self._read_cache(cache_path)
+        if cached is not None:
+            with self._counter_lock:
+                self.cache_hits += 1
+            self.timings[name] = (time.perf_counter() - start) * 1000
+            return cached
+
+        with self._counter_lock:
+            self.cache_misses += 1
+        image = pygame.image.load(io.BytesIO(data), os.path.basename(path))
+        if (smooth or blur) and image.get_bitsize() not in (24, 32):
+            # smoothscale necesita 24 o 32 bits por píxel
+            image = image.convert(32, pygame.SRCALPHA) if alpha else image.convert(24, 0)
+        if size is not None:
+            new_size = _fit_size(image.get_size(), size, mode, fit)
+            if smooth:
+                image = pygame.transform.smoothscale(image, new_size)
+            else:
+                image = pygame.transform.scale(image, new_size)
+        if blur:
+            # Desenfoque barato: reducir y volver a ampliar con filtrado
+            w, h = image.get_size()
+            small = pygame.transform.smoothscale(image, (max(1, int(w * blur)), max(1, int(h * blur))))
+            image = pygame.transform.smoothscale(small, (w, h))
+
+        fmt = "RGBA" if alpha else "RGB"
+        result = (fmt, image.get_size(), pygame.image.tobytes(image, fmt))
+        self._write_cache(cache_path, result)
+        self.timings[name] = (time.perf_counter() - start) * 1000
+        return result
+
+    @staticmethod
+    def _read_cache(cache_path):
+        if cache_path is None or not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, "rb") as f:
+                magic, version, w, h, fmt = _HEADER.unpack(f.read(_HEADER.size))
+                pixels = f.read()
+            fmt = fmt.decode("ascii").strip()
+            if magic != _CACHE_MAGIC or version != _CACHE_VERSION or len(pixels) != w * h * len(fmt):
+                return None
+            return (fmt, (w, h), pixels)
+        except (OSError, struct.error, UnicodeDecodeError):
+            return None
+
+    @staticmethod
+    def _write_cache(cache_path, result):
+        if cache_path is None:
+            return
+        fmt, (w, h), pixels = result
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, w, h, fmt.ljust(4).encode("ascii")))
+                f.write(pixels)
+            os.replace(tmp_path, cache_path)  # escritura atómica: nunca queda un archivo a medias
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    # --- Sonidos ---
+    def request_sound(self, name: str, filename: str) -> None:
+        """Decodificar un OGG en segundo plano (requiere pygame.mixer inicializado)"""
+        if name in self._futures or name in self._surfaces or self.audio_dir is None:
+            return
+        path = os.path.join(self.audio_dir, filename)
+        self._futures[name] = self._pool.submit(self._load_sound, name, path)
+
+    def get_sound(self, name: str) -> pygame.mixer.Sound | None:
+        future = self._futures.pop(name, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            log.warning("No se pudo cargar el sonido '%s': %s", name, e)
+            return None
+
+    def _load_sound(self, name, path):
+        start = time.perf_counter()
+        sound = pygame.mixer.Sound(path)
+        self.timings[name] = (time.perf_counter() - start) * 1000
+        return sound
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._surfaces.clear()
+
+
+def _benchmark_startup(width: int = 640, height: int = 480) -> None:
+    """
+    Compara la carga secuencial original con el pool de hilos (caché fría y caliente).
+
+    Ambas versiones cargan los mismos assets; los de arranque (menú, juego, pelota) y los
+    diferidos (game over, preparación) se miden por separado.
+    """
+    import shutil
+    import tempfile
+
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    images_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "Images"))
+    deferred = (("game_over", "game_over.png", "fit"), ("prep", "prep_screen.png", "cover"))
+
+    def screen_image(filename, mode):
+        img = pygame.image.load(os.path.join(images_dir, filename)).convert_alpha()
+        pygame.transform.smoothscale(img, _fit_size(img.get_size(), (width, height), mode, 0.95 if mode == "fit" else 1.0))
+
+    def sequential():
+        start = time.perf_counter()
+        bg = pygame.transform.scale(pygame.image.load(os.path.join(images_dir, "background.jpg")).convert(), (width, height))
+        small = pygame.transform.smoothscale(bg, (max(1, int(width * 0.06)), max(1, int(height * 0.06))))
+        pygame.transform.smoothscale(small, (width, height))
+        for name in ("right_hand.png", "left_hand.png"):
+            pygame.transform.smoothscale(pygame.image.load(os.path.join(images_dir, name)).convert_alpha(), (120, 120))
+        screen_image("menu.png", "fit")
+        pygame.image.load(os.path.join(images_dir, "spritesheet_pelota.png")).convert_alpha()
+        startup = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _, filename, mode in deferred:
+            screen_image(filename, mode)
+        return startup, (time.perf_counter() - start) * 1000
+
+    def parallel(cache_dir):
+        start = time.perf_counter()
+        rm = ResourceManager(images_dir, cache_dir=cache_dir)
+        rm.request("background", "background.jpg", (width, height), smooth=False, alpha=False)
+        rm.request("background_blur", "background.jpg", (width, height), smooth=False, blur=0.06, alpha=False)
+        rm.request("right_hand", "right_hand.png", (120, 120))
+        rm.request("left_hand", "left_hand.png", (120, 120))
+        rm.request("menu", "menu.png", (width, height), mode="fit", fit=0.95)
+        rm.request("ball_sheet", "spritesheet_pelota.png")
+        for name in ("background", "background_blur", "right_hand", "left_hand", "menu", "ball_sheet"):
+            rm.get(name)
+        startup = (time.perf_counter() - start) * 1000
+
+        # En el juego se piden al entrar en su estado; aquí, justo después del arranque
+        start = time.perf_counter()
+        for name, filename, mode in deferred:
+            rm.request(name, filename, (width, height), mode=mode, fit=0.95 if mode == "fit" else 1.0)
+        for name, _, _ in deferred:
+            rm.get(name)
+        elapsed = (time.perf_counter() - start) * 1000
+        rm.shutdown()
+        return startup, elapsed
+
+    cache_dir = tempfile.mkdtemp(prefix="asset_cache_")
+    try:
+        print(f"{'':28}{'arranque':>9}{'diferidos':>11}  (ms)")
+        for label, run in (("Secuencial (original):", sequential),
+                           ("Pool de hilos, caché fría:", lambda: parallel(cache_dir)),
+                           ("Pool de hilos, caché llena:", lambda: parallel(cache_dir))):
+            startup, later = run()
+            print(f"{label:28}{startup:9.1f}{later:11.1f}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    _benchmark_startup()
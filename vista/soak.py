@@ -0,0 +1,197 @@
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Sin ventana ni sonido reales (antes de importar pygame)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from game_clock import VirtualClock
+from modelo.simulation import ScriptedHand
+from vista.pygame_renderer import PygameRenderer
+
+
+def rss_bytes():
+    """Memoria residente del proceso, o None si no se puede medir en este sistema"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def live_surfaces():
+    """
+    Superficies de pygame vivas alcanzables desde Python (recorre el heap: sólo en los muestreos).
+
+    Surface no participa en el recolector, así que gc.get_objects() no la
+    devuelve: se buscan entre lo que referencian los objetos que sí (dicts,
+    listas, instancias, frames).
+    """
+    seen = set()
+    for obj in gc.get_objects():
+        for ref in gc.get_referents(obj):
+            if isinstance(ref, pygame.Surface):
+                seen.add(id(ref))
+    return len(seen)
+
+
+class SoakHand:
+    """Portero sintético que a veces se despista (para llegar a game over) y a veces se pierde (tracking)"""
+    def __init__(self, rng, miss_rate=0.35, dropout_rate=0.02):
+        self.rng = rng
+        self.miss_rate = miss_rate
+        self.dropout_rate = dropout_rate
+        self.hand = ScriptedHand(rng, reaction_ms=rng.uniform(150, 300))
+        self._launch = None
+        self._asleep = False
+
+    def position(self, now, logic, dt_ms):
+        if logic.ball_launching and logic.ball_launch_start_time != self._launch:
+            # Nuevo lanzamiento: decidir si este se falla
+            self._launch = logic.ball_launch_start_time
+            self._asleep = self.rng.random() < self.miss_rate
+        pos = self.hand.position(now, logic, dt_ms)
+        if self._asleep or self.rng.random() < self.dropout_rate:
+            return None
+        return pos
+
+
+def soak(games=1000, seed=0, warmup_games=20, sample_every=600, max_rss_growth_mb=32.0,
+         max_py_growth_mb=8.0, max_surface_growth=50, rotate_every=7, log=print):
+    """
+    Jugar `games` partidas sin ventana con la lógica, estados y dibujo reales.
+
+    Usa un VirtualClock (sin esperas: miles de partidas en minutos) y manos
+    sintéticas. Cada `sample_every` frames anota RSS, memoria de Python
+    (tracemalloc) y superficies vivas. La línea base se toma tras
+    `warmup_games` partidas (cachés ya llenas); si al final algo crece más
+    del umbral se considera una fuga, igual que si la caché de rotación pasa
+    de `_rotation_cache_max`. Devuelve (ok, muestras, motivos).
+    """
+    rng = random.Random(seed)
+    clock = VirtualClock(step=1 / 60)
+    stats_dir = tempfile.mkdtemp(prefix="soak-")
+    renderer = PygameRenderer(stats_path=os.path.join(stats_dir, "session_stats.db"), clock=clock)
+    tracemalloc.start()
+    samples = []
+    baseline = None
+    counts = {'frames': 0, 'launches': 0, 'games': 0, 'restarts': 0}
+    hand = SoakHand(rng)
+    last_launch = None
+    state_frames = 0
+    previous_state = None
+    began = time.perf_counter()
+
+    def key(k):
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=k))
+
+    def sample():
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+        row = {'frame': counts['frames'], 'games': counts['games'], 'rss_mb': None,
+               'py_mb': current / 2 ** 20, 'surfaces': live_surfaces(),
+               'rotation_cache': len(renderer._rotation_cache)}
+        rss = rss_bytes()
+        if rss is not None:
+            row['rss_mb'] = rss / 2 ** 20
+        samples.append(row)
+        return row
+
+    try:
+        while counts['games'] < games:
+            clock.tick()
+            logic = renderer.logic
+            state = renderer.machine.state.name
+            state_frames = state_frames + 1 if state == previous_state else 0
+            previous_state = state
+
+            # Avanzar por las pantallas como lo haría un jugador (con alguna pausa)
+            if state in ("menu", "prep") and state_frames == 30:
+                key(pygame.K_RETURN)
+            elif state == "game_over" and state_frames == 45:
+                key(pygame.K_RETURN)
+                counts['restarts'] += 1
+                hand = SoakHand(rng)
+            elif state == "playing" and counts['frames'] % (rotate_every * 60) == 0:
+                key(pygame.K_2)  # alternar la rotación: rotozoom o escalado mientras la pelota se acerca
+            if logic.ball_launching and logic.ball_launch_start_time != last_launch:
+                last_launch = logic.ball_launch_start_time
+                counts['launches'] += 1
+
+            pos = hand.position(clock.ticks_ms, logic, 1000 / 60)
+            right, left = logic.glove_positions(pos) if pos is not None else (None, None)
+            was_over = logic.game_over
+            if not renderer.render(right, left, hand_depth=rng.uniform(0.7, 1.3) if pos else None):
+                break
+            if logic.game_over and not was_over:
+                counts['games'] += 1
+                if counts['games'] == warmup_games:
+                    baseline = sample()
+            counts['frames'] += 1
+            if counts['frames'] % sample_every == 0:
+                row = sample()
+                log(f"{row['games']:>6} partidas | {row['frame']:>8} frames | "
+                    f"RSS {row['rss_mb'] if row['rss_mb'] is not None else float('nan'):.1f} MB | "
+                    f"Python {row['py_mb']:.2f} MB | superficies {row['surfaces']} | "
+                    f"caché de rotación {row['rotation_cache']}")
+        final = sample()
+    finally:
+        tracemalloc.stop()
+        renderer.cleanup()
+
+    failures = []
+    if baseline is None:
+        failures.append(f"sin línea base: {counts['games']} partidas jugadas, {warmup_games} de calentamiento")
+    else:
+        if final['rss_mb'] is not None and final['rss_mb'] - baseline['rss_mb'] > max_rss_growth_mb:
+            failures.append(f"RSS +{final['rss_mb'] - baseline['rss_mb']:.1f} MB (máx. {max_rss_growth_mb})")
+        if final['py_mb'] - baseline['py_mb'] > max_py_growth_mb:
+            failures.append(f"Python +{final['py_mb'] - baseline['py_mb']:.2f} MB (máx. {max_py_growth_mb})")
+        if final['surfaces'] - baseline['surfaces'] > max_surface_growth:
+            failures.append(f"superficies +{final['surfaces'] - baseline['surfaces']} (máx. {max_surface_growth})")
+    rotation_cache_peak = max(row['rotation_cache'] for row in samples)
+    if rotation_cache_peak > renderer._rotation_cache_max:
+        failures.append(f"caché de rotación {rotation_cache_peak} (máx. {renderer._rotation_cache_max})")
+    elapsed = time.perf_counter() - began
+    log(f"{counts['games']} partidas, {counts['launches']} lanzamientos, {counts['restarts']} reinicios, "
+        f"{counts['frames']} frames en {elapsed:.0f}s ({counts['frames'] / 60 / max(elapsed, 1e-9):.0f}x tiempo real)")
+    return not failures, samples, failures
+
+
+if __name__ == '__main__':
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser(description="Prueba de resistencia sin ventana: memoria y superficies")
+    parser.add_argument('--games', type=int, default=1000, help="Partidas hasta game over")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup-games', type=int, default=20, help="Partidas antes de tomar la línea base")
+    parser.add_argument('--max-rss-growth-mb', type=float, default=32.0)
+    parser.add_argument('--max-py-growth-mb', type=float, default=8.0)
+    parser.add_argument('--max-surface-growth', type=int, default=50)
+    parser.add_argument('--out', help="CSV con las muestras (para dibujar la evolución)")
+    args = parser.parse_args()
+
+    ok, samples, failures = soak(args.games, args.seed, args.warmup_games,
+                                 max_rss_growth_mb=args.max_rss_growth_mb, max_py_growth_mb=args.max_py_growth_mb,
+                                 max_surface_growth=args.max_surface_growth)
+    if args.out and samples:
+        with open(args.out, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(samples[0]))
+            writer.writeheader()
+            writer.writerows(samples)
+    for failure in failures:
+        print(f"FUGA: {failure}")
+    sys.exit(0 if ok else 1)
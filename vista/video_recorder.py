@@ -0,0 +1,174 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pygame
+
+DEFAULT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "recordings"))
+
+
+class VideoRecorder:
+    """
+    Grabación de partidas sin frenar el juego.
+
+    El hilo del juego sólo copia los píxeles de `surface` tal cual están en
+    memoria (un memcpy si es de 32 bits, como el canvas) a uno de los
+    `pool_size` búferes preasignados (sin reservar memoria por frame) y lo
+    encola; un hilo convierte a BGR, codifica con cv2.VideoWriter (que suelta
+    el GIL) y devuelve el búfer al conjunto libre. Si el codificador se queda
+    atrás y no hay búfer libre, el frame se descarta: el vídeo pierde un
+    frame, el juego no espera.
+    Se captura a `fps` según el reloj del juego, sea cual sea el ritmo de render.
+    `close()` tampoco espera: el hilo codifica lo que quede, cierra el fichero
+    y llama a `on_closed(recorder)`.
+    """
+    def __init__(self, path, surface, fps=30, pool_size=8, fourcc="mp4v", on_closed=None):
+        # OpenCV sólo al empezar a grabar: el menú aparece antes de importarlo
+        import cv2
+        self.path = path
+        self.surface = surface
+        self.size = size = surface.get_size()  # (ancho, alto)
+        self.fps = fps
+        self.pool_size = pool_size
+        self.on_closed = on_closed
+        w, h = size
+        # Copia directa de la memoria de la superficie si es de 32 bits sin relleno entre filas
+        self._raw = surface.get_bytesize() == 4 and surface.get_pitch() == w * 4
+        if self._raw:
+            red_first = surface.get_shifts()[0] == 0
+            self._conversion = cv2.COLOR_RGBA2BGR if red_first else cv2.COLOR_BGRA2BGR
+        else:
+            self._conversion = cv2.COLOR_RGB2BGR
+        self._pool = [np.empty((h, w, 4 if self._raw else 3), dtype=np.uint8) for _ in range(pool_size)]
+        self._free = queue.SimpleQueue()
+        for i in range(pool_size):
+            self._free.put(i)
+        self._work = queue.SimpleQueue()
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self._writer.isOpened():
+            raise IOError(f"No se pudo abrir el vídeo '{path}' ({fourcc})")
+        self._next_time = None
+        self.captured = 0
+        self.written = 0
+        self.dropped = 0
+        self.capture_ms_total = 0.0
+        self.capture_ms_max = 0.0
+        self.queue_max = 0
+        self.encode_ms_total = 0.0
+        self._closing = False
+        self._thread = threading.Thread(target=self._encode, name="video", daemon=True)
+        self._thread.start()
+
+    def capture(self, now):
+        """Copiar la superficie si toca un frame de vídeo en el instante `now` (segundos del reloj del juego)"""
+        if self._next_time is None:
+            self._next_time = now
+        if now < self._next_time:
+            return False
+        # Siguiente frame de vídeo; sin acumular retraso si el juego iba más lento que `fps`
+        self._next_time = max(self._next_time + 1 / self.fps, now)
+
+        start = time.perf_counter()
+        try:
+            index = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if self._raw:
+            pixels = self.surface.get_buffer()
+            np.copyto(self._pool[index].reshape(-1), np.frombuffer(pixels, dtype=np.uint8))
+        else:
+            pixels = pygame.surfarray.pixels3d(self.surface)  # (ancho, alto, 3), vista sin copia
+            np.copyto(self._pool[index], pixels.swapaxes(0, 1))
+        del pixels  # libera el bloqueo de la superficie
+        self._work.put(index)
+        self.queue_max = max(self.queue_max, self._work.qsize())
+        spent = (time.perf_counter() - start) * 1000
+        self.captured += 1
+        self.capture_ms_total += spent
+        self.capture_ms_max = max(self.capture_ms_max, spent)
+        return True
+
+    def _encode(self):
+        import cv2
+        w, h = self.size
+        bgr = np.empty((h, w, 3), dtype=np.uint8)
+        while True:
+            index = self._work.get()
+            if index is None:
+                break
+            start = time.perf_counter()
+            cv2.cvtColor(self._pool[index], self._conversion, dst=bgr)
+            self._free.put(index)
+            self._writer.write(bgr)
+            self.encode_ms_total += (time.perf_counter() - start) * 1000
+            self.written += 1
+        self._writer.release()
+        if self.on_closed is not None:
+            self.on_closed(self)
+
+    def stats(self):
+        return {
+            'captured': self.captured,
+            'written': self.written,
+            'dropped': self.dropped,
+            'capture_ms_avg': self.capture_ms_total / max(1, self.captured),
+            'capture_ms_max': self.capture_ms_max,
+            'encode_ms_avg': self.encode_ms_total / max(1, self.written),
+            'queue_depth': self._work.qsize(),
+            'queue_max': self.queue_max,
+        }
+
+    @property
+    def closed(self):
+        """True cuando el fichero ya está cerrado"""
+        return not self._thread.is_alive()
+
+    def close(self):
+        """Dejar de grabar sin esperar: el hilo codifica lo encolado y cierra el fichero"""
+        if not self._closing:
+            self._closing = True
+            self._work.put(None)
+
+    def wait(self, timeout=None):
+        """Esperar a que el fichero esté cerrado (al salir del juego o en el benchmark)"""
+        self._thread.join(timeout)
+        return self.closed
+
+
+def clip_path(out_dir=None):
+    """Ruta para un clip nuevo: recordings/clip-<fecha>-<hora>.mp4"""
+    out_dir = out_dir or DEFAULT_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    return os.path.join(out_dir, time.strftime("clip-%Y%m%d-%H%M%S.mp4"))
+
+
+if __name__ == '__main__':
+    # Coste en el hilo del juego: un canvas de 640x480 renderizado a 60 FPS y grabado a `--fps`
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Mide el coste de grabar en el hilo del juego")
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--fps', type=int, default=30)
+    parser.add_argument('--pool', type=int, default=8)
+    args = parser.parse_args()
+
+    surface = pygame.Surface((640, 480), pygame.SRCALPHA)
+    path = os.path.join(tempfile.mkdtemp(), "bench.mp4")
+    recorder = VideoRecorder(path, surface, fps=args.fps, pool_size=args.pool)
+    began = time.perf_counter()
+    for i in range(args.frames):
+        surface.fill(((i * 3) % 255, 80, 160, 255))
+        pygame.draw.circle(surface, (255, 255, 255), (i % 640, 240), 30)
+        recorder.capture(i / 60)
+        time.sleep(max(0.0, began + (i + 1) / 60 - time.perf_counter()))
+    recorder.close()
+    recorder.wait()
+    s = recorder.stats()
+    print(f"capturados {s['captured']} | escritos {s['written']} | descartados {s['dropped']} | "
+          f"captura {s['capture_ms_avg']:.2f} ms (máx. {s['capture_ms_max']:.2f}) | "
+          f"codificación {s['encode_ms_avg']:.2f} ms | cola máx. {s['queue_max']}/{args.pool}")
+    print(f"{path}: {os.path.getsize(path) / 1024:.0f} KB")